@@ -0,0 +1,117 @@
+"""
+Compares the pagination count strategies on the test models, using sqlite.
+
+    python -m benchmarks.bench_count_strategies [rows]
+
+subquery: the default scalar `SELECT count(1)` subquery column
+window:   `COUNT(*) OVER ()` column
+eager:    a separate `SELECT count(1)` query before the page query
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+import sqlalchemy
+import sqlalchemy.orm
+from flask import Flask
+from peewee import SqliteDatabase
+from playhouse.sqlite_ext import JSONField
+from pyrestsql.api.peewee import pagination as peewee_pagination
+from pyrestsql.api.sqlalchemy import pagination as sqlalchemy_pagination
+from tests.peewee_core import setup_peewee_database
+from tests.sqlalchemy_core import setup_sqlalchemy_database
+
+PAGE_SIZE = 50
+
+
+def sqlalchemy_strategies(Session):
+    return {
+        'subquery': sqlalchemy_pagination.PageNumberPagination(page_size=PAGE_SIZE),
+        'window': sqlalchemy_pagination.PageNumberPaginationWindowCount(page_size=PAGE_SIZE, Session=Session),
+        'eager': sqlalchemy_pagination.PageNumberPaginationEagerCount(page_size=PAGE_SIZE, Session=Session),
+    }
+
+
+def peewee_strategies(db):
+    return {
+        'subquery': peewee_pagination.PageNumberPagination(page_size=PAGE_SIZE),
+        'window': peewee_pagination.PageNumberPaginationWindowCount(page_size=PAGE_SIZE, db=db),
+        'eager': peewee_pagination.PageNumberPaginationEagerCount(page_size=PAGE_SIZE, db=db),
+    }
+
+
+def bench_sqlalchemy(app, rows, page, number):
+    engine = sqlalchemy.create_engine('sqlite+pysqlite:///:memory:', future=True)
+    Session, models = setup_sqlalchemy_database(engine)
+    User = models['User']
+
+    with Session() as session:
+        session.execute(sqlalchemy.insert(User), [{'email': f'user{i}'} for i in range(rows)])
+        session.commit()
+
+    def run(pagination):
+        query, meta = pagination.paginate(sqlalchemy.select(User).where(User.id % 2 == 0))
+
+        with Session(expire_on_commit=False) as session:
+            objs = pagination.fetch(session, query)
+
+        pagination.add_count_meta(objs, meta)
+
+        return meta
+
+    return _bench(app, sqlalchemy_strategies(Session), run, page, number)
+
+
+def bench_peewee(app, rows, page, number):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    db, models = setup_peewee_database(SqliteDatabase(path), JSONField)
+    User = models['User']
+
+    with db:
+        User.insert_many([{'email': f'user{i}'} for i in range(rows)]).execute()
+
+    def run(pagination):
+        query, meta = pagination.paginate(User.select().where(User.id % 2 == 0))
+
+        with db:
+            objs = list(query)
+
+        pagination.add_count_meta(objs, meta)
+
+        return meta
+
+    return _bench(app, peewee_strategies(db), run, page, number)
+
+
+def _bench(app, strategies, run, page, number):
+    results = {}
+
+    with app.test_request_context(query_string={'page': page}):
+        counts = {name: run(pagination)['count'] for name, pagination in strategies.items()}
+        assert len(set(counts.values())) == 1, counts
+
+        for name, pagination in strategies.items():
+            seconds = min(timeit.repeat(lambda: run(pagination), number=number, repeat=3))
+            results[name] = seconds / number * 1000
+
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    number = 20
+    app = Flask(__name__)
+
+    print(f'{rows} rows, page size {PAGE_SIZE}, milliseconds per request (best of 3 x {number})')
+    print(f'{"orm":<12}{"page":>6}{"subquery":>12}{"window":>12}{"eager":>12}')
+
+    for orm, bench in (('sqlalchemy', bench_sqlalchemy), ('peewee', bench_peewee)):
+        for page in (1, 500):
+            results = bench(app, rows, page, number)
+            timings = ''.join(f'{results[name]:>12.2f}' for name in ('subquery', 'window', 'eager'))
+            print(f'{orm:<12}{page:>6}' + timings)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares marshmallow's `dump(many=True)` with the generated SchemaDumper on a page of objects.
+
+    python -m benchmarks.bench_dumpers [rows]
+
+simple: Int, Str, Float, Bool and DateTime fields
+nested: the same, with a Nested schema and a Method field, which marshmallow serializes
+"""
+import datetime
+import sys
+import timeit
+from types import SimpleNamespace
+
+import marshmallow
+from pyrestsql.api.dumpers import SchemaDumper
+
+
+class SimpleSchema(marshmallow.Schema):
+    id = marshmallow.fields.Int(dump_only=True)
+    email = marshmallow.fields.Str()
+    score = marshmallow.fields.Float()
+    active = marshmallow.fields.Bool()
+    created_at = marshmallow.fields.DateTime()
+
+
+class NestedSchema(SimpleSchema):
+    address = marshmallow.fields.Nested(SimpleSchema)
+    label = marshmallow.fields.Method('get_label')
+
+    def get_label(self, obj):
+        return f'{obj.id}: {obj.email}'
+
+
+def make_obj(i):
+    return SimpleNamespace(
+        id=i, email=f'user{i}@example.com', score=i / 3, active=bool(i % 2),
+        created_at=datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=i),
+    )
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    number = 20
+
+    objs = []
+    for i in range(rows):
+        obj = make_obj(i)
+        obj.address = make_obj(i)
+        objs.append(obj)
+
+    print(f'{rows} rows, milliseconds per dump (best of 5 x {number})')
+    print(f'{"schema":<10}{"marshmallow":>14}{"compiled":>12}{"speedup":>10}')
+
+    for name, schema in (('simple', SimpleSchema()), ('nested', NestedSchema())):
+        dumper = SchemaDumper(schema)
+        assert dumper.compiled and dumper.dump(objs, many=True) == schema.dump(objs, many=True)
+
+        timings = [
+            min(timeit.repeat(lambda: dump(objs, many=True), number=number, repeat=5)) / number * 1000
+            for dump in (schema.dump, dumper.dump)
+        ]
+
+        print(f'{name:<10}{timings[0]:>14.2f}{timings[1]:>12.2f}{timings[0] / timings[1]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Compares Flask's `jsonify()` with the JsonEncoder and, if orjson is installed, the OrjsonEncoder on the response of a
+GET_MANY page.
+
+    python -m benchmarks.bench_json_encoders [rows]
+"""
+import datetime
+import sys
+import timeit
+
+from flask import Flask, jsonify
+from pyrestsql.api.encoders import JsonEncoder, OrjsonEncoder, orjson
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    number = 20
+
+    results = {
+        'items': [
+            {
+                'id': i,
+                'email': f'user{i}@example.com',
+                'score': i / 3,
+                'active': bool(i % 2),
+                'created_at': (datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=i)).isoformat(),
+            }
+            for i in range(rows)
+        ],
+        'count': rows,
+        'next': 2,
+    }
+
+    encoders = {'jsonify': jsonify, 'JsonEncoder': JsonEncoder().response}
+    if orjson is not None:
+        encoders['OrjsonEncoder'] = OrjsonEncoder().response
+
+    app = Flask(__name__)
+
+    print(f'{rows} rows, milliseconds per response (best of 5 x {number})')
+    print(f'{"encoder":<16}{"ms":>10}')
+
+    with app.app_context():
+        for name, encode in encoders.items():
+            timing = min(timeit.repeat(lambda: encode(results), number=number, repeat=5)) / number * 1000
+
+            print(f'{name:<16}{timing:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compares marshmallow's `load()` with the generated SchemaLoader on a POST payload, valid and invalid.
+
+    python -m benchmarks.bench_loaders
+
+valid: a payload of Str, Int, Float and Bool fields with Length, Range and OneOf validators
+invalid: the same, with a wrong type and a value out of range, which marshmallow deserializes for the messages
+"""
+import timeit
+
+import marshmallow
+from marshmallow import ValidationError, validate
+from pyrestsql.api.loaders import SchemaLoader
+
+
+class ProjectSchema(marshmallow.Schema):
+    id = marshmallow.fields.Int(dump_only=True)
+    name = marshmallow.fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    user_id = marshmallow.fields.Int(required=True)
+    status = marshmallow.fields.Str(validate=validate.OneOf(['active', 'archived']))
+    budget = marshmallow.fields.Float(allow_none=True, validate=validate.Range(min=0))
+    priority = marshmallow.fields.Int(validate=validate.Range(min=1, max=5))
+    public = marshmallow.fields.Bool()
+
+
+def load(load_func, payload):
+    try:
+        return load_func(payload)
+    except ValidationError as ex:
+        return ex.messages
+
+
+def main():
+    number = 20000
+
+    payloads = {
+        'valid': {'name': 'pyrestsql', 'user_id': 1, 'status': 'active', 'budget': 1000, 'priority': 3, 'public': True},
+        'invalid': {'name': 'pyrestsql', 'user_id': '1x', 'status': 'active', 'budget': None, 'priority': 9},
+    }
+
+    schema = ProjectSchema()
+    loader = SchemaLoader(schema)
+    assert loader.compiled
+
+    print(f'microseconds per load (best of 5 x {number})')
+    print(f'{"payload":<10}{"marshmallow":>14}{"compiled":>12}{"speedup":>10}')
+
+    for name, payload in payloads.items():
+        assert load(loader.load, payload) == load(schema.load, payload)
+
+        timings = [
+            min(timeit.repeat(lambda: load(load_func, payload), number=number, repeat=5)) / number * 1000000
+            for load_func in (schema.load, loader.load)
+        ]
+
+        print(f'{name:<10}{timings[0]:>14.2f}{timings[1]:>12.2f}{timings[0] / timings[1]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
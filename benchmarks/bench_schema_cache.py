@@ -0,0 +1,81 @@
+"""
+Measures the per-request overhead of building the schema, with the usual `serializer_class()` which defines the
+Schema subclass in its body, using sqlite.
+
+    python -m benchmarks.bench_schema_cache
+
+schema: resolving the get_many schema, as every request does
+get:    get_response() of one object
+post:   post_payload() of one payload
+
+per request: `cache_schemas = False`, which defines and instantiates the Schema for every request
+cached:      the default, which reuses the instance built at register_app
+"""
+import sys
+import timeit
+
+import marshmallow
+import sqlalchemy
+import sqlalchemy.orm
+from flask import Flask
+from pyrestsql.api.sqlalchemy import SqlAlchemyApi
+from tests.sqlalchemy_core import setup_sqlalchemy_database
+
+
+def make_api(User, cache_schemas):
+    class UserApi(SqlAlchemyApi):
+        url_prefix = '/api/users'
+
+        model = User
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    UserApi.cache_schemas = cache_schemas
+
+    return UserApi
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    engine = sqlalchemy.create_engine('sqlite+pysqlite:///:memory:', future=True)
+    Session, models = setup_sqlalchemy_database(engine)
+    User = models['User']
+    user = User(id=1, email='user@example.com')
+
+    results = {}
+
+    for name, cache_schemas in (('per request', False), ('cached', True)):
+        app = Flask(__name__)
+        Api = make_api(User, cache_schemas)
+        Api.register_app(app, Session)
+        api = Api()
+
+        with app.test_request_context(method='POST', json={'email': 'user@example.com'}):
+            results[name] = {
+                bench: min(timeit.repeat(run, number=number, repeat=5)) / number * 1000000
+                for bench, run in (
+                    ('schema', lambda: api._schema('get_many_serializer_class')),
+                    ('get', lambda: api.get_response(user)),
+                    ('post', lambda: api.post_payload()),
+                )
+            }
+
+    print(f'microseconds per request (best of 5 x {number})')
+    print(f'{"":<14}{"schema":>10}{"get":>10}{"post":>10}')
+
+    for name, timings in results.items():
+        print(f'{name:<14}' + ''.join(f'{timings[bench]:>10.1f}' for bench in ('schema', 'get', 'post')))
+
+    print(f'{"saved":<14}' + ''.join(
+        f'{results["per request"][bench] - results["cached"][bench]:>10.1f}' for bench in ('schema', 'get', 'post')
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compares the marshmallow Schema with the MsgspecSerializer of an equivalent msgspec Struct, which an Api uses when
+serializer_class() returns the Struct. Requires msgspec.
+
+    python -m benchmarks.bench_serializers [rows]
+
+load: post_payload() of one payload
+dump: get_many_response() of a page of `rows` objects
+"""
+import datetime
+import sys
+import timeit
+from types import SimpleNamespace
+from typing import Annotated, Union
+
+import marshmallow
+import msgspec
+from pyrestsql.api.serializers import MsgspecSerializer
+
+
+class UserSchema(marshmallow.Schema):
+    id = marshmallow.fields.Int(dump_only=True)
+    email = marshmallow.fields.Str(required=True, validate=marshmallow.validate.Length(max=30))
+    age = marshmallow.fields.Int(validate=marshmallow.validate.Range(min=0))
+    created_at = marshmallow.fields.DateTime()
+
+
+class UserStruct(msgspec.Struct):
+    email: Annotated[str, msgspec.Meta(max_length=30)]
+    age: Union[Annotated[int, msgspec.Meta(ge=0)], msgspec.UnsetType] = msgspec.UNSET
+    created_at: Union[datetime.datetime, msgspec.UnsetType] = msgspec.UNSET
+    id: Union[int, msgspec.UnsetType] = msgspec.UNSET
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    number = 20
+
+    payload = {'email': 'user@example.com', 'age': 30}
+    objs = [
+        SimpleNamespace(id=i, email=f'user{i}@example.com', age=i % 90, created_at=datetime.datetime(2024, 1, 1))
+        for i in range(rows)
+    ]
+
+    serializers = {'marshmallow': UserSchema(), 'msgspec': MsgspecSerializer(UserStruct)}
+
+    assert serializers['marshmallow'].load(payload) == serializers['msgspec'].load(payload)
+    assert serializers['marshmallow'].dump(objs, many=True) == serializers['msgspec'].dump(objs, many=True)
+
+    print(f'microseconds per load, milliseconds per dump of {rows} rows (best of 5)')
+    print(f'{"":<14}{"load":>10}{"dump":>10}')
+
+    for name, serializer in serializers.items():
+        load = min(timeit.repeat(lambda: serializer.load(payload), number=number * 100, repeat=5)) / number / 100
+        dump = min(timeit.repeat(lambda: serializer.dump(objs, many=True), number=number, repeat=5)) / number
+
+        print(f'{name:<14}{load * 1000000:>10.1f}{dump * 1000:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Measures the SQL generation the StatementCache saves per GET_MANY request on the test models, using sqlite.
+
+    python -m benchmarks.bench_statement_cache [rows]
+
+Each request filters with `id__gte`/`id__lte`, orders by `-id` and fetches the first page of a PageNumberPagination,
+whose count subquery repeats the filters. The values change on every request, so that they are bound each time.
+
+built:  get_many_objects() building and compiling the query
+cached: get_many_objects() with a StatementCache, binding the values to the statement of the first request
+"""
+import itertools
+import os
+import sys
+import tempfile
+import timeit
+
+import marshmallow
+import sqlalchemy
+import sqlalchemy.orm
+from flask import Flask
+from peewee import SqliteDatabase
+from playhouse.sqlite_ext import JSONField
+from pyrestsql.api.peewee import Api as PeeweeApi
+from pyrestsql.api.peewee.pagination import PageNumberPagination as PeeweePageNumberPagination
+from pyrestsql.api.peewee.statements import StatementCache as PeeweeStatementCache
+from pyrestsql.api.sqlalchemy import SqlAlchemyApi
+from pyrestsql.api.sqlalchemy.pagination import PageNumberPagination as SqlAlchemyPageNumberPagination
+from pyrestsql.api.sqlalchemy.statements import StatementCache as SqlAlchemyStatementCache
+from tests.peewee_core import setup_peewee_database
+from tests.sqlalchemy_core import setup_sqlalchemy_database
+
+PAGE_SIZE = 10
+
+
+class Serializer(marshmallow.Schema):
+    id = marshmallow.fields.Int(dump_only=True)
+    email = marshmallow.fields.Str(required=True)
+
+
+def make_api(base, User, pagination, statement_cache):
+    class UserApi(base):
+        url_prefix = '/api/users'
+
+        model = User
+
+        filterset_fields = ['id', 'email']
+
+        ordering_fields = ['id', 'email']
+
+        def statement_cache_key(self):
+            return ()
+
+        def serializer_class(self):
+            return Serializer
+
+    UserApi.pagination = pagination
+    UserApi.statement_cache = statement_cache
+
+    return UserApi
+
+
+def bench_sqlalchemy(rows, number):
+    engine = sqlalchemy.create_engine('sqlite+pysqlite:///:memory:', future=True)
+    Session, models = setup_sqlalchemy_database(engine)
+    User = models['User']
+
+    with Session() as session:
+        session.execute(sqlalchemy.insert(User), [{'email': f'user{i}'} for i in range(rows)])
+        session.commit()
+
+    apis = {
+        name: make_api(SqlAlchemyApi, User, SqlAlchemyPageNumberPagination(page_size=PAGE_SIZE), statement_cache)
+        for name, statement_cache in (('built', None), ('cached', SqlAlchemyStatementCache()))
+    }
+
+    for Api in apis.values():
+        Api.register_app(Flask(__name__), Session)
+
+    return _bench(apis, rows, number)
+
+
+def bench_peewee(rows, number):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    db, models = setup_peewee_database(SqliteDatabase(path), JSONField)
+    User = models['User']
+
+    with db:
+        User.insert_many([{'email': f'user{i}'} for i in range(rows)]).execute()
+
+    apis = {
+        name: make_api(PeeweeApi, User, PeeweePageNumberPagination(page_size=PAGE_SIZE), statement_cache)
+        for name, statement_cache in (('built', None), ('cached', PeeweeStatementCache()))
+    }
+
+    for Api in apis.values():
+        Api.register_app(Flask(__name__), db)
+
+    return _bench(apis, rows, number)
+
+
+def _bench(apis, rows, number):
+    results = {}
+    app = Flask(__name__)
+
+    for name, Api in apis.items():
+        api = Api()
+        values = itertools.cycle(range(1, rows - PAGE_SIZE * 2, max(rows // 100, 1)))
+
+        def run():
+            low = next(values)
+            query_string = {'id__gte': low, 'id__lte': low + PAGE_SIZE * 2, 'ordering': '-id', 'page': 1}
+
+            with app.test_request_context(query_string=query_string):
+                objs, meta = api.get_many_objects()
+
+            assert len(objs) == PAGE_SIZE and meta['count'] == PAGE_SIZE * 2 + 1, (len(objs), meta)
+
+        run()
+
+        seconds = min(timeit.repeat(run, number=number, repeat=5))
+        results[name] = seconds / number * 1000000
+
+    results['saved'] = results['built'] - results['cached']
+
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    number = 500
+
+    print(f'{rows} rows, page size {PAGE_SIZE}, microseconds per request (best of 5 x {number})')
+    print(f'{"orm":<12}{"built":>10}{"cached":>10}{"saved":>10}')
+
+    for orm, bench in (('sqlalchemy', bench_sqlalchemy), ('peewee', bench_peewee)):
+        results = bench(rows, number)
+        print(f'{orm:<12}' + ''.join(f'{results[name]:>10.0f}' for name in ('built', 'cached', 'saved')))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,14 @@
+import functools
 import inspect
 import re
 
 import psycopg2
-from flask import Blueprint, jsonify, Response, request
+from flask import Blueprint, Response, request, g
 from pyrestsql.exc import RestError, EntityNotFound, BadInput
+from pyrestsql.api.dumpers import SchemaDumper
+from pyrestsql.api.encoders import default_json_encoder
+from pyrestsql.api.loaders import SchemaLoader
+from pyrestsql.api.serializers import MsgspecSerializer
 from marshmallow import ValidationError, Schema
 from marshmallow.schema import SchemaMeta
 import logging
@@ -100,10 +105,14 @@ class ApiMetaClass(type):
             return
         cls.require_model_or_queryset()
         cls.add_missing_model_or_queryset()
+        cls.validate_pagination()
         cls.ensure_apis()
         cls.ensure_filterset_fields()
+        cls.ensure_ordering_fields()
+        cls.ensure_search_fields()
         cls.wrap_perform_create_for_integrity_errors()
         cls.wrap_perform_update_for_integrity_errors()
+        cls.wrap_performs_for_pagination_invalidation()
 
     def require_model_or_queryset(cls):
         if cls.url_prefix is None:
@@ -120,6 +129,12 @@ class ApiMetaClass(type):
     def add_missing_model_or_queryset(cls):
         raise NotImplementedError
 
+    def validate_pagination(cls):
+        if cls.url_prefix is None or cls.pagination is None:
+            return
+
+        cls.pagination.validate_model(cls.model)
+
     def ensure_apis(cls):
         cls.copy_apis()
         cls.validate_apis()
@@ -146,6 +161,8 @@ class ApiMetaClass(type):
 
     def ensure_filterset_fields(cls):
         cls.copy_filterset_fields()
+        cls.copy_trigram_fields()
+        cls.copy_geo_fields()
         cls.ensure_filterset_class()
         cls.generate_filterset_instance()
 
@@ -158,20 +175,102 @@ class ApiMetaClass(type):
 
         cls.filterset_fields = list(cls.filterset_fields)
 
+    def copy_trigram_fields(cls):
+        if cls.trigram_fields is None:
+            cls.trigram_fields = []
+
+        if isinstance(cls.trigram_fields, str):
+            cls.trigram_fields = [cls.trigram_fields]
+
+        cls.trigram_fields = list(cls.trigram_fields)
+
+    def copy_geo_fields(cls):
+        if cls.geo_fields is not None:
+            cls.geo_fields = tuple(cls.geo_fields)
+
     def ensure_filterset_class(cls):
         raise NotImplementedError
 
     def generate_filterset_instance(cls):
         raise NotImplementedError
 
+    def ensure_ordering_fields(cls):
+        cls.copy_ordering_fields()
+        cls.ensure_orderingset_class()
+        cls.generate_orderingset_instance()
+
+    def copy_ordering_fields(cls):
+        if cls.ordering_fields is None:
+            cls.ordering_fields = []
+
+        if isinstance(cls.ordering_fields, str):
+            cls.ordering_fields = [cls.ordering_fields]
+
+        cls.ordering_fields = list(cls.ordering_fields)
+
+    def ensure_orderingset_class(cls):
+        raise NotImplementedError
+
+    def generate_orderingset_instance(cls):
+        raise NotImplementedError
+
+    def ensure_search_fields(cls):
+        cls.copy_search_fields()
+        cls.ensure_searchset_class()
+        cls.generate_searchset_instance()
+
+    def copy_search_fields(cls):
+        if cls.search_fields is None:
+            cls.search_fields = []
+
+        if isinstance(cls.search_fields, str):
+            cls.search_fields = [cls.search_fields]
+
+        cls.search_fields = list(cls.search_fields)
+
+    def ensure_searchset_class(cls):
+        raise NotImplementedError
+
+    def generate_searchset_instance(cls):
+        raise NotImplementedError
+
     def wrap_perform_create_for_integrity_errors(cls):
         raise NotImplementedError
 
     def wrap_perform_update_for_integrity_errors(cls):
         raise NotImplementedError
 
+    def wrap_performs_for_pagination_invalidation(cls):
+        """
+        After a successful write, let the pagination drop anything it has cached about the model, such as counts
+        """
+        def invalidate_decorator(func):
+            # Inherited from an Api that already wrapped it
+            if getattr(func, '_api_invalidates_pagination', False):
+                return func
+
+            @functools.wraps(func)
+            def _invalidate_decorator(self, *args, **kwargs):
+                result = func(self, *args, **kwargs)
+
+                if self.pagination is not None:
+                    self.pagination.invalidate(self.model)
+
+                return result
+
+            _invalidate_decorator._api_invalidates_pagination = True
+
+            return _invalidate_decorator
+
+        cls.perform_create = invalidate_decorator(cls.perform_create)
+        cls.perform_update = invalidate_decorator(cls.perform_update)
+        cls.perform_delete = invalidate_decorator(cls.perform_delete)
+
 
 class ErrorHandler:
+    # Set to the json_encoder of the Api which creates it
+    json_encoder = default_json_encoder()
+
     def register_errorhandlers(self, app):
         app.errorhandler(404)(self._handle_404)
         app.errorhandler(Exception)(self._handle_uncaught_exception)
@@ -189,7 +288,7 @@ class ErrorHandler:
         error_response = {
             'error': messages,
         }
-        return jsonify(error_response), 404
+        return self.json_encoder.response(error_response), 404
 
     def _handle_uncaught_exception(self, ex):
         print('hello', ex)
@@ -197,20 +296,20 @@ class ErrorHandler:
         error_response = {
             'error': str(ex)
         }
-        return jsonify(error_response), 500
+        return self.json_encoder.response(error_response), 500
 
     def _handle_rest_error(self, ex):
         logger.exception(ex)
         response = {
             'error': ex.messages
         }
-        return jsonify(response), ex.code
+        return self.json_encoder.response(response), ex.code
 
     def _handle_marshmallow_validation_error(self, ex: ValidationError):
         response = {
             'error': ex.messages
         }
-        return jsonify(response), 400
+        return self.json_encoder.response(response), 400
 
 
 class IntegrityErrorManager:
@@ -238,16 +337,77 @@ class BaseApi(metaclass=ApiMetaClass):
     filterset_fields = None
     filterset = None
 
+    # Text filterset_fields to add the indexed icontains and similar lookups to
+    trigram_fields = None
+    trigram_index_class = None
+
+    # (latitude, longitude) fields, to add the indexed bbox and near filters on
+    geo_fields = None
+    geo_index_class = None
+
+    orderingset_class = None
+    ordering_fields = None
+    orderingset = None
+
+    searchset_class = None
+    search_fields = None
+    searchset = None
+    # e.g. a PostgresSearch subclass with another text search config, instead of the backend for the dialect
+    search_backend_class = None
+
     blueprint = None
 
     error_handler_class = ErrorHandler
     integrity_error_manager_class = IntegrityErrorManager
 
+    # Encodes the bodies of the responses, and of the errors of the default ErrorHandler, see JsonEncoder. orjson is
+    # used if installed
+    json_encoder = default_json_encoder()
+
+    # Name of a table in which triggers keep the exact row count of the model, for unfiltered EagerCount pagination.
+    # Installed by install_row_counter(), called once like a migration rather than at register_app
+    counter_table = None
+    row_counter_class = None
+    row_counter = None
+
+    # e.g. IndexAdvisor(), to warn about filtered/ordered/permission columns without an index
+    index_advisor = None
+    index_advice = None
+
+    # e.g. StatementCache(), to reuse the GET_MANY query of requests which differ only in their filter values. Used
+    # only by requests which statement_cache_key() returns a key for
+    statement_cache = None
+
+    # Schemas are built once at register_app. Set to False when serializer_class() returns a different schema per
+    # request, e.g. with only the fields the current user may see
+    cache_schemas = True
+    schemas = {}
+    schema_names = {
+        'GET': 'get_serializer_class',
+        'GET_MANY': 'get_many_serializer_class',
+        'POST': 'post_serializer_class',
+        'PATCH': 'patch_serializer_class',
+    }
+
+    # GET_MANY dumps its cached schema with a generated function, see SchemaDumper. Set to False to dump with
+    # marshmallow
+    compile_dumpers = True
+    dumpers = {}
+
+    # POST and PATCH load their cached schemas with a generated function, see SchemaLoader. Set to False to load with
+    # marshmallow
+    compile_loaders = True
+    loaders = {}
+
+    # SerializerBackends for what serializer_class() may return besides a marshmallow Schema, e.g. a msgspec Struct
+    serializer_backends = (MsgspecSerializer,)
+
     def __init__(self, api=None):
         self.api = api
 
     @classmethod
-    def register_app(cls, app, error_handler=None, integrity_error_manager=None):
+    def register_app(cls, app, error_handler=None, integrity_error_manager=None, row_counter=None,
+                     trigram_index=None, geo_index=None):
         blueprint = Blueprint(cls.__name__, __name__)
 
         cls.blueprint = blueprint
@@ -257,6 +417,7 @@ class BaseApi(metaclass=ApiMetaClass):
 
         if 'GET_MANY' in cls.apis:
             blueprint.get(cls.url_prefix)(cls()._dispatch('GET_MANY'))
+            blueprint.post(f'{cls.url_prefix.rstrip("/")}/_search')(cls()._dispatch('SEARCH'))
 
         if 'POST' in cls.apis:
             blueprint.post(cls.url_prefix)(cls()._dispatch('POST'))
@@ -267,11 +428,47 @@ class BaseApi(metaclass=ApiMetaClass):
         if 'DELETE' in cls.apis:
             blueprint.delete(f'{cls.url_prefix}/<int:pk>')(cls()._dispatch('DELETE'))
 
-        cls.error_handler = error_handler or cls.error_handler_class()
+        if error_handler is None:
+            error_handler = cls.error_handler_class()
+            error_handler.json_encoder = cls.json_encoder
+
+        cls.error_handler = error_handler
         cls.error_handler.register_errorhandlers(app)
 
         cls.integrity_error_manager = integrity_error_manager or cls.integrity_error_manager_class()
 
+        if row_counter is not None:
+            if row_counter.installed():
+                cls.row_counter = row_counter
+
+                if cls.pagination is not None:
+                    cls.pagination.add_row_counter(cls.model, row_counter)
+            else:
+                logger.warning(f'{cls.__name__} counts normally until install_row_counter() installs its counter_table')
+
+        if trigram_index is not None and trigram_index.install():
+            cls.filterset.trigram_index = trigram_index
+
+        if geo_index is not None:
+            # Without its index, the GeoIndex still filters, with BETWEEN
+            geo_index.install()
+            cls.filterset.geo_index = geo_index
+
+        if cls.index_advisor is not None:
+            cls.index_advice = cls.index_advisor.advise(cls)
+
+        cls.schemas = cls().make_schemas() if cls.cache_schemas else {}
+
+        cls.dumpers = {}
+        if cls.compile_dumpers and isinstance(schema := cls.schemas.get('get_many_serializer_class'), Schema):
+            cls.dumpers['get_many_serializer_class'] = SchemaDumper(schema)
+
+        cls.loaders = {}
+        if cls.compile_loaders:
+            for name in ('post_serializer_class', 'patch_serializer_class'):
+                if isinstance(schema := cls.schemas.get(name), Schema):
+                    cls.loaders[name] = SchemaLoader(schema)
+
         app.register_blueprint(blueprint)
 
         return blueprint
@@ -282,20 +479,68 @@ class BaseApi(metaclass=ApiMetaClass):
         return {
             'GET': self.get,
             'GET_MANY': self.get_many,
+            'SEARCH': self.search,
             'POST': self.post,
             'PATCH': self.patch,
             'DELETE': self.delete
         }[self.api]
 
     def _ensure_schema(self, schema_class):
+        if (serializer := self._serializer_backend(schema_class)) is not None:
+            return serializer
+
         if callable(schema_class):
             schema_class = schema_class()
 
         if isinstance(schema_class, SchemaMeta):
             return schema_class()
 
+        if (serializer := self._serializer_backend(schema_class)) is not None:
+            return serializer
+
         return schema_class
 
+    def _serializer_backend(self, serializer_class):
+        for backend in self.serializer_backends:
+            if backend.accepts(serializer_class):
+                return backend(serializer_class)
+
+        return None
+
+    def make_schemas(self):
+        """
+        Return the schema instance of each of the `apis`, by the name of its method in `schema_names`
+        """
+        return {
+            name: self._ensure_schema(getattr(self, name))
+            for api, name in self.schema_names.items()
+            if api in self.apis
+        }
+
+    def _schema(self, name):
+        if (schema := self.schemas.get(name)) is not None:
+            return schema
+
+        return self._ensure_schema(getattr(self, name))
+
+    def _dumper(self, name):
+        """
+        The SchemaDumper of the schema of `name`, or else the schema, which both `dump()`
+        """
+        if (dumper := self.dumpers.get(name)) is not None:
+            return dumper
+
+        return self._schema(name)
+
+    def _loader(self, name):
+        """
+        The SchemaLoader of the schema of `name`, or else the schema, which both `load()`
+        """
+        if (loader := self.loaders.get(name)) is not None:
+            return loader
+
+        return self._schema(name)
+
     def get_documentation(self):
         return _documentation(
             self.get,
@@ -348,6 +593,13 @@ class BaseApi(metaclass=ApiMetaClass):
     def get_many_permissions(self, queryset):
         raise NotImplementedError()
 
+    def statement_cache_key(self):
+        """
+        What the get_many_queryset and get_many_permissions of this request depend on, e.g. the id of the current
+        user, for the `statement_cache` to keep a statement per value, or () if nothing. None skips the cache
+        """
+        return None
+
     def post_permissions(self, payload):
         raise NotImplementedError()
 
@@ -390,6 +642,22 @@ class BaseApi(metaclass=ApiMetaClass):
     def get_many_response(self, objs, meta=None):
         raise NotImplementedError()
 
+    def search(self, json=None):
+        """
+        GET_MANY with the query args in a JSON body, for filters too long for a URL, e.g. {"id__in": [1, 2, ...]}
+        """
+        g._api_query_args = self.search_payload(json)
+
+        return self.get_many()
+
+    def search_payload(self, json=None):
+        json = json or request.json
+
+        if not isinstance(json, dict):
+            raise ValidationError({'_schema': ['Invalid input type.']})
+
+        return json
+
     def post(self, json=None):
         raise NotImplementedError()
 
@@ -740,4 +1008,4 @@ class _FileApi(BaseApi):
     def delete(self, pk):
         self.perform_update(pk, {self.file_column_name: None})
 
-        return jsonify({}), 200
+        return self.json_encoder.response({}), 200
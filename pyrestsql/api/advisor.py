@@ -0,0 +1,271 @@
+import logging
+import random
+from functools import partial
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class IndexAdvice(NamedTuple):
+    table: str
+    column: str
+    reasons: tuple
+    ddl: str
+
+
+class _IndexAdvisor:
+    """
+    Logs a CREATE INDEX for each column an Api filters, orders or applies permissions on without an index, and with
+    `sample_rate` also EXPLAINs that fraction of GET_MANY queries for full table scans
+    """
+    sample_rate = 0.0
+    seq_scan_rows = 10000
+
+    def __init__(self, sample_rate=sample_rate, seq_scan_rows=seq_scan_rows):
+        self.sample_rate = sample_rate
+        self.seq_scan_rows = seq_scan_rows
+
+    def advise(self, api_class):
+        candidates = {}
+
+        for reason, columns in (
+                ('filter', self.filter_columns(api_class)),
+                ('ordering', self.ordering_columns(api_class)),
+                ('permission', self.permission_columns(api_class)),
+        ):
+            for column in columns:
+                if (table_and_column := self.table_and_column_name(column)) is not None:
+                    candidates.setdefault(table_and_column, []).append(reason)
+
+        indexed_columns = {}
+        advice = []
+
+        for (table, column), reasons in candidates.items():
+            if table not in indexed_columns:
+                indexed_columns[table] = self.indexed_columns(api_class, table)
+
+            if indexed_columns[table] is None or column in indexed_columns[table]:
+                continue
+
+            advice.append(IndexAdvice(
+                table, column, tuple(dict.fromkeys(reasons)), self.create_index_sql(api_class, table, column)
+            ))
+
+        advice += self.advise_json_paths(api_class)
+
+        for item in advice:
+            logger.warning(
+                f'{api_class.__name__} uses {item.table}.{item.column} for {", ".join(item.reasons)} '
+                f'without an index: {item.ddl}'
+            )
+
+        return advice
+
+    def advise_json_paths(self, api_class):
+        index_names = {}
+        advice = {}
+
+        for column, path in self.json_filter_paths(api_class):
+            if (table_and_column := self.table_and_column_name(column)) is None:
+                continue
+
+            table, column_name = table_and_column
+            jsonb = api_class.filterset.is_jsonb_column(column)
+            index_name, ddl = self.json_index_sql(api_class, table, column_name, path, jsonb)
+
+            if table not in index_names:
+                index_names[table] = self.index_names(api_class, table)
+
+            if index_names[table] is None or index_name in index_names[table]:
+                continue
+
+            # One GIN index on Postgres serves every path of the column
+            advice.setdefault(index_name, IndexAdvice(table, column_name, ('json filter',), ddl))
+
+        return list(advice.values())
+
+    def filter_columns(self, api_class):
+        if api_class.filterset is None:
+            return []
+
+        filterset = api_class.filterset
+        columns = []
+
+        for field in filterset.filterset_fields.values():
+            if field.path is not None:
+                continue
+
+            if field.lookup in filterset.geo_lookups:
+                # Without a geo index, bbox and near filter on BETWEEN on the latitude
+                if filterset.geo_index is None or not filterset.geo_index.indexed:
+                    columns.append(filterset.geo_columns[0])
+                continue
+
+            columns.append(field.column)
+
+        return columns
+
+    def json_filter_paths(self, api_class):
+        if api_class.filterset is None:
+            return []
+
+        return [
+            (field.column, field.path)
+            for field in api_class.filterset.filterset_fields.values()
+            if field.path is not None
+        ]
+
+    def ordering_columns(self, api_class):
+        if api_class.orderingset is None:
+            return []
+
+        return list(api_class.orderingset.ordering_fields.values())
+
+    def permission_columns(self, api_class):
+        obj = api_class()
+
+        try:
+            query = obj.get_many_permissions(obj.get_many_queryset())
+        except Exception:
+            logger.debug(f'Skipping the permissions of {api_class.__name__}, which cannot be built outside a request')
+            return []
+
+        return self.where_columns(query)
+
+    def table_and_column_name(self, column):
+        """
+        Return (table name, column name), or None if `column` is an expression rather than a table column
+        """
+        raise NotImplementedError()
+
+    def where_columns(self, query):
+        raise NotImplementedError()
+
+    def indexed_columns(self, api, table):
+        """
+        Return the names of the columns that lead an index of `table` in the live database, or None if it can't tell
+        """
+        raise NotImplementedError()
+
+    def index_names(self, api, table):
+        """
+        Return the names of the indexes of `table` in the live database, or None if it can't tell
+        """
+        raise NotImplementedError()
+
+    def dialect_name(self, api):
+        raise NotImplementedError()
+
+    def quote(self, api, name):
+        raise NotImplementedError()
+
+    def create_index_sql(self, api, table, column):
+        dialect_name = self.dialect_name(api)
+        index_name = self.quote(api, f'ix_{table}_{column}')
+        on = f'{self.quote(api, table)} ({self.quote(api, column)})'
+
+        if dialect_name == 'postgresql':
+            return f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {on}'
+
+        if dialect_name == 'sqlite':
+            return f'CREATE INDEX IF NOT EXISTS {index_name} ON {on}'
+
+        return f'CREATE INDEX {index_name} ON {on}'
+
+    def json_index_sql(self, api, table, column, path, jsonb=False):
+        """
+        Return (index name, DDL) of the index for equality on `path` inside the JSON `column`, on the expression the
+        FilterSet compiles the filter to
+        """
+        dialect_name = self.dialect_name(api)
+        quote = partial(self.quote, api)
+        json_path = '$.' + '.'.join(path)
+        path_name = '_'.join((column, *path))
+
+        if dialect_name == 'postgresql':
+            index_name = f'ix_{table}_{column}_gin'
+            document = quote(column) if jsonb else f'CAST({quote(column)} AS JSONB)'
+
+            return index_name, (
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(index_name)} '
+                f'ON {quote(table)} USING GIN (({document}) jsonb_path_ops)'
+            )
+
+        index_name = f'ix_{table}_{path_name}'
+
+        if dialect_name == 'mysql':
+            # Binary collated, as JSON_UNQUOTE() is, or the optimizer will not match the column to the filter
+            return index_name, (
+                f'ALTER TABLE {quote(table)} '
+                f'ADD COLUMN {quote(path_name)} VARCHAR(255) COLLATE utf8mb4_bin '
+                f"GENERATED ALWAYS AS (JSON_UNQUOTE(JSON_EXTRACT({quote(column)}, '{json_path}'))) VIRTUAL, "
+                f'ADD INDEX {quote(index_name)} ({quote(path_name)})'
+            )
+
+        if dialect_name == 'oracle':
+            return index_name, (
+                f"CREATE INDEX {quote(index_name)} ON {quote(table)} (JSON_VALUE({quote(column)}, '{json_path}'))"
+            )
+
+        # SQLite only uses an index on a generated column when the query names the column, so index the expression
+        return index_name, (
+            f'CREATE INDEX IF NOT EXISTS {quote(index_name)} '
+            f"ON {quote(table)} (json_extract({quote(column)}, '{json_path}'))"
+        )
+
+    def sample(self, api, query):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return
+
+        try:
+            scans = self.sequential_scans(api, query)
+        except Exception:
+            logger.exception(f'Could not EXPLAIN the GET_MANY query of {api.__class__.__name__}')
+            return
+
+        for table, rows in scans:
+            if rows is None or rows >= self.seq_scan_rows:
+                logger.warning(
+                    f'{api.__class__.__name__} GET_MANY scans all of {table}'
+                    + (f', an estimated {rows} rows' if rows is not None else '')
+                )
+
+    def sequential_scans(self, api, query):
+        """
+        Return (table name, estimated rows or None) for each full table scan in the plan of the query
+        """
+        raise NotImplementedError()
+
+
+def postgres_sequential_scans(plan):
+    """
+    Walk an `EXPLAIN (FORMAT JSON)` plan
+    """
+    stack = [plan[0]['Plan']]
+
+    while stack:
+        node = stack.pop()
+
+        if node.get('Node Type') == 'Seq Scan':
+            yield node.get('Relation Name'), int(node.get('Plan Rows', 0))
+
+        stack.extend(node.get('Plans', []))
+
+
+def mysql_sequential_scans(rows):
+    for row in rows:
+        if row.get('type') == 'ALL':
+            yield row.get('table'), int(row.get('rows') or 0)
+
+
+def sqlite_sequential_scans(details):
+    """
+    `EXPLAIN QUERY PLAN` says `SCAN table` (`SCAN TABLE table` before 3.36), with `USING ... INDEX` for index scans
+    """
+    for detail in details:
+        words = detail.split()
+
+        if words[:1] != ['SCAN'] or 'USING' in words:
+            continue
+
+        yield words[2] if words[1] == 'TABLE' else words[1], None
@@ -0,0 +1,207 @@
+import logging
+
+from pyrestsql.api.database import _DatabaseAccess
+
+logger = logging.getLogger(__name__)
+
+
+class RowCounter(_DatabaseAccess):
+    """
+    Exact row count of a table, kept in the `counter_table` by INSERT/DELETE triggers, for queries which read every
+    row of the table
+    """
+    def __init__(self, counter_table, **kwargs):
+        self.counter_table = counter_table
+
+    def install(self, reseed=False):
+        """
+        Create the counter table and triggers, and count the rows of the table unless they were counted before. Call it
+        once, like a migration, as the count reads the whole table while writes to it wait. MySQL fires no triggers on
+        TRUNCATE, so recount with reseed=True after truncating the table, as after recreating it on any database
+        """
+        dialect_name = self.dialect_name()
+
+        if dialect_name not in ('postgresql', 'mysql', 'sqlite'):
+            logger.warning(f'Row counters are not supported on {dialect_name}, {self.table_name()} is counted normally')
+            return False
+
+        lock_sql, unlock_sql = self.lock_sql(dialect_name)
+
+        with self.transaction() as execute:
+            execute(self.create_counter_table_sql())
+
+            if lock_sql is not None:
+                execute(lock_sql)
+
+            try:
+                for statement in self.trigger_sql(dialect_name):
+                    execute(statement)
+
+                if reseed:
+                    execute(self.delete_count_sql())
+
+                if execute(self.select_count_sql()) is None:
+                    execute(self.seed_sql())
+            finally:
+                if unlock_sql is not None:
+                    execute(unlock_sql)
+
+        return True
+
+    def installed(self):
+        """
+        Whether install() counted the rows of the table
+        """
+        return self.table_exists(self.counter_table) and self.scalar(self.select_count_sql()) is not None
+
+    def table_name(self):
+        raise NotImplementedError()
+
+    def count(self, query):
+        """
+        Return the maintained count if `query` reads every row of the table, otherwise None
+        """
+        raise NotImplementedError()
+
+    def trigger_name(self, suffix):
+        return self.quote(f'{self.counter_table}_{self.table_name()}_{suffix}')
+
+    def create_counter_table_sql(self):
+        return f'''
+            CREATE TABLE IF NOT EXISTS {self.quote(self.counter_table)} (
+                table_name VARCHAR(255) PRIMARY KEY,
+                row_count BIGINT NOT NULL
+            )
+        '''
+
+    def lock_sql(self, dialect_name):
+        """
+        Statements which keep the table from being written to until the count is seeded. SQLite has a single writer, so
+        its transaction is enough. MySQL commits before DDL, so it locks both tables outside of a transaction
+        """
+        table = self.quote(self.table_name())
+        counter_table = self.quote(self.counter_table)
+
+        return {
+            'postgresql': (f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE', None),
+            'mysql': (f'LOCK TABLES {table} WRITE, {counter_table} WRITE', 'UNLOCK TABLES'),
+            'sqlite': (None, None),
+        }[dialect_name]
+
+    def select_count_sql(self):
+        return f"SELECT row_count FROM {self.quote(self.counter_table)} WHERE table_name = '{self.table_name()}'"
+
+    def delete_count_sql(self):
+        return f"DELETE FROM {self.quote(self.counter_table)} WHERE table_name = '{self.table_name()}'"
+
+    def seed_sql(self):
+        return f'''
+            INSERT INTO {self.quote(self.counter_table)} (table_name, row_count)
+            SELECT '{self.table_name()}', COUNT(*) FROM {self.quote(self.table_name())}
+        '''
+
+    def update_count_sql(self, delta):
+        return f'''
+            UPDATE {self.quote(self.counter_table)}
+            SET row_count = row_count + {delta}
+            WHERE table_name = '{self.table_name()}'
+        '''
+
+    def trigger_sql(self, dialect_name):
+        return {
+            'postgresql': self._postgres_trigger_sql,
+            'mysql': self._mysql_trigger_sql,
+            'sqlite': self._sqlite_trigger_sql,
+        }[dialect_name]()
+
+    def _postgres_trigger_sql(self):
+        """
+        Statement level triggers with transition tables, so a bulk insert/delete updates the counter once
+        """
+        table = self.quote(self.table_name())
+        counter_table = self.quote(self.counter_table)
+
+        statements = []
+
+        for suffix, event, transition, delta in (
+                ('insert', 'INSERT', 'NEW TABLE AS changed_rows', '(SELECT COUNT(*) FROM changed_rows)'),
+                ('delete', 'DELETE', 'OLD TABLE AS changed_rows', '-(SELECT COUNT(*) FROM changed_rows)'),
+        ):
+            function = self.trigger_name(f'{suffix}_fn')
+
+            statements += [
+                f'''
+                    CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+                    BEGIN
+                        {self.update_count_sql(delta)};
+                        RETURN NULL;
+                    END;
+                    $$ LANGUAGE plpgsql
+                ''',
+                f'DROP TRIGGER IF EXISTS {self.trigger_name(suffix)} ON {table}',
+                f'''
+                    CREATE TRIGGER {self.trigger_name(suffix)}
+                    AFTER {event} ON {table}
+                    REFERENCING {transition}
+                    FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+                ''',
+            ]
+
+        function = self.trigger_name('truncate_fn')
+
+        statements += [
+            f'''
+                CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+                BEGIN
+                    UPDATE {counter_table} SET row_count = 0 WHERE table_name = '{self.table_name()}';
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            ''',
+            f'DROP TRIGGER IF EXISTS {self.trigger_name("truncate")} ON {table}',
+            f'''
+                CREATE TRIGGER {self.trigger_name("truncate")}
+                AFTER TRUNCATE ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+            ''',
+        ]
+
+        return statements
+
+    def _mysql_trigger_sql(self):
+        """
+        MySQL only has row level triggers. CREATE TRIGGER IF NOT EXISTS needs 8.0.29, so they are dropped and recreated
+        """
+        table = self.quote(self.table_name())
+
+        statements = []
+
+        for suffix, event, delta in (('insert', 'INSERT', 1), ('delete', 'DELETE', -1)):
+            statements += [
+                f'DROP TRIGGER IF EXISTS {self.trigger_name(suffix)}',
+                f'''
+                    CREATE TRIGGER {self.trigger_name(suffix)}
+                    AFTER {event} ON {table}
+                    FOR EACH ROW {self.update_count_sql(delta)}
+                ''',
+            ]
+
+        return statements
+
+    def _sqlite_trigger_sql(self):
+        table = self.quote(self.table_name())
+
+        statements = []
+
+        for suffix, event, delta in (('insert', 'INSERT', 1), ('delete', 'DELETE', -1)):
+            statements.append(
+                f'''
+                    CREATE TRIGGER IF NOT EXISTS {self.trigger_name(suffix)}
+                    AFTER {event} ON {table}
+                    FOR EACH ROW BEGIN
+                        {self.update_count_sql(delta)};
+                    END
+                '''
+            )
+
+        return statements
@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+
+
+class _DatabaseAccess:
+    """
+    Raw SQL against the database of the ORM, for the indexes, tables and triggers installed alongside a model
+    """
+    def dialect_name(self):
+        raise NotImplementedError()
+
+    def quote(self, name):
+        raise NotImplementedError()
+
+    def table_exists(self, name):
+        raise NotImplementedError()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yield a function which executes a statement and returns its first column of the first row, or None, committed
+        together where the database allows it
+        """
+        raise NotImplementedError()
+
+    def execute(self, statements):
+        """
+        Execute the DDL/DML statements in a single transaction, where the database allows it
+        """
+        with self.transaction() as execute:
+            for statement in statements:
+                execute(statement)
+
+    def scalar(self, sql):
+        """
+        Return the first column of the first row of `sql`, or None
+        """
+        raise NotImplementedError()
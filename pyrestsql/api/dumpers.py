@@ -0,0 +1,130 @@
+import operator
+from functools import partial
+
+from marshmallow import Schema, fields, missing
+from marshmallow.decorators import PRE_DUMP, POST_DUMP
+from marshmallow.utils import ensure_text_type
+
+
+class SchemaDumper:
+    """
+    Dumps like `schema.dump()`, with a function generated for the fields of the schema. Fields it can't format
+    inline, and schemas with dump hooks, are dumped by marshmallow
+    """
+    max_depth = 8
+
+    def __init__(self, schema, depth=0):
+        self.schema = schema
+        self._dump = self.compile(depth) if self.is_compilable() else None
+        self.compiled = self._dump is not None
+
+    def dump(self, obj, many=None):
+        if not self.compiled:
+            return self.schema.dump(obj, many=many)
+
+        many = self.schema.many if many is None else bool(many)
+
+        if many:
+            return [self._dump(item) for item in obj] if obj is not None else self.schema.dump(obj, many=True)
+
+        return self._dump(obj)
+
+    def is_compilable(self):
+        schema_class = type(self.schema)
+
+        return (
+            not self.schema._hooks[PRE_DUMP]
+            and not self.schema._hooks[POST_DUMP]
+            and schema_class.dump is Schema.dump
+            and schema_class._serialize is Schema._serialize
+            and schema_class.get_attribute is Schema.get_attribute
+            and self.schema.dict_class is dict
+        )
+
+    def compile(self, depth):
+        namespace = {
+            'missing': missing,
+            'ensure_text_type': ensure_text_type,
+            'get_attribute': self.schema.get_attribute,
+            'schema_dump': partial(self.schema.dump, many=False),
+        }
+
+        lines = [
+            'def dump(obj):',
+            "    if hasattr(obj, '__getitem__'):",
+            '        return schema_dump(obj)',
+            '    ret = {}',
+        ]
+
+        for i, (attr_name, field) in enumerate(self.schema.dump_fields.items()):
+            key = field.data_key if field.data_key is not None else attr_name
+            check_key = field.attribute if field.attribute is not None else attr_name
+
+            if (expression := self.field_expression(field, f'field_{i}', namespace, depth)) is not None:
+                lines += [
+                    f'    value = getattr(obj, {check_key!r}, missing)',
+                    '    if value is not missing:',
+                    f'        ret[{key!r}] = {expression}',
+                ]
+            else:
+                namespace[f'field_{i}'] = field
+                lines += [
+                    f'    value = field_{i}.serialize({attr_name!r}, obj, accessor=get_attribute)',
+                    '    if value is not missing:',
+                    f'        ret[{key!r}] = value',
+                ]
+
+        lines.append('    return ret')
+
+        exec('\n'.join(lines), namespace)
+
+        return namespace['dump']
+
+    def field_expression(self, field, name, namespace, depth):
+        """
+        Return the expression which formats `value` like the field serializes it, with what it needs in `namespace`
+        under `name`, or None if marshmallow has to serialize the field
+        """
+        field_class = type(field)
+
+        if (
+            not field._CHECK_ATTRIBUTE
+            or field_class.serialize is not fields.Field.serialize
+            or field_class.get_value is not fields.Field.get_value
+            or field.dump_default is not missing
+            or (field.attribute is not None and '.' in field.attribute)
+        ):
+            return None
+
+        if field_class._serialize is fields.Field._serialize:
+            return 'value'
+
+        if field_class._serialize is fields.String._serialize:
+            return 'None if value is None else value if type(value) is str else ensure_text_type(value)'
+
+        if (
+            field_class._serialize is fields.Number._serialize
+            and field_class._format_num is fields.Number._format_num
+            and field.num_type in (int, float)
+            and not field.as_string
+        ):
+            num_type = field.num_type.__name__
+            return f'None if value is None else value if type(value) is {num_type} else {num_type}(value)'
+
+        if field_class._serialize is fields.DateTime._serialize:
+            data_format = field.format or field.DEFAULT_FORMAT
+            namespace[name] = (
+                field.SERIALIZATION_FUNCS.get(data_format) or operator.methodcaller('strftime', data_format)
+            )
+            return f'None if value is None else {name}(value)'
+
+        if field_class is fields.Nested and depth < self.max_depth:
+            nested = SchemaDumper(field.schema, depth + 1)
+
+            if not nested.compiled:
+                return None
+
+            namespace[name] = partial(nested.dump, many=bool(field.schema.many or field.many))
+            return f'None if value is None else {name}(value)'
+
+        return None
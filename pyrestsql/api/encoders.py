@@ -0,0 +1,63 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonEncoder:
+    """
+    Encodes response and error bodies to compact UTF-8 JSON, in the order of their keys, with datetimes, decimals,
+    UUIDs and dataclasses
+    """
+    mimetype = 'application/json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=self.default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def response(self, obj):
+        return Response(self.dumps(obj), mimetype=self.mimetype)
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, (datetime.date, datetime.time)):
+            return obj.isoformat()
+
+        if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+            return str(obj)
+
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            return dataclasses.asdict(obj)
+
+        if hasattr(obj, '__html__'):
+            return str(obj.__html__())
+
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class OrjsonEncoder(JsonEncoder):
+    """
+    Encodes with orjson, falling back to JsonEncoder for what orjson can't encode, such as ints over 64 bits
+    """
+    def dumps(self, obj):
+        try:
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().dumps(obj)
+
+
+def default_json_encoder():
+    """
+    The OrjsonEncoder if orjson is installed, otherwise the JsonEncoder
+    """
+    if orjson is not None:
+        return OrjsonEncoder()
+
+    return JsonEncoder()
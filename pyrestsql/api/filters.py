@@ -1,9 +1,16 @@
+import json
 import marshmallow
 import operator
+import re
+from functools import reduce, partial
 
-from marshmallow import Schema
+from marshmallow import Schema, fields, validate, ValidationError
 from marshmallow.schema import SchemaMeta
+from pyrestsql.api.parsers import QueryArgsParser
 from typing import NamedTuple
+from werkzeug.datastructures import MultiDict
+
+_JSON_PATH_KEY = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
 
 
 class Filter(NamedTuple):
@@ -11,14 +18,85 @@ class Filter(NamedTuple):
     operator: callable
     column: object
     format: str = None
+    lookup: str = None
+    path: tuple = None
+
+
+class DelimitedList(fields.List):
+    """
+    A list passed in a single query arg as comma separated values: ?id__in=1,2,3
+    """
+    delimiter = ','
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if isinstance(value, str):
+            value = value.split(self.delimiter) if value else []
+
+        return super()._deserialize(value, attr, data, **kwargs)
+
+
+class JsonScalar(fields.Field):
+    """
+    A string, number, boolean or null to compare a value inside a JSON column with. Query args are read as JSON when
+    they can be, so ?attrs__size=10 is a number and ?attrs__size="10" a string
+    """
+    default_error_messages = {'invalid': 'Not a string, number, boolean or null.'}
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if isinstance(value, str) and isinstance(data, MultiDict):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return value
+
+        if value is not None and not isinstance(value, (str, int, float, bool)):
+            raise self.make_error('invalid')
+
+        return value
+
+
+def _validate_bbox(values):
+    if len(values) != 4 or not (-90 <= values[0] <= values[2] <= 90 and -180 <= values[1] <= values[3] <= 180):
+        raise ValidationError('Expected south,west,north,east in degrees, with south <= north and west <= east.')
+
+
+def _validate_near(values):
+    if len(values) != 3 or not (-90 <= values[0] <= 90 and -180 <= values[1] <= 180 and values[2] > 0):
+        raise ValidationError('Expected latitude,longitude in degrees and a radius in meters.')
+
+
+def _range(column, values):
+    return column.between(*values)
+
+
+def _glob_prefix(value):
+    # A wildcard in brackets matches itself
+    return re.sub(r'([*?\[])', r'[\1]', value) + '*'
 
 
 class _FilterSet:
-    def __init__(self, filterset_fields, query):
+    """
+    Filters on `filterset_fields` with `?name=value` and `?name__lookup=value`, on JSON paths with
+    `?column__key=value`, on `geo_fields` with `bbox` and `near`, and on a `filter` tree of and/or/not nodes
+    """
+    lookup_separator = '__'
+    lookups = ('gt', 'gte', 'lt', 'lte', 'in', 'range', 'isnull', 'startswith')
+    trigram_lookups = ('icontains', 'similar')
+    geo_lookups = ('bbox', 'near')
+    filter_tree_key = 'filter'
+    filter_tree_max_depth = 8
+
+    def __init__(self, filterset_fields, query, trigram_fields=None, geo_fields=None):
         self.query = query
+        self.trigram_fields = list(trigram_fields or [])
+        self.trigram_index = None
+        self.geo_fields = tuple(geo_fields or ())
+        self.geo_index = None
+        self.dialect_name = None
         self.filterset_fields = self.ensure_fields(filterset_fields)
 
         self.filterset_schema = self.make_serializer_class()
+        self.filterset_parser = QueryArgsParser(self.filterset_schema)
 
     def __call__(self, query_params, query=None):
         return self.apply_filters(query_params, query)
@@ -29,23 +107,68 @@ class _FilterSet:
         query_fields = self.make_query_fields()
 
         self.validate_string_fields(filterset_fields, query_fields)
+        self.validate_trigram_fields(filterset_fields, query_fields)
+        self.validate_geo_fields(query_fields)
 
         for field in filterset_fields:
-            field = self.ensure_field(field, query_fields)
+            for field in self.ensure_field(field, query_fields):
+                new_fields[field.key] = field
 
-            new_fields[field.key] = field
+        if self.geo_fields:
+            columns = tuple(query_fields[field] for field in self.geo_fields)
+
+            for lookup in self.geo_lookups:
+                new_fields[lookup] = Filter(lookup, self.lookup_operator(lookup), columns, lookup=lookup)
 
         return new_fields
 
     def validate_string_fields(self, filterset_fields, query_fields):
         invalid_field_names = [
             field for field in filterset_fields
-            if isinstance(field, str) and field not in query_fields
+            if (
+                isinstance(field, str)
+                and field not in query_fields
+                and self.split_json_path(field, query_fields) is None
+            )
         ]
 
         if invalid_field_names:
             raise Exception(f'Cannot find these filterset_fields on the queryset: {", ".join(invalid_field_names)}')
 
+    def validate_trigram_fields(self, filterset_fields, query_fields):
+        invalid_field_names = [
+            field for field in self.trigram_fields
+            if (
+                field not in filterset_fields
+                or field not in query_fields
+                or self.make_marshmellow_field_class(query_fields[field]) is not fields.Str
+            )
+        ]
+
+        if invalid_field_names:
+            raise Exception(f'These trigram_fields are not text filterset_fields: {", ".join(invalid_field_names)}')
+
+    def validate_geo_fields(self, query_fields):
+        if not self.geo_fields:
+            return
+
+        if len(self.geo_fields) != 2 or any(
+                field not in query_fields or self.make_marshmellow_field_class(query_fields[field]) is not fields.Number
+                for field in self.geo_fields
+        ):
+            raise Exception(f'geo_fields is not a (latitude, longitude) pair of numeric fields: {self.geo_fields}')
+
+    @property
+    def geo_columns(self):
+        return self.filterset_fields[self.geo_lookups[0]].column
+
+    @property
+    def trigram_columns(self):
+        return [
+            self.filterset_fields[field].column
+            for field in self.trigram_fields
+        ]
+
     def make_query_fields(self):
         if self.query is None:
             return {}
@@ -56,10 +179,16 @@ class _FilterSet:
         raise NotImplementedError()
 
     def ensure_field(self, field, query_fields):
+        if isinstance(field, str) and field not in query_fields:
+            return [self.make_json_path_field_from_string(field, query_fields)]
+
         if isinstance(field, str):
-            return self.make_field_from_string(field, query_fields)
+            return [
+                self.make_field_from_string(field, query_fields),
+                *self.make_lookup_fields_from_string(field, query_fields)
+            ]
 
-        return field
+        return [field]
 
     def make_field_from_string(self, key, query_fields):
         column = query_fields[key]
@@ -70,6 +199,123 @@ class _FilterSet:
             column
         )
 
+    def split_json_path(self, key, query_fields):
+        """
+        Return (field name, path) if `key` is a JSON field followed by the keys of a path inside it, otherwise None
+        """
+        name, *path = key.split(self.lookup_separator)
+
+        if not path or name not in query_fields or not self.is_json_column(query_fields[name]):
+            return None
+
+        # The keys are written into the SQL as a literal JSON path, which an expression index must match exactly
+        if not all(_JSON_PATH_KEY.match(key) for key in path):
+            return None
+
+        return name, tuple(path)
+
+    def make_json_path_field_from_string(self, key, query_fields):
+        name, path = self.split_json_path(key, query_fields)
+
+        return Filter(
+            key,
+            partial(self.json_path_equals, path=path),
+            query_fields[name],
+            path=path,
+        )
+
+    def is_json_column(self, column):
+        raise NotImplementedError()
+
+    def is_jsonb_column(self, column):
+        return False
+
+    def json_path(self, path):
+        return '$.' + '.'.join(path)
+
+    def json_document(self, path, value):
+        """
+        The smallest document holding `value` at `path`, for JSONB containment: ('size', 'width'), 10 is
+        {"size": {"width": 10}}
+        """
+        for key in reversed(path):
+            value = {key: value}
+
+        return value
+
+    def json_path_equals(self, column, value, path):
+        raise NotImplementedError()
+
+    def make_lookup_fields_from_string(self, key, query_fields):
+        column = query_fields[key]
+
+        lookups = self.lookups
+
+        if key in self.trigram_fields:
+            lookups += self.trigram_lookups
+
+        return [
+            Filter(
+                f'{key}{self.lookup_separator}{lookup}',
+                self.lookup_operator(lookup),
+                column,
+                lookup=lookup,
+            )
+            for lookup in lookups
+            if lookup != 'startswith' or self.make_marshmellow_field_class(column) is fields.Str
+        ]
+
+    def lookup_operator(self, lookup):
+        return {
+            'gt': operator.gt,
+            'gte': operator.ge,
+            'lt': operator.lt,
+            'lte': operator.le,
+            'in': self.in_,
+            'range': _range,
+            'isnull': self.isnull,
+            'startswith': self.startswith,
+            'icontains': self.icontains,
+            'similar': self.similar,
+            'bbox': self.bbox,
+            'near': self.near,
+        }[lookup]
+
+    def connect(self, **kwargs):
+        """
+        Called by `register_app()` with the Session/db, to build the lookups for its database
+        """
+
+    def in_(self, column, values):
+        return column.in_(values)
+
+    def isnull(self, column, value):
+        raise NotImplementedError()
+
+    def startswith(self, column, value):
+        return column.startswith(value)
+
+    def icontains(self, column, value):
+        if self.trigram_index is None:
+            return self.unindexed_icontains(column, value)
+
+        return self.trigram_index.icontains(column, value)
+
+    def similar(self, column, value):
+        if self.trigram_index is None:
+            return self.unindexed_icontains(column, value)
+
+        return self.trigram_index.similar(column, value)
+
+    def unindexed_icontains(self, column, value):
+        raise NotImplementedError()
+
+    def bbox(self, columns, values):
+        return self.geo_index.bbox(*values)
+
+    def near(self, columns, values):
+        return self.geo_index.near(*values)
+
     def make_serializer_class(self):
         serializer_attributes = {
             'Meta': type('Meta', (), {'unknown': marshmallow.EXCLUDE})
@@ -85,10 +331,35 @@ class _FilterSet:
         )
 
     def make_serializer_attribute(self, field):
+        if field.lookup == 'bbox':
+            return DelimitedList(fields.Float(), required=False, validate=[_validate_bbox])
+
+        if field.lookup == 'near':
+            return DelimitedList(fields.Float(), required=False, validate=[_validate_near])
+
         marshmallow_field_class = self.make_marshmellow_field_class(field.column)
 
         marshmallow_kwargs = self.make_marshmellow_kwargs(field)
 
+        if field.path is not None:
+            return JsonScalar(required=False, allow_none=True)
+
+        if field.lookup == 'isnull':
+            return fields.Bool(required=False)
+
+        if field.lookup in ('startswith', 'icontains', 'similar'):
+            return fields.Str(required=False)
+
+        if field.lookup == 'in':
+            return DelimitedList(
+                marshmallow_field_class(**marshmallow_kwargs), required=False, validate=[validate.Length(min=1)]
+            )
+
+        if field.lookup == 'range':
+            return DelimitedList(
+                marshmallow_field_class(**marshmallow_kwargs), required=False, validate=[validate.Length(equal=2)]
+            )
+
         return marshmallow_field_class(required=False, allow_none=True, **marshmallow_kwargs)
 
     def make_marshmellow_field_class(self, column):
@@ -98,13 +369,16 @@ class _FilterSet:
         return {}
 
     def parse_query_params(self, query_params=None):
-        return self.filterset_schema().load(query_params)
+        return self.filterset_parser.load(query_params)
 
     def apply_filters(self, query_params=None, query=None):
         if query is None:
             query = self.query
         #query = query or self.query
 
+        if query_params is not None and (filter_tree := query_params.get(self.filter_tree_key)) is not None:
+            query = query.where(self.compile_filter_tree(filter_tree))
+
         if not self.filterset_fields:
             return query
 
@@ -114,6 +388,79 @@ class _FilterSet:
 
         return query
 
+    def compile_filter_tree(self, filter_tree):
+        if isinstance(filter_tree, str):
+            try:
+                filter_tree = json.loads(filter_tree)
+            except ValueError:
+                raise ValidationError({self.filter_tree_key: ['Not valid JSON.']})
+
+        try:
+            return self._compile_filter_node(filter_tree, depth=1)
+        except ValidationError as ex:
+            raise ValidationError({self.filter_tree_key: ex.messages})
+
+    def _compile_filter_node(self, node, depth):
+        if depth > self.filter_tree_max_depth:
+            raise ValidationError([f'Filters may only nest {self.filter_tree_max_depth} deep.'])
+
+        if not isinstance(node, dict) or not node:
+            raise ValidationError(['Expected an object of filters, "and", "or" or "not".'])
+
+        clauses = []
+        errors = {}
+
+        filters = {
+            key: value
+            for key, value in node.items()
+            if key not in ('and', 'or', 'not')
+        }
+
+        for key in filters:
+            if key not in self.filterset_fields:
+                errors[key] = ['Unknown field.']
+
+        try:
+            clauses += [
+                self.filterset_fields[key].operator(self.filterset_fields[key].column, value)
+                for key, value in self.parse_query_params(filters).items()
+            ]
+        except ValidationError as ex:
+            errors.update(ex.messages)
+
+        for key, combine in (('and', operator.and_), ('or', operator.or_)):
+            if key not in node:
+                continue
+
+            if not isinstance(node[key], list) or not node[key]:
+                errors[key] = ['Expected a non-empty list.']
+                continue
+
+            children = []
+            child_errors = {}
+
+            for i, child in enumerate(node[key]):
+                try:
+                    children.append(self._compile_filter_node(child, depth + 1))
+                except ValidationError as ex:
+                    child_errors[i] = ex.messages
+
+            if child_errors:
+                errors[key] = child_errors
+            else:
+                clauses.append(reduce(combine, children))
+
+        if 'not' in node:
+            try:
+                clauses.append(~self._compile_filter_node(node['not'], depth + 1))
+            except ValidationError as ex:
+                errors['not'] = ex.messages
+
+        if errors:
+            raise ValidationError(errors)
+
+        return reduce(operator.and_, clauses)
+
     def _apply_filters(self, query_params, query):
         for key, value in query_params.items():
             filter = self.filterset_fields[key]
@@ -123,3 +470,67 @@ class _FilterSet:
 
         return query
 
+    def is_bindable(self, filter, value):
+        """
+        Whether the value of the filter is only ever bound as a parameter, so that a StatementCache can bind the value
+        of another request in its place. Null is not, as equality with it compiles to IS NULL
+        """
+        return (
+            filter.operator in (operator.eq, operator.gt, operator.ge, operator.lt, operator.le, _range)
+            and filter.path is None
+            and value is not None
+        )
+
+    def statement_filters(self, query_params):
+        """
+        Return (shape, {slot name: value}) of the parsed filters of a request, where the shape is what changes their
+        SQL, or None if a filter can't be reused by a StatementCache
+        """
+        shape = []
+        params = {}
+
+        for key, value in sorted(query_params.items()):
+            filter = self.filterset_fields[key]
+
+            if self.is_bindable(filter, value):
+                shape.append(key)
+                params.update(self.statement_params(key, value))
+            elif filter.lookup == 'isnull' or (filter.operator is operator.eq and filter.path is None):
+                shape.append((key, value))
+            else:
+                return None
+
+        return tuple(shape), params
+
+    def statement_params(self, key, value):
+        if isinstance(value, list):
+            return {f'_api_filter_{key}_{i}': item for i, item in enumerate(value)}
+
+        return {f'_api_filter_{key}': value}
+
+    def apply_statement_filters(self, query_params, query):
+        """
+        Apply the filters like `_apply_filters()`, with slots named by `statement_params()` for the bindable values
+        """
+        for key, value in query_params.items():
+            filter = self.filterset_fields[key]
+
+            if self.is_bindable(filter, value):
+                slots = [
+                    self.slot(name, item, filter.column)
+                    for name, item in self.statement_params(key, value).items()
+                ]
+                value = slots if isinstance(value, list) else slots[0]
+
+            query = query.where(
+                filter.operator(filter.column, value)
+            )
+
+        return query
+
+    def slot(self, name, value, column):
+        """
+        A parameter named `name`, bound to `value`, which the StatementCache binds again for each request
+        """
+        raise NotImplementedError()
+
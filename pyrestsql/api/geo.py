@@ -0,0 +1,221 @@
+import logging
+import math
+
+from pyrestsql.api.database import _DatabaseAccess
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS = 6371008.8
+
+METERS_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+
+
+class GeoIndex(_DatabaseAccess):
+    """
+    Index for the `bbox` and `near` filters on `geo_fields`: a GiST index on PostGIS, an R*Tree table kept in sync
+    by triggers on SQLite, and BETWEEN on the columns elsewhere
+    """
+    srid = 4326
+
+    def __init__(self, latitude, longitude, **kwargs):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.installed_dialect_name = None
+
+    def install(self):
+        """
+        Create the index, and the R*Tree table and triggers, if they do not exist. This is idempotent
+        """
+        dialect_name = self.dialect_name()
+
+        try:
+            installed = self._install(dialect_name)
+        except Exception:
+            logger.exception(f'Could not create the geo index of {self.table_name()}')
+            installed = False
+
+        if not installed:
+            logger.warning(
+                f'Filtering {self.table_name()} by bbox and near without a geo index, with BETWEEN on its columns'
+            )
+            return False
+
+        self.installed_dialect_name = dialect_name
+
+        return True
+
+    def _install(self, dialect_name):
+        if dialect_name == 'postgresql':
+            if not self.scalar("SELECT 1 FROM pg_extension WHERE extname = 'postgis'"):
+                return False
+
+            self.execute(self._postgres_install_sql())
+            return True
+
+        if dialect_name == 'sqlite':
+            if not self.is_integer_primary_key():
+                return False
+
+            self.execute(self._sqlite_install_sql())
+            return True
+
+        return False
+
+    def table_name(self):
+        raise NotImplementedError()
+
+    def primary_key_name(self):
+        raise NotImplementedError()
+
+    def column_name(self, column):
+        raise NotImplementedError()
+
+    def is_integer_primary_key(self):
+        raise NotImplementedError()
+
+    @property
+    def indexed(self):
+        return self.installed_dialect_name is not None
+
+    @property
+    def rtree_table_name(self):
+        return f'{self.table_name()}_geo'
+
+    @property
+    def index_name(self):
+        return f'ix_{self.table_name()}_geo'
+
+    def bbox(self, south, west, north, east):
+        condition = self.range_bbox(south, west, north, east)
+
+        if self.installed_dialect_name == 'postgresql':
+            return self.postgis_bbox(south, west, north, east) & condition
+
+        if self.installed_dialect_name == 'sqlite':
+            return self.rtree_bbox(south, west, north, east) & condition
+
+        return condition
+
+    def near(self, latitude, longitude, radius):
+        if self.installed_dialect_name == 'postgresql':
+            within_distance = self.postgis_within_distance(latitude, longitude, radius)
+        else:
+            within_distance = self.within_distance(latitude, longitude, radius)
+
+        return self.bbox(*self.bounding_box(latitude, longitude, radius)) & within_distance
+
+    def bounding_box(self, latitude, longitude, radius):
+        """
+        Return (south, west, north, east) of the smallest box holding the circle of `radius` meters around the point
+        """
+        angular_radius = radius / EARTH_RADIUS
+
+        south = latitude - math.degrees(angular_radius)
+        north = latitude + math.degrees(angular_radius)
+
+        if south <= -90 or north >= 90:
+            return max(south, -90), -180, min(north, 90), 180
+
+        longitude_radius = math.degrees(math.asin(math.sin(angular_radius) / math.cos(math.radians(latitude))))
+        west = longitude - longitude_radius
+        east = longitude + longitude_radius
+
+        if west < -180 or east > 180:
+            return south, -180, north, 180
+
+        return south, west, north, east
+
+    def equirectangular_scale(self, latitude, radius):
+        """
+        Return (degrees of longitude per degree of latitude, squared radius in degrees of latitude) for comparing
+        (Δlatitude)² + (Δlongitude * scale)² with the squared radius
+        """
+        return math.cos(math.radians(latitude)), (radius / METERS_PER_DEGREE) ** 2
+
+    def range_bbox(self, south, west, north, east):
+        raise NotImplementedError()
+
+    def within_distance(self, latitude, longitude, radius):
+        raise NotImplementedError()
+
+    def rtree_bbox(self, south, west, north, east):
+        raise NotImplementedError()
+
+    def postgis_bbox(self, south, west, north, east):
+        raise NotImplementedError()
+
+    def postgis_within_distance(self, latitude, longitude, radius):
+        raise NotImplementedError()
+
+    def point_sql(self):
+        """
+        The point of a row, as the GiST index and the PostGIS conditions spell it
+        """
+        longitude = self.quote(self.column_name(self.longitude))
+        latitude = self.quote(self.column_name(self.latitude))
+
+        return f'ST_SetSRID(ST_MakePoint({longitude}, {latitude}), {self.srid})'
+
+    def _postgres_install_sql(self):
+        return [
+            f'''
+                CREATE INDEX IF NOT EXISTS {self.quote(self.index_name)}
+                ON {self.quote(self.table_name())} USING GIST (({self.point_sql()}))
+            '''
+        ]
+
+    def _sqlite_install_sql(self):
+        """
+        An R*Tree stores 32 bit floats, rounded outwards, which is why the box is rechecked against the columns
+        """
+        table = self.quote(self.table_name())
+        rtree_table = self.quote(self.rtree_table_name)
+        primary_key = self.quote(self.primary_key_name())
+        latitude = self.quote(self.column_name(self.latitude))
+        longitude = self.quote(self.column_name(self.longitude))
+
+        def insert_sql(row):
+            from_ = f' FROM {row}' if row != 'new' else ''
+
+            return f'''
+                INSERT INTO {rtree_table} (id, min_lat, max_lat, min_lon, max_lon)
+                SELECT {row}.{primary_key}, {row}.{latitude}, {row}.{latitude}, {row}.{longitude}, {row}.{longitude}
+                {from_}
+                WHERE {row}.{latitude} IS NOT NULL AND {row}.{longitude} IS NOT NULL
+            '''
+
+        # Dropping the table drops its triggers, but not the R*Tree, which is refilled when they are created again
+        synced = self.scalar(
+            f"SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = '{self.rtree_table_name}_insert'"
+        )
+
+        statements = [
+            f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {rtree_table}
+                USING rtree(id, min_lat, max_lat, min_lon, max_lon)
+            ''',
+            f'''
+                CREATE TRIGGER IF NOT EXISTS {self.quote(f"{self.rtree_table_name}_insert")}
+                AFTER INSERT ON {table} BEGIN
+                    {insert_sql('new')};
+                END
+            ''',
+            f'''
+                CREATE TRIGGER IF NOT EXISTS {self.quote(f"{self.rtree_table_name}_update")}
+                AFTER UPDATE OF {latitude}, {longitude}, {primary_key} ON {table} BEGIN
+                    DELETE FROM {rtree_table} WHERE id = old.{primary_key};
+                    {insert_sql('new')};
+                END
+            ''',
+            f'''
+                CREATE TRIGGER IF NOT EXISTS {self.quote(f"{self.rtree_table_name}_delete")}
+                AFTER DELETE ON {table} BEGIN
+                    DELETE FROM {rtree_table} WHERE id = old.{primary_key};
+                END
+            ''',
+        ]
+
+        if not synced:
+            statements += [f'DELETE FROM {rtree_table}', insert_sql(table)]
+
+        return statements
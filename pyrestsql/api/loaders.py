@@ -0,0 +1,219 @@
+import math
+
+from marshmallow import Schema, ValidationError, fields, missing, validate, RAISE, INCLUDE, EXCLUDE
+from marshmallow.decorators import PRE_LOAD, POST_LOAD, VALIDATES, VALIDATES_SCHEMA
+
+# The ints which float() converts exactly, without an OverflowError
+_MAX_EXACT_FLOAT_INT = 2 ** 53
+
+
+class SchemaLoader:
+    """
+    Loads like `schema.load()`, with a function generated for the fields of the schema. Values it can't check
+    inline, and schemas with load hooks, are loaded by marshmallow, so errors are the same
+    """
+    def __init__(self, schema):
+        self.schema = schema
+        self._load = self.compile() if self.is_compilable() else None
+        self.compiled = self._load is not None
+
+    def load(self, data, partial=None):
+        if partial is None:
+            partial = self.schema.partial
+
+        if not self.compiled or type(data) is not dict or partial not in (None, True, False):
+            return self.schema.load(data, partial=partial)
+
+        return self._load(data, partial)
+
+    def is_compilable(self):
+        schema_class = type(self.schema)
+
+        return (
+            not self.schema._hooks[PRE_LOAD]
+            and not self.schema._hooks[POST_LOAD]
+            and not self.schema._hooks[VALIDATES]
+            and not self.schema._hooks[VALIDATES_SCHEMA]
+            and schema_class.load is Schema.load
+            and schema_class._do_load is Schema._do_load
+            and schema_class._deserialize is Schema._deserialize
+            and schema_class.handle_error is Schema.handle_error
+            and self.schema.dict_class is dict
+            and not self.schema.many
+            and self.schema.unknown in (RAISE, INCLUDE, EXCLUDE)
+            and not any(
+                field.attribute is not None and '.' in field.attribute
+                for field in self.schema.load_fields.values()
+            )
+        )
+
+    def compile(self):
+        namespace = {
+            'missing': missing,
+            'invalid': _INVALID,
+            'isfinite': math.isfinite,
+            'ValidationError': ValidationError,
+            'known': frozenset(
+                field.data_key if field.data_key is not None else attr_name
+                for attr_name, field in self.schema.load_fields.items()
+            ),
+            'unknown_messages': [self.schema.error_messages['unknown']],
+        }
+
+        lines = [
+            'def load(data, partial):',
+            '    ret = {}',
+            '    errors = {}',
+        ]
+
+        for i, (attr_name, field) in enumerate(self.schema.load_fields.items()):
+            name = f'field_{i}'
+            key = field.data_key if field.data_key is not None else attr_name
+            attribute = field.attribute or attr_name
+            namespace[name] = field
+
+            deserialize = [
+                '        try:',
+                f'            value = {name}.deserialize(raw, {key!r}, data)',
+                '        except ValidationError as error:',
+                f'            errors[{key!r}] = error.messages',
+                '        else:',
+                '            if value is not missing:',
+                f'                ret[{attribute!r}] = value',
+            ]
+
+            lines.append(f'    raw = data.get({key!r}, missing)')
+
+            if field.required or field.load_default is not missing:
+                lines += ['    if raw is missing:', '        if not partial:']
+                lines += ['    ' + line for line in deserialize]
+            else:
+                lines += ['    if raw is missing:', '        pass']
+
+            if (expression := self.field_expression(field, name, namespace)) is not None:
+                lines += [
+                    '    else:',
+                    f'        value = {expression}',
+                    '        if value is not invalid:',
+                    f'            ret[{attribute!r}] = value',
+                    '        else:',
+                ]
+                lines += ['    ' + line for line in deserialize]
+            else:
+                lines.append('    else:')
+                lines += deserialize
+
+        if self.schema.unknown != EXCLUDE:
+            lines += [
+                '    if not known.issuperset(data):',
+                '        for key in data.keys() - known:',
+            ]
+            if self.schema.unknown == INCLUDE:
+                lines.append('            ret[key] = data[key]')
+            else:
+                lines.append('            errors[key] = list(unknown_messages)')
+
+        lines += [
+            '    if errors:',
+            '        raise ValidationError(errors, data=data, valid_data=ret)',
+            '    return ret',
+        ]
+
+        exec('\n'.join(lines), namespace)
+
+        return namespace['load']
+
+    def field_expression(self, field, name, namespace):
+        """
+        Return the expression of `raw` as the field deserializes it, or `invalid`, or None if marshmallow has to
+        deserialize the field
+        """
+        field_class = type(field)
+
+        if (
+            field_class.deserialize is not fields.Field.deserialize
+            or field_class._validate is not fields.Field._validate
+            or field_class._validate_missing is not fields.Field._validate_missing
+            or field.pre_load
+            or field.post_load
+        ):
+            return None
+
+        if field_class._deserialize is fields.String._deserialize:
+            condition, value = 'type(raw) is str', 'raw'
+        elif (
+            field_class._deserialize is fields.Number._deserialize
+            and field_class._validated in (fields.Integer._validated, fields.Float._validated)
+            and field_class._format_num is fields.Number._format_num
+            and field.num_type in (int, float)
+        ):
+            if field.num_type is int:
+                condition, value = 'type(raw) is int', 'raw'
+            else:
+                condition = (
+                    '(type(raw) is float and isfinite(raw)'
+                    f' or type(raw) is int and -{_MAX_EXACT_FLOAT_INT} <= raw <= {_MAX_EXACT_FLOAT_INT})'
+                )
+                value = 'float(raw)'
+        elif field_class._deserialize is fields.Boolean._deserialize:
+            if field.truthy and (True not in field.truthy or False not in field.falsy):
+                return None
+            condition, value = '(raw is True or raw is False)', 'raw'
+        else:
+            return None
+
+        checks = []
+        for j, validator in enumerate(field.validators):
+            if (check := self.validator_check(validator, f'{name}_{j}', namespace)) is None:
+                return None
+            checks.append(check)
+
+        if checks:
+            condition = ' and '.join([condition] + checks)
+
+        if field.allow_none:
+            # marshmallow doesn't validate a None
+            condition = f'raw is None or {condition}'
+            if value != 'raw':
+                value = f'(None if raw is None else {value})'
+
+        return f'{value} if {condition} else invalid'
+
+    def validator_check(self, validator, name, namespace):
+        """
+        Return the condition under which `raw` passes the validator, or None if marshmallow has to run it
+        """
+        validator_class = type(validator)
+
+        if validator_class.__call__ is validate.Range.__call__:
+            checks = []
+            if validator.min is not None:
+                namespace[f'{name}_min'] = validator.min
+                checks.append(f'raw {">=" if validator.min_inclusive else ">"} {name}_min')
+            if validator.max is not None:
+                namespace[f'{name}_max'] = validator.max
+                checks.append(f'raw {"<=" if validator.max_inclusive else "<"} {name}_max')
+            return '(' + ' and '.join(checks) + ')' if checks else 'True'
+
+        if validator_class.__call__ is validate.Length.__call__:
+            if validator.equal is not None:
+                return f'len(raw) == {validator.equal!r}'
+            checks = []
+            if validator.min is not None:
+                checks.append(f'len(raw) >= {validator.min!r}')
+            if validator.max is not None:
+                checks.append(f'len(raw) <= {validator.max!r}')
+            return '(' + ' and '.join(checks) + ')' if checks else 'True'
+
+        if validator_class.__call__ is validate.OneOf.__call__:
+            try:
+                namespace[name] = frozenset(validator.choices)
+            except TypeError:
+                return None
+            return f'raw in {name}'
+
+        return None
+
+
+# What the expression of a field is when marshmallow has to deserialize the value
+_INVALID = object()
@@ -0,0 +1,142 @@
+import logging
+
+import marshmallow
+from marshmallow import Schema, fields, validate
+from marshmallow.schema import SchemaMeta
+from pyrestsql.api.filters import DelimitedList
+from pyrestsql.api.parsers import QueryArgsParser
+
+logger = logging.getLogger(__name__)
+
+
+class _OrderingSet:
+    """
+    Sorts GET_MANY by `?ordering=-created_at,id`, restricted to `ordering_fields`, with the primary key as the last
+    sort column so that pages are stable
+    """
+    ordering_key = 'ordering'
+
+    def __init__(self, ordering_fields, query, ordering_key=ordering_key):
+        self.query = query
+        self.ordering_key = ordering_key
+        self.ordering_fields = self.ensure_fields(ordering_fields)
+
+        self.ordering_schema = self.make_serializer_class()
+        self.ordering_parser = QueryArgsParser(self.ordering_schema)
+
+        self.warn_unindexed_fields()
+
+    def __call__(self, query_params, query=None):
+        return self.apply_ordering(query_params, query)
+
+    def ensure_fields(self, ordering_fields) -> dict:
+        if not ordering_fields:
+            return {}
+
+        query_fields = self.make_query_fields()
+
+        invalid_field_names = [
+            field for field in ordering_fields
+            if field not in query_fields
+        ]
+
+        if invalid_field_names:
+            raise Exception(f'Cannot find these ordering_fields on the queryset: {", ".join(invalid_field_names)}')
+
+        return {
+            field: query_fields[field]
+            for field in ordering_fields
+        }
+
+    def make_query_fields(self):
+        if self.query is None:
+            return {}
+
+        return self._make_query_fields()
+
+    def _make_query_fields(self):
+        raise NotImplementedError()
+
+    def make_serializer_class(self):
+        choices = [
+            f'{prefix}{name}'
+            for name in self.ordering_fields
+            for prefix in ('', '-')
+        ]
+
+        return SchemaMeta(
+            'OrderingSchema',
+            (Schema,),
+            {
+                'Meta': type('Meta', (), {'unknown': marshmallow.EXCLUDE}),
+                self.ordering_key: DelimitedList(
+                    fields.Str(validate=[validate.OneOf(choices)]), required=False, validate=[validate.Length(min=1)]
+                ),
+            }
+        )
+
+    def warn_unindexed_fields(self):
+        for name, column in self.ordering_fields.items():
+            if not self.is_indexed(column):
+                logger.warning(
+                    f'Ordering on {name} has no index that leads with its column, so every page will sort the '
+                    f'whole result'
+                )
+
+    def is_indexed(self, column):
+        raise NotImplementedError()
+
+    def primary_key_column(self, query):
+        raise NotImplementedError()
+
+    def order_by_columns(self, query):
+        """
+        Return the ORDER BY of the query as a list of (column, descending)
+        """
+        raise NotImplementedError()
+
+    def is_primary_key(self, query, column):
+        raise NotImplementedError()
+
+    def order_by(self, query, columns):
+        """
+        Replace the ORDER BY of the query with `columns`, a list of (column, descending)
+        """
+        raise NotImplementedError()
+
+    def extend_order_by(self, query, columns):
+        """
+        Append `columns`, a list of (column, descending), to the ORDER BY of the query
+        """
+        raise NotImplementedError()
+
+    def apply_ordering(self, query_params=None, query=None):
+        if query is None:
+            query = self.query
+
+        if not self.ordering_fields:
+            return query
+
+        params = self.ordering_parser.load(query_params)
+
+        primary_key_column = self.primary_key_column(query)
+
+        if (ordering := params.get(self.ordering_key)) is None:
+            if not (columns := self.order_by_columns(query)):
+                return self.order_by(query, [(primary_key_column, False)])
+
+            # The ORDER BY of the queryset may not be unique either
+            if any(self.is_primary_key(query, column) for column, descending in columns):
+                return query
+
+            return self.extend_order_by(query, [(primary_key_column, columns[-1][1])])
+
+        columns = [
+            (self.ordering_fields[name.lstrip('-')], name.startswith('-'))
+            for name in ordering
+        ]
+
+        if not any(column.primary_key for column, descending in columns):
+            columns.append((primary_key_column, columns[-1][1]))
+
+        return self.order_by(query, columns)
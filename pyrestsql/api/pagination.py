@@ -1,14 +1,33 @@
+import bisect
+import datetime
+import decimal
+import functools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+
 import marshmallow
-from flask import request
-from marshmallow import Schema, fields, validate
+from flask import current_app, g
+from itsdangerous import URLSafeSerializer, BadData
+from marshmallow import Schema, fields, validate, ValidationError
 from marshmallow.schema import SchemaMeta
+from pyrestsql.api.parsers import QueryArgsParser, query_args
+from pyrestsql.exc import BadInput, ConfigurationError
 
 
 class _Pagination:
     count_key = None
 
+    # Select only primary keys for the LIMIT/OFFSET, then join back for the full rows of that page
+    deferred_join = False
+
+    # Seek from known page boundaries instead of scanning the whole OFFSET, see PageBoundaryIndex
+    page_boundaries = None
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.row_counters = {}
 
     def paginate(self, query):
         meta = {}
@@ -17,6 +36,12 @@ class _Pagination:
     def add_count_subquery(self, query):
         raise NotImplementedError()
 
+    def add_count_window(self, query):
+        raise NotImplementedError()
+
+    def is_distinct(self, query):
+        raise NotImplementedError()
+
     def _count_logic(self, query):
         count = 0
         query = self.add_count_subquery(query)
@@ -25,25 +50,345 @@ class _Pagination:
     def add_count_meta(self, objs, meta):
         return
 
+    def is_statement_cacheable(self):
+        """
+        Whether `paginate()` only builds the query, without querying, so that a StatementCache may reuse it
+        """
+        return self.page_boundaries is None
+
+    def statement_params(self):
+        """
+        Return (shape, {slot name: value}, meta) of the pagination of the request, where the shape is what changes the
+        SQL of `paginate()`, and the values are what it binds with `bind()`
+        """
+        return (), {}, {}
+
+    def bind(self, name, value, column=None):
+        """
+        Return `value`, or while a StatementCache builds the query, a slot named `name` to bind the value of each
+        request to
+        """
+        if g.get('_api_statement_slots'):
+            return self.slot(name, value, column)
+
+        return value
+
+    def slot(self, name, value, column=None):
+        raise NotImplementedError()
+
+    def validate_model(self, model):
+        """
+        Called when an Api with this pagination is created, to raise a ConfigurationError for a model it can't page
+        """
+        return
+
+    def limit_offset(self, query, limit, offset):
+        if self.deferred_join and offset:
+            return self.deferred_join_limit_offset(query, limit, offset)
+
+        if limit:
+            query = query.limit(self.bind('_api_limit', limit))
+
+        if offset:
+            query = query.offset(self.bind('_api_offset', offset))
+
+        return query
+
+    def deferred_join_limit_offset(self, query, limit, offset):
+        """
+        Apply the LIMIT/OFFSET to a query of only the primary keys, and join the full rows back to that page
+        """
+        raise NotImplementedError()
+
+    def query_model(self, query):
+        raise NotImplementedError()
+
+    def count_cache_namespace(self, query):
+        """
+        Return what count cache entries for this query are invalidated by, which is the queried model
+        """
+        return self.query_model(query)
+
+    def count_cache_key(self, query):
+        return self.query_signature(query)
+
+    def query_signature(self, query):
+        """
+        Return the compiled SQL and bind parameters of the query, which identify its filters, permissions and ordering
+        """
+        raise NotImplementedError()
+
+    def boundary_order(self, query):
+        """
+        Return (query, columns, descending) if the query can seek on its ORDER BY, with the primary key added as a
+        tiebreak, otherwise None
+        """
+        raise NotImplementedError()
+
+    def boundary_values(self, obj, columns):
+        raise NotImplementedError()
+
+    def seek_boundary(self, query, columns, values, descending):
+        raise NotImplementedError()
+
+    def invalidate(self, model):
+        """
+        Called after rows of `model` are written through an Api, so that anything cached about it can be dropped
+        """
+        return
+
+    def add_row_counter(self, model, row_counter):
+        """
+        Called by an Api with a `counter_table`. Only EagerCount pagination reads the maintained count.
+        """
+        self.row_counters[model] = row_counter
+
+
+class CountCache:
+    """
+    In process cache of counts by the SQL and params of the counted query. Stale counts are recounted in the
+    background, and the counts of a model are dropped when the Api writes to it
+    """
+    ttl = 5
+    stale_ttl = 30
+    max_size = 10000
+
+    def __init__(self, ttl=ttl, stale_ttl=stale_ttl, max_size=max_size):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+
+        self._entries = {}
+        self._generations = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.__class__.__name__)
+
+    def get(self, namespace, key, count):
+        """
+        Return the cached count, or None if there is none. A stale count is refreshed in the background with `count`
+        """
+        key = (namespace, key)
+
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return None
+
+            value, created = entry
+            age = time.monotonic() - created
+
+            if age >= self.ttl + self.stale_ttl:
+                del self._entries[key]
+                return None
+
+            if age >= self.ttl and key not in self._refreshing:
+                self._refreshing.add(key)
+                self._executor.submit(self._refresh, key, count)
+
+        return value
+
+    def compute(self, namespace, key, count):
+        return self._compute((namespace, key), count)
+
+    def _compute(self, key, count):
+        namespace = key[0]
+
+        with self._lock:
+            generation = self._generations.get(namespace, 0)
+
+        value = count()
+
+        with self._lock:
+            # Don't cache a count that started before the model was last written to
+            if self._generations.get(namespace, 0) == generation:
+                self._set(key, value)
+
+        return value
+
+    def _refresh(self, key, count):
+        try:
+            self._compute(key, count)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _set(self, key, value):
+        self._entries.pop(key, None)
+
+        if len(self._entries) >= self.max_size:
+            del self._entries[next(iter(self._entries))]
+
+        self._entries[key] = (value, time.monotonic())
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._entries = {
+                key: entry for key, entry in self._entries.items()
+                if key[0] != namespace
+            }
+
+
+class PageBoundaryIndex:
+    """
+    In process index of the sort key of the row at every `every`th page boundary, for deep pages to seek from
+    instead of OFFSET scanning from the first row
+    """
+    every = 100
+    ttl = 300
+    max_size = 1000
+
+    def __init__(self, every=every, ttl=ttl, max_size=max_size):
+        self.every = every
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._entries = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def nearest(self, namespace, key, offset):
+        """
+        Return (boundary_offset, values) of the nearest boundary at or before `offset`, or (0, None) if there is none
+        """
+        key = (namespace, key)
+
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return 0, None
+
+            offsets, boundaries, created = entry
+
+            if time.monotonic() - created >= self.ttl:
+                del self._entries[key]
+                return 0, None
+
+            if not (index := bisect.bisect_right(offsets, offset)):
+                return 0, None
+
+            boundary_offset = offsets[index - 1]
+
+            return boundary_offset, boundaries[boundary_offset]
+
+    def record(self, namespace, key, offset, values, generation):
+        key = (namespace, key)
+
+        with self._lock:
+            # Don't record a boundary read before the model was last written to
+            if self._generations.get(namespace, 0) != generation:
+                return
+
+            if (entry := self._entries.get(key)) is None:
+                if len(self._entries) >= self.max_size:
+                    del self._entries[next(iter(self._entries))]
+
+                entry = self._entries[key] = ([], {}, time.monotonic())
+
+            offsets, boundaries, created = entry
+
+            if offset not in boundaries:
+                bisect.insort(offsets, offset)
+
+            boundaries[offset] = values
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._entries = {
+                key: entry for key, entry in self._entries.items()
+                if key[0] != namespace
+            }
+
+
+# The threads of concurrent counts, shared by every EagerCount pagination. They are only started once counts are
+# submitted
+count_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='pyrestsqlCount')
+
+
+class _EagerCountPagination(_Pagination):
+    """
+    Counts with a separate query, optionally concurrently with the page query, from a `count_cache`, or from the
+    `counter_table` of the Api
+    """
+    concurrent_count = False
+
+    def __init__(self, *args, concurrent_count=concurrent_count, count_cache=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.concurrent_count = concurrent_count
+        self.count_cache = count_cache
+
+    def _count_logic(self, query):
+        if (row_counter := self.row_counters.get(self.query_model(query))) is not None:
+            if (row_count := row_counter.count(query)) is not None:
+                return query, row_count
+
+        count = functools.partial(self._count, query)
+
+        if self.count_cache is not None:
+            namespace, key = self.count_cache_namespace(query), self.count_cache_key(query)
+
+            if (cached := self.count_cache.get(namespace, key, count)) is not None:
+                return query, cached
+
+            count = functools.partial(self.count_cache.compute, namespace, key, count)
+
+        if not self.concurrent_count:
+            return query, count()
+
+        return query, count_executor.submit(count)
+
+    def _count(self, query):
+        raise NotImplementedError()
+
+    def is_statement_cacheable(self):
+        return False
+
+    def invalidate(self, model):
+        super().invalidate(model)
+
+        if self.count_cache is not None:
+            self.count_cache.invalidate(model)
+
+    def resolve_count(self, meta):
+        if isinstance(meta.get(self.count_key), Future):
+            meta[self.count_key] = meta[self.count_key].result()
+
 
 class _LimitOffsetPagination(_Pagination):
+    """
+    With `include_count=False`, or when the client passes `count=false`, no count is run. One extra row is fetched
+    instead, and the meta reports `has_more` and the `next` offset.
+    """
     max_limit = None
     default_limit = None
+    include_count = True
     limit_key = 'limit'
     offset_key = 'offset'
     count_key = 'count'
+    has_more_key = 'has_more'
+    next_key = 'next'
 
     def __init__(
-            self, default_limit=default_limit, max_limit=max_limit,
-            limit_key=limit_key, offset_key=offset_key, count_key=count_key
+            self, default_limit=default_limit, max_limit=max_limit, include_count=include_count,
+            deferred_join=_Pagination.deferred_join, limit_key=limit_key, offset_key=offset_key, count_key=count_key,
+            has_more_key=has_more_key, next_key=next_key
     ):
         super().__init__()
 
         self.default_limit = default_limit
         self.max_limit = max_limit
+        self.include_count = include_count
+        self.deferred_join = deferred_join
         self.limit_key = limit_key
         self.offset_key = offset_key
         self.count_key = count_key
+        self.has_more_key = has_more_key
+        self.next_key = next_key
 
         self.serializer_class = SchemaMeta(
             f'{self.__class__.__name__}Schema',
@@ -51,77 +396,134 @@ class _LimitOffsetPagination(_Pagination):
             {
                 self.limit_key: fields.Int(validate=[validate.Range(0, None)], load_default=self.default_limit),
                 self.offset_key: fields.Int(validate=[validate.Range(0, None)], load_default=0),
+                self.count_key: fields.Bool(load_default=self.include_count),
                 'Meta': type('Meta', (), {'unknown': marshmallow.EXCLUDE})
             }
         )
 
-    def paginate(self, query):
-        params = self.serializer_class().load(request.args)
-        limit = params['limit']
-        offset = params['offset']
+        self.parser = QueryArgsParser(self.serializer_class)
+
+    def load_params(self):
+        params = self.parser.load(query_args())
+        limit = params[self.limit_key]
 
         if self.max_limit:
             limit = min(limit, self.max_limit)
 
-        query, count = self.limit_offset_logic(query, limit, offset)
+        return limit, params[self.offset_key], params[self.count_key]
+
+    def paginate(self, query):
+        limit, offset, include_count = self.load_params()
+
+        query, count = self.limit_offset_logic(query, limit, offset, include_count)
+
+        return query, self.make_meta(limit, offset, include_count, count)
+
+    def statement_params(self):
+        limit, offset, include_count = self.load_params()
 
+        params = {
+            '_api_limit': limit + 1 if limit and not include_count else limit,
+            '_api_offset': offset,
+        }
+
+        return (bool(limit), bool(offset), include_count), params, self.make_meta(limit, offset, include_count)
+
+    def make_meta(self, limit, offset, include_count, count=0):
         meta = {
-            self.count_key: count,
             self.limit_key: limit,
             self.offset_key: offset,
         }
 
-        return query, meta
+        if include_count:
+            meta[self.count_key] = count
+        else:
+            meta[self.has_more_key] = False
+            meta[self.next_key] = None
 
-    def limit_offset_logic(self, query, limit, offset):
+        return meta
+
+    def limit_offset_logic(self, query, limit, offset, include_count=True):
         count = 0
-        if limit:
+        if limit and include_count:
             query, count = self._count_logic(query)
 
-        if limit:
-            query = query.limit(limit)
+        if limit and not include_count:
+            # The extra row only tells us if there is another page, and is removed in add_count_meta
+            limit += 1
 
-        if offset:
-            query = query.offset(offset)
+        query = self.limit_offset(query, limit, offset)
 
         return query, count
 
     def add_count_meta(self, objs, meta):
-        if not meta['limit']:
+        if self.has_more_key in meta:
+            self.add_has_more_meta(objs, meta)
+        elif not meta['limit']:
             meta[self.count_key] = len(objs)
         elif objs:
             meta[self.count_key] = objs[0]._api_total_count
 
+    def add_has_more_meta(self, objs, meta):
+        limit = meta[self.limit_key]
 
-class _LimitOffsetPaginationEagerCount(_LimitOffsetPagination):
-    def _count_logic(self, query):
-        raise NotImplementedError()
+        if not limit or len(objs) <= limit:
+            return
+
+        del objs[limit:]
+
+        meta[self.has_more_key] = True
+        meta[self.next_key] = meta[self.offset_key] + limit
 
+
+class _LimitOffsetPaginationEagerCount(_EagerCountPagination, _LimitOffsetPagination):
     def add_count_meta(self, objs, meta):
-        if not meta['limit']:
+        self.resolve_count(meta)
+
+        if self.has_more_key in meta:
+            self.add_has_more_meta(objs, meta)
+        elif not meta['limit']:
             meta[self.count_key] = len(objs)
 
 
 class _PageNumberPagination(_Pagination):
+    """
+    With `include_count=False` or `?count=false`, fetches one extra row for `has_more` instead of counting. With
+    `page_boundaries`, deep pages seek from the nearest known boundary
+    """
     page_key = 'page'
     page_size_key = 'page_size'
     count_key = 'count'
+    has_more_key = 'has_more'
+    next_key = 'next'
 
     page_size = 1000
     max_page_size = None
+    include_count = True
 
-    def __init__(self, page_size=page_size, max_page_size=max_page_size, page_key=page_key, page_size_key=page_size_key, count_key=count_key):
+    def __init__(
+            self, page_size=page_size, max_page_size=max_page_size, include_count=include_count,
+            deferred_join=_Pagination.deferred_join, page_boundaries=_Pagination.page_boundaries, page_key=page_key,
+            page_size_key=page_size_key, count_key=count_key, has_more_key=has_more_key, next_key=next_key
+    ):
         super().__init__()
 
+        self.deferred_join = deferred_join
+        self.page_boundaries = page_boundaries
+
         self.page_size = page_size
         self.page_key = page_key
         self.page_size_key = page_size_key
         self.count_key = count_key
+        self.has_more_key = has_more_key
+        self.next_key = next_key
         self.max_page_size = max_page_size
+        self.include_count = include_count
 
         serializer_attributes = {
             'Meta': type('Meta', (), {'unknown': marshmallow.EXCLUDE}),
             self.page_key: fields.Int(validate=[validate.Range(1, None)], load_default=None),
+            self.count_key: fields.Bool(load_default=self.include_count),
         }
         if self.max_page_size:
             serializer_attributes[self.page_size_key] = fields.Int(
@@ -135,39 +537,398 @@ class _PageNumberPagination(_Pagination):
             serializer_attributes
         )
 
-    def paginate(self, query):
-        params = self.serializer_class().load(request.args)
+        self.parser = QueryArgsParser(self.serializer_class)
+
+    def load_params(self):
+        params = self.parser.load(query_args())
         page = params[self.page_key]
         page_size = params.get(self.page_size_key) or self.page_size
         if page and self.max_page_size:
             page_size = min(page_size, self.max_page_size)
 
-        query, count = self.paginate_logic(query, page, page_size)
+        return page, page_size, params[self.count_key]
+
+    def paginate(self, query):
+        page, page_size, include_count = self.load_params()
+
+        query, count = self.paginate_logic(query, page, page_size, include_count)
+
+        return query, self.make_meta(page, page_size, include_count, count)
+
+    def statement_params(self):
+        page, page_size, include_count = self.load_params()
 
+        params = {}
+        if page:
+            params = {
+                '_api_limit': page_size if include_count else page_size + 1,
+                '_api_offset': (page - 1) * page_size,
+            }
+
+        shape = (bool(page), bool(params.get('_api_limit')), bool(params.get('_api_offset')), include_count)
+
+        return shape, params, self.make_meta(page, page_size, include_count)
+
+    def make_meta(self, page, page_size, include_count, count=0):
         meta = {
-            self.count_key: count,
             self.page_key: page,
         }
 
+        if include_count:
+            meta[self.count_key] = count
+        else:
+            meta[self.has_more_key] = False
+            meta[self.next_key] = None
+
         if self.page_size_key and page:
             meta[self.page_size_key] = page_size
 
-        return query, meta
+        return meta
 
-    def paginate_logic(self, query, page, page_size):
+    def paginate_logic(self, query, page, page_size, include_count=True):
+        """
+        When not include_count, subclasses fetch page_size + 1 rows, which add_has_more_meta() trims
+        """
         raise NotImplementedError()
 
+    def page_limit_offset(self, query, page_size, limit, offset):
+        if self.page_boundaries is None or (order := self.boundary_order(query)) is None:
+            return self.limit_offset(query, limit, offset)
+
+        query, columns, descending = order
+
+        namespace, key = self.query_model(query), self.query_signature(query)
+
+        # add_count_meta() records the boundary at the end of this page, once its rows are fetched
+        g._api_page_boundary = (
+            namespace, key, columns, offset + page_size, page_size, self.page_boundaries.generation(namespace)
+        )
+
+        boundary_offset, values = self.page_boundaries.nearest(namespace, key, offset)
+
+        if values is not None:
+            query = self.seek_boundary(query, columns, values, descending)
+            offset -= boundary_offset
+
+        return self.limit_offset(query, limit, offset)
+
+    def record_page_boundary(self, objs):
+        if (boundary := g.pop('_api_page_boundary', None)) is None:
+            return
+
+        namespace, key, columns, end_offset, page_size, generation = boundary
+
+        if len(objs) < page_size or (end_offset // page_size) % self.page_boundaries.every:
+            return
+
+        values = self.boundary_values(objs[page_size - 1], columns)
+
+        self.page_boundaries.record(namespace, key, end_offset, values, generation)
+
+    def invalidate(self, model):
+        super().invalidate(model)
+
+        if self.page_boundaries is not None:
+            self.page_boundaries.invalidate(model)
+
     def add_count_meta(self, objs, meta):
-        if not meta['page']:
+        self.record_page_boundary(objs)
+
+        if self.has_more_key in meta:
+            self.add_has_more_meta(objs, meta)
+        elif not meta['page']:
             meta[self.count_key] = len(objs)
         elif objs:
             meta[self.count_key] = objs[0]._api_total_count
 
+    def add_has_more_meta(self, objs, meta):
+        page, page_size = meta[self.page_key], meta.get(self.page_size_key, self.page_size)
+
+        if not page or len(objs) <= page_size:
+            return
+
+        del objs[page_size:]
+
+        meta[self.has_more_key] = True
+        meta[self.next_key] = page + 1
+
+
+class _PageNumberPaginationEagerCount(_EagerCountPagination, _PageNumberPagination):
+    def add_count_meta(self, objs, meta):
+        self.resolve_count(meta)
+        self.record_page_boundary(objs)
+
+        if self.has_more_key in meta:
+            self.add_has_more_meta(objs, meta)
+        elif not meta['page']:
+            meta[self.count_key] = len(objs)
+
+
+class EstimatedCount(int):
+    """
+    A row count taken from the database planner or statistics, rather than from an exact COUNT
+    """
 
-class _PageNumberPaginationEagerCount(_PageNumberPagination):
+
+class _EstimatedCountPagination(_EagerCountPagination):
+    """
+    Returns the planner estimate instead of the exact count once it reaches `estimate_threshold`
+    """
+    estimate_threshold = 100000
+    count_estimated_key = 'count_estimated'
+
+    def __init__(
+            self, *args, estimate_threshold=estimate_threshold, count_estimated_key=count_estimated_key, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.estimate_threshold = estimate_threshold
+        self.count_estimated_key = count_estimated_key
+
+    def _count(self, query):
+        estimate = self.estimate_count(query)
+
+        if estimate is not None and estimate >= self.estimate_threshold:
+            return EstimatedCount(estimate)
+
+        return super()._count(query)
+
+    def add_count_meta(self, objs, meta):
+        super().add_count_meta(objs, meta)
+
+        if self.count_key in meta:
+            meta[self.count_estimated_key] = isinstance(meta[self.count_key], EstimatedCount)
+
+    def estimate_count(self, query):
+        raise NotImplementedError()
+
+
+class _WindowCountPagination(_Pagination):
+    """
+    Counts with `COUNT(*) OVER ()` on each page row instead of a scalar count subquery, where the database and query
+    allow it
+    """
     def _count_logic(self, query):
+        # With a deferred join the outer query only holds one page of rows, and after seeking to a page boundary
+        # only the rows after it, so the window would count those
+        if (
+                self.supports_window_functions(query)
+                and not self.is_distinct(query)
+                and not self.deferred_join
+                and self.page_boundaries is None
+        ):
+            return self.add_count_window(query), 0
+
+        return super()._count_logic(query)
+
+    def supports_window_functions(self, query):
+        raise NotImplementedError()
+
+
+class _CursorPagination(_Pagination):
+    """
+    Keyset pagination by a signed `next` cursor of the sort key and primary key of the last row
+    """
+    cursor_key = 'cursor'
+    page_size_key = 'page_size'
+    next_key = 'next'
+    # The `?ordering` of an OrderingSet, which is rejected, as the cursor follows only its own ordering
+    ordering_key = 'ordering'
+
+    page_size = 1000
+    max_page_size = None
+    ordering = None
+
+    secret_key = None
+    salt = 'pyrestsql.pagination.cursor'
+
+    def __init__(
+            self, ordering=ordering, page_size=page_size, max_page_size=max_page_size, secret_key=secret_key,
+            cursor_key=cursor_key, page_size_key=page_size_key, next_key=next_key, ordering_key=ordering_key
+    ):
+        super().__init__()
+
+        self.ordering = ordering
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.secret_key = secret_key
+        self.cursor_key = cursor_key
+        self.page_size_key = page_size_key
+        self.next_key = next_key
+        self.ordering_key = ordering_key
+
+        self.serializer_class = SchemaMeta(
+            f'{self.__class__.__name__}Schema',
+            (Schema,),
+            {
+                self.cursor_key: fields.Str(load_default=None),
+                self.page_size_key: fields.Int(validate=[validate.Range(1, None)], load_default=self.page_size),
+                self.ordering_key: fields.Raw(validate=[self.reject_ordering]),
+                'Meta': type('Meta', (), {'unknown': marshmallow.EXCLUDE})
+            }
+        )
+
+        self.parser = QueryArgsParser(self.serializer_class)
+
+    def reject_ordering(self, value):
+        raise ValidationError(f'Cursor pagination is ordered by {self.ordering or "the primary key"}.')
+
+    @property
+    def ordering_name(self):
+        if self.ordering is None:
+            return None
+
+        return self.ordering.lstrip('-')
+
+    @property
+    def descending(self):
+        return bool(self.ordering) and self.ordering.startswith('-')
+
+    def load_params(self):
+        """
+        Return (values of the cursor or None, page size)
+        """
+        params = self.parser.load(query_args())
+        cursor = params[self.cursor_key]
+        page_size = params[self.page_size_key]
+
+        if self.max_page_size:
+            page_size = min(page_size, self.max_page_size)
+
+        return self.decode_cursor(cursor) if cursor else None, page_size
+
+    def paginate(self, query):
+        values, page_size = self.load_params()
+
+        columns = self.cursor_columns(query)
+
+        if values is not None:
+            values = [
+                self.bind(f'_api_cursor_{i}', value, column) for i, (column, value) in enumerate(zip(columns, values))
+            ]
+            query = self.seek(query, columns, values)
+
+        query = self.order_by(query, columns)
+
+        # One extra row tells us whether there is a next page, without a count
+        query = query.limit(self.bind('_api_limit', page_size + 1))
+
+        return query, self.make_meta(page_size)
+
+    def statement_params(self):
+        values, page_size = self.load_params()
+
+        params = {'_api_limit': page_size + 1}
+
+        if values is not None:
+            params.update({f'_api_cursor_{i}': value for i, value in enumerate(values)})
+
+        return (None if values is None else len(values),), params, self.make_meta(page_size)
+
+    def make_meta(self, page_size):
+        return {
+            self.next_key: None,
+            self.page_size_key: page_size,
+        }
+
+    def validate_model(self, model):
+        super().validate_model(model)
+
+        if self.ordering_name is None:
+            return
+
+        if (nullable := self.is_nullable(model, self.ordering_name)) is None:
+            raise ConfigurationError(
+                f'{self.__class__.__name__} cannot order by {self.ordering_name}, which is not a column'
+            )
+
+        # After a page that ends on a NULL, `(sort, pk) > (NULL, pk)` matches no rows
+        if nullable:
+            raise ConfigurationError(
+                f'{self.__class__.__name__} cannot order by {self.ordering_name}, which is nullable'
+            )
+
+    def is_nullable(self, model, name):
+        """
+        Return whether the column `name` of `model` is nullable, or None if it has no such column
+        """
+        raise NotImplementedError()
+
+    def cursor_columns(self, query):
+        """
+        Return the columns to sort and seek on, ending with the primary key as a unique tiebreak
+        """
+        raise NotImplementedError()
+
+    def seek(self, query, columns, values):
+        raise NotImplementedError()
+
+    def order_by(self, query, columns):
+        raise NotImplementedError()
+
+    def cursor_values(self, obj):
         raise NotImplementedError()
 
     def add_count_meta(self, objs, meta):
-        if not meta['page']:
-            meta[self.count_key] = len(objs)
+        page_size = meta[self.page_size_key]
+
+        if len(objs) <= page_size:
+            return
+
+        del objs[page_size:]
+
+        meta[self.next_key] = self.encode_cursor(self.cursor_values(objs[-1]))
+
+    def _serializer(self):
+        secret_key = self.secret_key or current_app.secret_key
+
+        if not secret_key:
+            raise Exception(f'{self.__class__.__name__} requires a secret_key, or the Flask app.secret_key to be set')
+
+        return URLSafeSerializer(secret_key, salt=self.salt)
+
+    def encode_cursor(self, values):
+        return self._serializer().dumps({
+            'o': self.ordering,
+            'v': [_encode_cursor_value(value) for value in values],
+        })
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = self._serializer().loads(cursor)
+        except BadData:
+            raise BadInput({self.cursor_key: ['Invalid cursor.']})
+
+        # A cursor handed out under a different ordering would seek to the wrong place
+        if payload.get('o') != self.ordering:
+            raise BadInput({self.cursor_key: ['Invalid cursor.']})
+
+        return [_decode_cursor_value(value) for value in payload['v']]
+
+
+_cursor_value_types = {
+    'datetime': (datetime.datetime, datetime.datetime.fromisoformat),
+    'date': (datetime.date, datetime.date.fromisoformat),
+    'time': (datetime.time, datetime.time.fromisoformat),
+    'decimal': (decimal.Decimal, decimal.Decimal),
+    'uuid': (uuid.UUID, uuid.UUID),
+}
+
+
+def _encode_cursor_value(value):
+    """
+    Cursors are JSON, so tag the types that JSON would otherwise flatten into strings
+    """
+    for tag, (type_, _) in _cursor_value_types.items():
+        if isinstance(value, type_):
+            return {tag: str(value)}
+
+    return value
+
+
+def _decode_cursor_value(value):
+    if isinstance(value, dict) and len(value) == 1:
+        tag, value = next(iter(value.items()))
+        _, parse = _cursor_value_types[tag]
+        return parse(value)
+
+    return value
@@ -0,0 +1,62 @@
+from flask import g, request
+from marshmallow import ValidationError, missing, EXCLUDE
+
+
+def query_args():
+    """
+    The args of a GET_MANY: the query string, or the JSON body of a POST to `_search`
+    """
+    return g.get('_api_query_args', request.args)
+
+
+class QueryArgsParser:
+    """
+    Validates query args with the fields of a marshmallow Schema, instantiated once, instead of a Schema.load() per
+    request
+    """
+    def __init__(self, schema_class):
+        self.schema = schema_class()
+
+        self.compiled = not self.schema._hooks and self.schema.unknown == EXCLUDE
+
+        # Optional fields without a default load nothing when they are missing, so only the args that are present
+        # are looked up, however many filters are declared
+        self.defaulted_fields = []
+        self.optional_fields = {}
+
+        for name, field in self.schema.load_fields.items():
+            data_key, attribute = field.data_key or name, field.attribute or name
+
+            if field.required or field.load_default is not missing:
+                self.defaulted_fields.append((data_key, attribute, field))
+            else:
+                self.optional_fields[data_key] = (attribute, field)
+
+    def load(self, args):
+        if not self.compiled:
+            return self.schema.load(args)
+
+        result = {}
+        errors = {}
+
+        for data_key, attribute, field in self.defaulted_fields:
+            self._load_field(args, data_key, attribute, field, result, errors)
+
+        for data_key in args:
+            if (optional_field := self.optional_fields.get(data_key)) is not None:
+                self._load_field(args, data_key, *optional_field, result, errors)
+
+        if errors:
+            raise ValidationError(errors, data=args, valid_data=result)
+
+        return result
+
+    def _load_field(self, args, data_key, attribute, field, result, errors):
+        try:
+            value = field.deserialize(args.get(data_key, missing), data_key, args)
+        except ValidationError as ex:
+            errors[data_key] = ex.messages
+            return
+
+        if value is not missing:
+            result[attribute] = value
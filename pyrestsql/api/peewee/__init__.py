@@ -1,11 +1,19 @@
+import functools
+
 import peewee
-from flask import request, jsonify
+from flask import request
 from pyrestsql.api import (BaseApi, PostgresqlIntegrityErrorHandler, MysqlIntegrityErrorHandler,
                               SqliteIntegrityErrorHandler, NullIntegrityErrorHandler, _FileApi, ApiMetaClass,
                               ErrorHandler, IntegrityErrorManager, )
 from pyrestsql.exc import AuthorizationError, EntityNotFound
+from pyrestsql.api.parsers import query_args
 from pyrestsql.api.peewee.filters import FilterSet
+from pyrestsql.api.peewee.ordering import OrderingSet
+from pyrestsql.api.peewee.search import SearchSet
 from pyrestsql.api.peewee.pagination import Pagination
+from pyrestsql.api.peewee.trigrams import PeeweeTrigramIndex
+from pyrestsql.api.peewee.geo import PeeweeGeoIndex
+from pyrestsql.api.peewee.counters import PeeweeRowCounter
 from marshmallow.schema import Schema
 from peewee import Select, callable_, Insert, PostgresqlDatabase, SqliteDatabase, MySQLDatabase
 import logging
@@ -22,6 +30,13 @@ def insert_where(model, from_=None, where=None, **kwargs):
 
     fields, values = zip(*kwargs.items())
 
+    # Converted by the field, so that values such as JSON documents are stored as they are by insert()
+    values = [
+        value if isinstance(value, peewee.Node) or field not in model._meta.combined
+        else peewee.Value(value, converter=model._meta.combined[field].db_value, unpack=False)
+        for field, value in zip(fields, values)
+    ]
+
     if isinstance(from_, peewee.Select):
         select = Select((from_,), columns=values)
     elif isinstance(from_, peewee.CTE):
@@ -186,10 +201,30 @@ class PeeweeApiMetaClass(ApiMetaClass):
 
     def generate_filterset_instance(cls):
         obj = cls()
-        cls.filterset = cls.filterset_class(cls.filterset_fields, obj.get_many_queryset())
+        cls.filterset = cls.filterset_class(
+            cls.filterset_fields, obj.get_many_queryset(), trigram_fields=cls.trigram_fields,
+            geo_fields=cls.geo_fields,
+        )
+
+    def ensure_orderingset_class(cls):
+        if cls.orderingset_class is None:
+            cls.orderingset_class = OrderingSet
+
+    def generate_orderingset_instance(cls):
+        obj = cls()
+        cls.orderingset = cls.orderingset_class(cls.ordering_fields, obj.get_many_queryset())
+
+    def ensure_searchset_class(cls):
+        if cls.searchset_class is None:
+            cls.searchset_class = SearchSet
+
+    def generate_searchset_instance(cls):
+        obj = cls()
+        cls.searchset = cls.searchset_class(cls.search_fields, obj.get_many_queryset())
 
     def wrap_perform_create_for_integrity_errors(cls):
         def post_decorator(func):
+            @functools.wraps(func)
             def _post_decorator(self, payload):
                 try:
                     return func(self, payload)
@@ -202,6 +237,7 @@ class PeeweeApiMetaClass(ApiMetaClass):
 
     def wrap_perform_update_for_integrity_errors(cls):
         def patch_decorator(func):
+            @functools.wraps(func)
             def _patch_decorator(self, pk, payload):
                 try:
                     return func(self, pk, payload)
@@ -251,21 +287,64 @@ class Api(BaseApi, metaclass=PeeweeApiMetaClass):
     filterset_fields = None
     filterset = None
 
+    trigram_fields = None
+    trigram_index_class = PeeweeTrigramIndex
+
+    geo_fields = None
+    geo_index_class = PeeweeGeoIndex
+
+    orderingset_class = OrderingSet
+    ordering_fields = None
+    orderingset = None
+
+    searchset_class = SearchSet
+    search_fields = None
+    searchset = None
+
     blueprint = None
 
     error_handler_class = ErrorHandler
     integrity_error_manager_class = PeeweeIntegrityErrorManager
 
+    counter_table = None
+    row_counter_class = PeeweeRowCounter
+
     db = None
 
     def __init__(self, api=None):
         super().__init__(api)
 
+    @classmethod
+    def install_row_counter(cls, db, reseed=False):
+        """
+        Install the triggers which count the rows of the model in the `counter_table`, see RowCounter.install()
+        """
+        return cls.row_counter_class(cls.counter_table, db=db, model=cls.model).install(reseed=reseed)
+
     @classmethod
     def register_app(cls, app, db):
         cls.db = db
         integrity_error_manager = cls.integrity_error_manager_class(db=db, model=cls.model)
-        return super().register_app(app, integrity_error_manager=integrity_error_manager)
+
+        cls.filterset.connect(db=db)
+        cls.searchset.install(cls.search_backend_class, db=db)
+
+        trigram_index = None
+        if cls.filterset.trigram_fields:
+            trigram_index = cls.trigram_index_class(cls.filterset.trigram_columns, db=db, model=cls.model)
+
+        geo_index = None
+        if cls.filterset.geo_fields:
+            geo_index = cls.geo_index_class(*cls.filterset.geo_columns, db=db, model=cls.model)
+
+        row_counter = None
+        if cls.counter_table is not None:
+            row_counter = cls.row_counter_class(cls.counter_table, db=db, model=cls.model)
+
+        return super().register_app(
+            app, integrity_error_manager=integrity_error_manager, row_counter=row_counter, trigram_index=trigram_index,
+            geo_index=geo_index,
+        )
 
     def queryset(self) -> peewee.Select:
         if self.model is not None:
@@ -331,8 +410,8 @@ class Api(BaseApi, metaclass=PeeweeApiMetaClass):
         return obj
 
     def get_response(self, obj):
-        serializer = self._ensure_schema(self.get_serializer_class)
-        return jsonify(serializer.dump(obj)), 200
+        serializer = self._schema('get_serializer_class')
+        return self.json_encoder.response(serializer.dump(obj)), 200
 
     def get_many(self):
         objs, meta = self.get_many_objects()
@@ -340,21 +419,33 @@ class Api(BaseApi, metaclass=PeeweeApiMetaClass):
         return self.get_many_response(objs, meta)
 
     def get_many_objects(self):
-        query = self.get_many_permissions(self.get_many_queryset())
+        args = query_args()
 
-        query = self.filterset.apply_filters(request.args, query)
+        if self.statement_cache is not None and (cached := self.statement_cache.fetch(self, args)) is not None:
+            objs, meta = cached
+        else:
+            query = self.get_many_permissions(self.get_many_queryset())
 
-        query, meta = self.pagination.paginate(query)
+            query = self.filterset.apply_filters(args, query)
 
-        with self.db:
-            objs = list(query)
+            query = self.searchset.apply_search(args, query)
+
+            query = self.orderingset.apply_ordering(args, query)
+
+            if self.index_advisor is not None:
+                self.index_advisor.sample(self, query)
+
+            query, meta = self.pagination.paginate(query)
+
+            with self.db:
+                objs = list(query)
 
         self.pagination.add_count_meta(objs, meta)
 
         return objs, meta
 
     def get_many_response(self, objs, meta=None):
-        serializer = self._ensure_schema(self.get_many_serializer_class)
+        serializer = self._dumper('get_many_serializer_class')
 
         meta = meta or {}
 
@@ -363,7 +454,7 @@ class Api(BaseApi, metaclass=PeeweeApiMetaClass):
             **meta
         }
 
-        return jsonify(results), 200
+        return self.json_encoder.response(results), 200
 
     def post(self, json=None):
         payload = self.post_payload(json)
@@ -375,18 +466,18 @@ class Api(BaseApi, metaclass=PeeweeApiMetaClass):
     def post_payload(self, json=None):
         json = json or request.json
 
-        serializer = self._ensure_schema(self.post_serializer_class)
+        serializer = self._loader('post_serializer_class')
 
         payload = serializer.load(json)
 
         return payload
 
     def post_response(self, obj):
-        serializer = self._ensure_schema(self.post_serializer_class)
+        serializer = self._schema('post_serializer_class')
 
         obj = serializer.dump(obj)
 
-        return jsonify(obj), 201
+        return self.json_encoder.response(obj), 201
 
     def perform_create(self, payload):
         with self.db:
@@ -405,7 +496,7 @@ class Api(BaseApi, metaclass=PeeweeApiMetaClass):
 
     def patch(self, pk, json=None):
         if not (payload := self.patch_payload(json)):
-            return jsonify({}), 200
+            return self.json_encoder.response({}), 200
 
         obj = self.perform_update(pk, payload)
 
@@ -414,7 +505,7 @@ class Api(BaseApi, metaclass=PeeweeApiMetaClass):
     def patch_payload(self, json=None):
         json = json or request.json
 
-        serializer = self._ensure_schema(self.patch_serializer_class)
+        serializer = self._loader('patch_serializer_class')
 
         return serializer.load(json, partial=True)
 
@@ -443,11 +534,11 @@ class Api(BaseApi, metaclass=PeeweeApiMetaClass):
         return query
 
     def patch_response(self, obj):
-        serializer = self._ensure_schema(self.patch_serializer_class)
+        serializer = self._schema('patch_serializer_class')
 
         obj = serializer.dump(obj)
 
-        return jsonify(obj), 200
+        return self.json_encoder.response(obj), 200
 
     def delete(self, pk):
         self.perform_delete(pk)
@@ -455,7 +546,7 @@ class Api(BaseApi, metaclass=PeeweeApiMetaClass):
         return self.delete_response()
 
     def delete_response(self):
-        return jsonify({}), 200
+        return self.json_encoder.response({}), 200
 
     def perform_delete(self, pk):
         query = self.delete_permissions(self.delete_queryset(pk))
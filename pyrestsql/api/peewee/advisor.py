@@ -0,0 +1,112 @@
+import json
+
+from pyrestsql.api.advisor import (_IndexAdvisor, postgres_sequential_scans, mysql_sequential_scans,
+                                      sqlite_sequential_scans, )
+from pyrestsql.api.peewee.database import dialect_name, quote
+from pyrestsql.api.peewee.pagination import _explain
+from peewee import Field, Expression, NodeList, Function, Select, Table
+
+
+def _table_aliases(db, query):
+    """
+    Map the aliases peewee gives the tables of the outer query (t1, t2, ...) back to their table names
+    """
+    context = db.get_sql_context()
+    context.sql(query)
+
+    return {
+        alias: source.__name__
+        for source, alias in context.alias_manager._mapping[0].items()
+        if isinstance(source, Table)
+    }
+
+
+class IndexAdvisor(_IndexAdvisor):
+    def table_and_column_name(self, column):
+        if not isinstance(column, Field):
+            return None
+
+        return column.model._meta.table_name, column.column_name
+
+    def where_columns(self, query):
+        if query is None:
+            return []
+
+        columns = []
+        stack = [query._where]
+
+        while stack:
+            node = stack.pop()
+
+            if isinstance(node, Field):
+                columns.append(node)
+            elif isinstance(node, Expression):
+                stack += [node.lhs, node.rhs]
+            elif isinstance(node, NodeList):
+                stack += node.nodes
+            elif isinstance(node, Function):
+                stack += node.arguments
+            elif isinstance(node, Select):
+                stack.append(node._where)
+
+        return columns
+
+    def indexed_columns(self, api, table):
+        db = api.db
+
+        with db:
+            if not db.table_exists(table):
+                return None
+
+            indexes = [index.columns for index in db.get_indexes(table)]
+            indexes.append(db.get_primary_keys(table))
+
+        return {columns[0] for columns in indexes if columns}
+
+    def index_names(self, api, table):
+        db = api.db
+
+        with db:
+            if not db.table_exists(table):
+                return None
+
+            return {index.name for index in db.get_indexes(table)}
+
+    def dialect_name(self, api):
+        return dialect_name(api.db)
+
+    def quote(self, api, name):
+        return quote(api.db, name)
+
+    def sequential_scans(self, api, query):
+        aliases = _table_aliases(api.db, query)
+
+        return [
+            (aliases.get(table, table), rows)
+            for table, rows in self._sequential_scans(api.db, query)
+        ]
+
+    def _sequential_scans(self, db, query):
+        name = dialect_name(db)
+
+        with db:
+            if name == 'postgresql':
+                plan = _explain(db, 'EXPLAIN (FORMAT JSON)', query).fetchone()[0]
+
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+
+                return list(postgres_sequential_scans(plan))
+
+            if name == 'mysql':
+                cursor = _explain(db, 'EXPLAIN', query)
+                columns = [column[0] for column in cursor.description]
+
+                return list(mysql_sequential_scans(dict(zip(columns, row)) for row in cursor.fetchall()))
+
+            if name == 'sqlite':
+                rows = _explain(db, 'EXPLAIN QUERY PLAN', query).fetchall()
+
+                return list(sqlite_sequential_scans(row[-1] for row in rows))
+
+        return []
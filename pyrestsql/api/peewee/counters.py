@@ -0,0 +1,25 @@
+from pyrestsql.api.counters import RowCounter
+from pyrestsql.api.peewee.pagination import _unfiltered_table_name
+from pyrestsql.api.peewee.database import DatabaseAccess
+
+
+class PeeweeRowCounter(DatabaseAccess, RowCounter):
+    def __init__(self, counter_table, db=None, model=None, **kwargs):
+        self.db = db
+        self.model = model
+        super().__init__(counter_table, **kwargs)
+
+    def table_name(self):
+        return self.model._meta.table_name
+
+    def count(self, query):
+        if query.model is not self.model or _unfiltered_table_name(query) is None:
+            return None
+
+        with self.db:
+            row = self.db.execute_sql(
+                f'SELECT row_count FROM {self.quote(self.counter_table)} WHERE table_name = {self.db.param}',
+                [self.table_name()]
+            ).fetchone()
+
+        return row and row[0]
@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+
+from pyrestsql.api.database import _DatabaseAccess
+from peewee import PostgresqlDatabase, MySQLDatabase, SqliteDatabase
+
+
+def dialect_name(db):
+    if isinstance(db, PostgresqlDatabase):
+        return 'postgresql'
+
+    if isinstance(db, MySQLDatabase):
+        return 'mysql'
+
+    if isinstance(db, SqliteDatabase):
+        return 'sqlite'
+
+    return db.__class__.__name__
+
+
+def quote(db, name):
+    quote_chars = db.quote
+    return name.replace(quote_chars[0], quote_chars).join(quote_chars)
+
+
+class DatabaseAccess(_DatabaseAccess):
+    db = None
+
+    def dialect_name(self):
+        return dialect_name(self.db)
+
+    def quote(self, name):
+        return quote(self.db, name)
+
+    def table_exists(self, name):
+        with self.db:
+            return self.db.table_exists(name)
+
+    @contextmanager
+    def transaction(self):
+        def execute(sql):
+            cursor = self.db.execute_sql(sql)
+            row = cursor.fetchone() if cursor.description else None
+            return row and row[0]
+
+        with self.db:
+            with self.db.atomic():
+                yield execute
+
+    def scalar(self, sql):
+        with self.db:
+            row = self.db.execute_sql(sql).fetchone()
+
+        return row and row[0]
@@ -1,6 +1,40 @@
+import json
+
 import peewee
-from pyrestsql.api.filters import _FilterSet
+from pyrestsql.api.filters import _FilterSet, _glob_prefix
+from pyrestsql.api.peewee.database import dialect_name
 from marshmallow import fields
+from peewee import fn, Value, Select, SQL, NodeList, AsIs, Cast, Expression, OP
+from playhouse.sqlite_ext import JSONField as SqliteJSONField
+
+
+class Slot(peewee.Node):
+    """
+    A value which the StatementCache binds again for each request. When the context has a `slots` setting, it records
+    where the value is in the params, with `converter` or else the converter of the field it is compared with
+    """
+    def __init__(self, name, value, converter=None):
+        self.name = name
+        self.value = value
+        self.converter = converter
+
+    def __sql__(self, ctx):
+        position = len(ctx._values)
+        converter = self.converter or ctx.state.converter
+
+        ctx.value(self.value, converter)
+
+        if (slots := ctx.state.slots) is not None:
+            # A value inlined as a literal can't be bound again
+            slots.setdefault(self.name, []).append(
+                (position, converter) if len(ctx._values) == position + 1 else None
+            )
+
+        return ctx
+
+
+def _like_prefix(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
 
 
 class FilterSet(_FilterSet):
@@ -20,10 +54,12 @@ class FilterSet(_FilterSet):
             marshmallow_field = fields.Int
         elif isinstance(column, (peewee.FloatField, peewee.DecimalField)):
             marshmallow_field = fields.Number
-        elif isinstance(column, peewee.DateField):
-            marshmallow_field = fields.DateTime,  # TODO what about UTC ...
+        elif isinstance(column, peewee.BooleanField):
+            marshmallow_field = fields.Bool
         elif isinstance(column, peewee.DateTimeField):
-            marshmallow_field = fields.Date,  # TODO what about UTC ...
+            marshmallow_field = fields.DateTime  # TODO what about UTC ...
+        elif isinstance(column, peewee.DateField):
+            marshmallow_field = fields.Date
         elif isinstance(column, peewee.TimeField):
             marshmallow_field = fields.Time
         else:
@@ -38,4 +74,79 @@ class FilterSet(_FilterSet):
 
         return marshmallow_kwargs
 
+    def connect(self, db=None, **kwargs):
+        self.dialect_name = dialect_name(db)
+
+    def in_(self, column, values):
+        if self.dialect_name == 'postgresql':
+            return column == fn.ANY(Value(values, unpack=False))
+
+        if self.dialect_name == 'sqlite' and all(isinstance(value, (int, str)) for value in values):
+            return column.in_(Select((fn.json_each(json.dumps(values)),), (SQL('value'),)))
+
+        if self.dialect_name == 'mysql' and all(
+                isinstance(value, int) and not isinstance(value, bool) for value in values
+        ):
+            json_values = NodeList((
+                fn.JSON_TABLE(json.dumps(values), SQL("'$[*]' COLUMNS (v BIGINT PATH '$')")), SQL('json_values')
+            ))
+
+            return column.in_(Select((json_values,), (SQL('v'),)))
+
+        return super().in_(column, values)
+
+    def isnull(self, column, value):
+        return column.is_null(value)
+
+    def startswith(self, column, value):
+        if self.dialect_name == 'sqlite':
+            # LIKE is case-insensitive on SQLite, GLOB is not and can also use an index on the column
+            return Expression(column, 'GLOB', Value(_glob_prefix(value), converter=False))
+
+        # Not peewee's startswith(), which is ILIKE on Postgres, and can't use a btree index
+        return Expression(column, OP.LIKE, NodeList((
+            Value(_like_prefix(value), converter=False), SQL('ESCAPE'), Value('\\', converter=False)
+        )))
+
+    def unindexed_icontains(self, column, value):
+        # ILIKE on Postgres, and LIKE, which is case-insensitive, elsewhere
+        return column.contains(value)
+
+    def slot(self, name, value, column):
+        return Slot(name, value)
+
+    def is_json_column(self, column):
+        # The JSONField of SQLite is stored as TEXT
+        return isinstance(column, SqliteJSONField) or getattr(column, 'field_type', None) in ('JSON', 'JSONB')
+
+    def is_jsonb_column(self, column):
+        return getattr(column, 'field_type', None) == 'JSONB'
+
+    def json_path_equals(self, column, value, path):
+        if self.dialect_name == 'postgresql':
+            if not self.is_jsonb_column(column):
+                column = Cast(column, 'JSONB')
+
+            # Not converted by the field, which would encode the document again
+            document = Cast(Value(json.dumps(self.json_document(path, value)), converter=False, unpack=False), 'JSONB')
+
+            return Expression(column, '@>', document)
+
+        # A literal rather than a param, so that it matches the expression of an index
+        json_path = SQL(f"'{self.json_path(path)}'")
+
+        if self.dialect_name == 'mysql' and isinstance(value, str):
+            value_at_path = fn.JSON_UNQUOTE(fn.JSON_EXTRACT(column, json_path))
+        elif self.dialect_name == 'mysql':
+            value_at_path = fn.JSON_EXTRACT(column, json_path)
+        else:
+            value_at_path = fn.json_extract(column, json_path)
+
+        if value is None:
+            return value_at_path.is_null()
+
+        if self.dialect_name == 'mysql' and not isinstance(value, str):
+            # Compared as JSON, so that 1 does not equal "1" and true is not 1
+            return value_at_path == fn.JSON_EXTRACT(AsIs(json.dumps(value)), SQL("'$'"))
 
+        return value_at_path == AsIs(value)
@@ -0,0 +1,61 @@
+from pyrestsql.api.geo import GeoIndex
+from pyrestsql.api.peewee.database import DatabaseAccess
+from peewee import Table, Expression, IntegerField, fn, SQL
+
+
+class PeeweeGeoIndex(DatabaseAccess, GeoIndex):
+    def __init__(self, latitude, longitude, db=None, model=None, **kwargs):
+        self.db = db
+        self.model = model
+        super().__init__(latitude, longitude, **kwargs)
+
+    def table_name(self):
+        return self.model._meta.table_name
+
+    def primary_key_name(self):
+        return self.model._meta.primary_key.column_name
+
+    def column_name(self, column):
+        return column.column_name
+
+    def is_integer_primary_key(self):
+        return isinstance(self.model._meta.primary_key, IntegerField)
+
+    def range_bbox(self, south, west, north, east):
+        return self.latitude.between(south, north) & self.longitude.between(west, east)
+
+    def within_distance(self, latitude, longitude, radius):
+        scale, radius_squared = self.equirectangular_scale(latitude, radius)
+
+        latitude_distance = self.latitude - latitude
+        longitude_distance = (self.longitude - longitude) * scale
+
+        return latitude_distance * latitude_distance + longitude_distance * longitude_distance <= radius_squared
+
+    def rtree_bbox(self, south, west, north, east):
+        rtree = Table(self.rtree_table_name, ('id', 'min_lat', 'max_lat', 'min_lon', 'max_lon'))
+
+        row_ids = rtree.select(rtree.id).where(
+            (rtree.max_lat >= south)
+            & (rtree.min_lat <= north)
+            & (rtree.max_lon >= west)
+            & (rtree.min_lon <= east)
+        )
+
+        return self.model._meta.primary_key.in_(row_ids)
+
+    def make_point(self, longitude, latitude):
+        # The SRID as a literal rather than a param, so that the point of a row matches the expression of the index
+        return fn.ST_SetSRID(fn.ST_MakePoint(longitude, latitude), SQL(str(self.srid)))
+
+    def postgis_bbox(self, south, west, north, east):
+        envelope = fn.ST_MakeEnvelope(west, south, east, north, SQL(str(self.srid)))
+
+        return Expression(self.make_point(self.longitude, self.latitude), '&&', envelope)
+
+    def postgis_within_distance(self, latitude, longitude, radius):
+        return fn.ST_DWithin(
+            fn.geography(self.make_point(self.longitude, self.latitude)),
+            fn.geography(self.make_point(longitude, latitude)),
+            radius,
+        )
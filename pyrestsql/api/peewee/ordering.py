@@ -0,0 +1,52 @@
+from pyrestsql.api.ordering import _OrderingSet
+from peewee import Ordering
+
+
+class OrderingSet(_OrderingSet):
+    def _make_query_fields(self):
+        return {
+            column.column_name: column
+            for column in self.query._returning
+            if hasattr(column, 'column_name')
+        }
+
+    def is_indexed(self, column):
+        """
+        fields_to_index() includes the primary key, foreign keys, indexed/unique fields and Meta.indexes
+        """
+        model = column.model
+
+        if column.primary_key:
+            return True
+
+        leading_columns = [
+            index._expressions[0]
+            for index in model._meta.fields_to_index()
+            if index._expressions
+        ]
+
+        return any(leading_column is column for leading_column in leading_columns)
+
+    def primary_key_column(self, query):
+        return query.model._meta.primary_key
+
+    def order_by_columns(self, query):
+        return [
+            (node.node, node.direction.upper() == 'DESC') if isinstance(node, Ordering) else (node, False)
+            for node in query._order_by or ()
+        ]
+
+    def is_primary_key(self, query, column):
+        return column is query.model._meta.primary_key
+
+    def order_by(self, query, columns):
+        return query.order_by(*[
+            column.desc() if descending else column
+            for column, descending in columns
+        ])
+
+    def extend_order_by(self, query, columns):
+        return query.order_by_extend(*[
+            column.desc() if descending else column
+            for column, descending in columns
+        ])
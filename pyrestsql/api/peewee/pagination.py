@@ -1,8 +1,142 @@
+import json
+import sqlite3
+
 from pyrestsql.api.pagination import (
     _Pagination, _LimitOffsetPagination, _LimitOffsetPaginationEagerCount,
-    _PageNumberPagination, _PageNumberPaginationEagerCount,
+    _PageNumberPagination, _PageNumberPaginationEagerCount, _CursorPagination, _EstimatedCountPagination,
+    _WindowCountPagination,
 )
-from peewee import Select, fn, SQL
+from pyrestsql.api.peewee.filters import Slot
+from peewee import (Select, fn, SQL, Tuple, PostgresqlDatabase, MySQLDatabase, SqliteDatabase, DatabaseError, Field,
+                    Ordering, )
+
+
+def estimate_count(db, query):
+    """
+    Return the planner's row estimate for the query, or None if the database cannot give one
+    """
+    if isinstance(db, PostgresqlDatabase):
+        return _estimate_count_postgres(db, query)
+
+    if isinstance(db, MySQLDatabase):
+        return _estimate_count_mysql(db, query)
+
+    if isinstance(db, SqliteDatabase):
+        return _estimate_count_sqlite(db, query)
+
+    return None
+
+
+def _unfiltered_table_name(query):
+    """
+    Return the table name if the query reads every row of a single table, otherwise None
+    """
+    if query._where is not None or query._group_by or query._distinct:
+        return None
+
+    if query._from_list != [query.model]:
+        return None
+
+    return query.model._meta.table_name
+
+
+def _explain(db, prefix, query):
+    sql, params = query.sql()
+
+    return db.execute_sql(f'{prefix} {sql}', params)
+
+
+def _estimate_count_postgres(db, query):
+    if (table_name := _unfiltered_table_name(query)) is not None:
+        row = db.execute_sql('SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)', [table_name]).fetchone()
+
+        # reltuples is -1 for a table that has never been vacuumed or analyzed
+        if row is not None and row[0] is not None and row[0] >= 0:
+            return int(row[0])
+
+    plan = _explain(db, 'EXPLAIN (FORMAT JSON)', query).fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _estimate_count_mysql(db, query):
+    if (table_name := _unfiltered_table_name(query)) is not None:
+        row = db.execute_sql(
+            '''
+                SELECT table_rows
+                FROM information_schema.tables
+                WHERE 1=1
+                    AND table_schema = database()
+                    AND table_name = %s
+            ''', [table_name]
+        ).fetchone()
+
+        if row is not None and row[0] is not None:
+            return int(row[0])
+
+    cursor = _explain(db, 'EXPLAIN', query)
+    columns = [column[0] for column in cursor.description]
+
+    if (row := cursor.fetchone()) is None:
+        return None
+
+    row = dict(zip(columns, row))
+
+    if row['rows'] is None:
+        return None
+
+    return int(row['rows'] * (row.get('filtered') or 100) / 100)
+
+
+def _estimate_count_sqlite(db, query):
+    """
+    sqlite_stat1 is only populated by ANALYZE, and sqlite has no estimate for a filtered query
+    """
+    if (table_name := _unfiltered_table_name(query)) is None:
+        return None
+
+    try:
+        row = db.execute_sql(
+            'SELECT stat FROM sqlite_stat1 WHERE tbl = ? ORDER BY idx IS NULL DESC LIMIT 1', [table_name]
+        ).fetchone()
+    except DatabaseError:
+        return None
+
+    if not row or not row[0]:
+        return None
+
+    return int(row[0].split()[0])
+
+
+def supports_window_functions(db):
+    if isinstance(db, SqliteDatabase):
+        return sqlite3.sqlite_version_info >= (3, 25)
+
+    if isinstance(db, MySQLDatabase):
+        # server_version is unknown until the first connection, and MariaDB reports 10.x
+        return db.server_version is not None and db.server_version >= (8, 0)
+
+    return True
+
+
+def seek(query, columns, values, descending=False):
+    """
+    Return the query filtered to the rows after `values` in the order of `columns`
+    """
+    if len(columns) == 1:
+        left, right = columns[0], values[0]
+    else:
+        left, right = Tuple(*columns), Tuple(*[
+            value if isinstance(value, Slot) else column.to_value(value) for column, value in zip(columns, values)
+        ])
+
+    if descending:
+        return query.where(left < right)
+
+    return query.where(left > right)
 
 
 class Pagination(_Pagination):
@@ -11,41 +145,183 @@ class Pagination(_Pagination):
             Select([query.clone()], [fn.count(SQL('1'))]).alias('_api_total_count')
         )
 
+    def add_count_window(self, query):
+        return query.select_extend(
+            fn.count(SQL('1')).over().alias('_api_total_count')
+        )
+
+    def is_distinct(self, query):
+        return bool(query._distinct)
+
+    def query_model(self, query):
+        return query.model
+
+    def boundary_order(self, query):
+        primary_key_field = query.model._meta.primary_key
+
+        columns = []
+        directions = set()
+
+        for node in query._order_by or ():
+            descending = False
+
+            if isinstance(node, Ordering):
+                descending = node.direction.upper() == 'DESC'
+                node = node.node
+
+            # NULLs can't be compared in a seek, and would sort differently per database anyway
+            if not isinstance(node, Field) or node.model is not query.model or node.null:
+                return None
+
+            columns.append(node)
+            directions.add(descending)
+
+        if len(directions) != 1:
+            return None
+
+        descending = directions.pop()
+
+        if not any(column is primary_key_field for column in columns):
+            query = query.order_by_extend(primary_key_field.desc() if descending else primary_key_field)
+            columns.append(primary_key_field)
+
+        return query, columns, descending
+
+    def boundary_values(self, obj, columns):
+        """
+        Read from __data__ so that foreign keys give their raw value and not the related model
+        """
+        return [obj.__data__[column.name] for column in columns]
+
+    def seek_boundary(self, query, columns, values, descending):
+        return seek(query, columns, values, descending)
+
+    def slot(self, name, value, column=None):
+        return Slot(name, value, column.db_value if column is not None else None)
+
+    def query_signature(self, query):
+        sql, params = query.sql()
+
+        return sql, repr(params)
+
+    def deferred_join_limit_offset(self, query, limit, offset):
+        primary_key_field = query.model._meta.primary_key
+
+        # select() replaces the selected columns but keeps the WHERE, joins and ORDER BY
+        page = query.select(primary_key_field)
+
+        if limit:
+            page = page.limit(self.bind('_api_limit', limit))
+
+        page = page.offset(self.bind('_api_offset', offset)).alias('_api_page')
+
+        return query.join(page, on=(primary_key_field == getattr(page.c, primary_key_field.column_name)))
+
 
 class LimitOffsetPagination(_LimitOffsetPagination, Pagination):
     pass
 
 
+class LimitOffsetPaginationWindowCount(_WindowCountPagination, LimitOffsetPagination):
+    def __init__(self, *args, db=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.db = db
+
+    def supports_window_functions(self, query):
+        return supports_window_functions(self.db or query.model._meta.database)
+
+
 class LimitOffsetPaginationEagerCount(_LimitOffsetPaginationEagerCount, LimitOffsetPagination):
     def __init__(self, *args, db=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.db = db
 
-    def _count_logic(self, query):
+    def _count(self, query):
         with self.db:
-            count = query.count()
+            return query.count()
 
-        return query, count
+
+class LimitOffsetPaginationEstimatedCount(_EstimatedCountPagination, LimitOffsetPaginationEagerCount):
+    def estimate_count(self, query):
+        with self.db:
+            return estimate_count(self.db, query)
 
 
 class PageNumberPagination(_PageNumberPagination, Pagination):
-    def paginate_logic(self, query, page, page_size):
+    def paginate_logic(self, query, page, page_size, include_count=True):
         count = 0
         if page:
-            query, count = self._count_logic(query)
+            if include_count:
+                query, count = self._count_logic(query)
 
-            query = query.paginate(page, page_size)
+            query = self.page_limit_offset(
+                query, page_size, page_size if include_count else page_size + 1, (page - 1) * page_size
+            )
 
         return query, count
 
 
+class PageNumberPaginationWindowCount(_WindowCountPagination, PageNumberPagination):
+    def __init__(self, *args, db=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.db = db
+
+    def supports_window_functions(self, query):
+        return supports_window_functions(self.db or query.model._meta.database)
+
+
 class PageNumberPaginationEagerCount(_PageNumberPaginationEagerCount, PageNumberPagination):
     def __init__(self, *args, db=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.db = db
 
-    def _count_logic(self, query):
+    def _count(self, query):
         with self.db:
-            count = query.count()
+            return query.count()
 
-        return query, count
+
+class PageNumberPaginationEstimatedCount(_EstimatedCountPagination, PageNumberPaginationEagerCount):
+    def estimate_count(self, query):
+        with self.db:
+            return estimate_count(self.db, query)
+
+
+class CursorPagination(_CursorPagination, Pagination):
+    def cursor_columns(self, query):
+        primary_key_field = query.model._meta.primary_key
+
+        if self.ordering_name is None:
+            return [primary_key_field]
+
+        field = query.model._meta.fields[self.ordering_name]
+
+        if field is primary_key_field:
+            return [primary_key_field]
+
+        return [field, primary_key_field]
+
+    def is_nullable(self, model, name):
+        if (field := model._meta.fields.get(name)) is None:
+            return None
+
+        return field.null
+
+    def seek(self, query, columns, values):
+        return seek(query, columns, values, self.descending)
+
+    def order_by(self, query, columns):
+        if self.descending:
+            columns = [column.desc() for column in columns]
+
+        return query.order_by(*columns)
+
+    def cursor_values(self, obj):
+        """
+        Read from __data__ so that foreign keys give their raw value and not the related model
+        """
+        primary_key_name = obj._meta.primary_key.name
+
+        if self.ordering_name is None or self.ordering_name == primary_key_name:
+            return [obj.__data__[primary_key_name]]
+
+        return [obj.__data__[self.ordering_name], obj.__data__[primary_key_name]]
@@ -0,0 +1,93 @@
+from functools import reduce
+import operator
+
+from pyrestsql.api.search import _SearchSet, _PostgresSearch, _SqliteSearch, _MysqlSearch, _LikeSearch
+from pyrestsql.api.peewee.database import DatabaseAccess
+from peewee import fn, SQL, Expression, Table, IntegerField
+from playhouse.mysql_ext import Match
+
+
+class PostgresSearch(_PostgresSearch):
+    def document(self):
+        """
+        The same expression as `document_sql()`, with literals rather than params so that it matches the index
+        """
+        document = reduce(
+            lambda left, right: left.concat(SQL("' '")).concat(right),
+            [fn.COALESCE(column, SQL("''")) for column in self.columns]
+        )
+
+        return fn.to_tsvector(SQL(f"'{self.config}'"), document)
+
+    def search(self, query, terms):
+        document = self.document()
+        tsquery = fn.websearch_to_tsquery(SQL(f"'{self.config}'"), terms)
+
+        query = query.where(Expression(document, '@@', tsquery))
+
+        return self.searchset.order_by(query, fn.ts_rank(document, tsquery), True)
+
+
+class SqliteSearch(_SqliteSearch):
+    def is_integer(self, column):
+        return isinstance(column, IntegerField)
+
+    def search(self, query, terms):
+        # Aliased to its own name, as MATCH is against the table itself
+        fts_table = Table(self.fts_table_name, ('rowid', 'rank', self.fts_table_name)).alias(self.fts_table_name)
+
+        query = query.join_from(
+            query.model, fts_table, on=(fts_table.rowid == self.searchset.primary_key_column(query))
+        ).where(
+            Expression(getattr(fts_table, self.fts_table_name), 'MATCH', self.match_expression(terms))
+        )
+
+        return self.searchset.order_by(query, fts_table.rank, False)
+
+
+class MysqlSearch(_MysqlSearch):
+    def search(self, query, terms):
+        relevance = Match(self.columns, terms, 'IN NATURAL LANGUAGE MODE')
+
+        return self.searchset.order_by(query.where(relevance), relevance, True)
+
+
+class LikeSearch(_LikeSearch):
+    def search(self, query, terms):
+        return query.where(reduce(operator.and_, [
+            reduce(operator.or_, [column.contains(term) for column in self.columns])
+            for term in terms.split()
+        ]))
+
+
+class SearchSet(DatabaseAccess, _SearchSet):
+    backend_classes = {
+        'postgresql': PostgresSearch,
+        'sqlite': SqliteSearch,
+        'mysql': MysqlSearch,
+    }
+    fallback_backend_class = LikeSearch
+
+    def _make_query_fields(self):
+        return {
+            column.column_name: column
+            for column in self.query._returning
+            if hasattr(column, 'column_name')
+        }
+
+    def connect(self, db=None, **kwargs):
+        self.db = db
+
+    def table_name(self):
+        return self.query.model._meta.table_name
+
+    def column_name(self, column):
+        return column.column_name
+
+    def primary_key_column(self, query):
+        return query.model._meta.primary_key
+
+    def order_by(self, query, rank, descending):
+        order_by = list(query._order_by or ()) or [self.primary_key_column(query)]
+
+        return query.order_by(rank.desc() if descending else rank, *order_by)
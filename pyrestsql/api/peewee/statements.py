@@ -0,0 +1,25 @@
+from pyrestsql.api.statements import _StatementCache, Statement
+
+
+class StatementCache(_StatementCache):
+    def compile(self, api, query):
+        slots = {}
+
+        sql, params = api.db.get_sql_context(slots=slots).sql(query).query()
+
+        if any(position is None for positions in slots.values() for position in positions):
+            return False
+
+        return Statement(query, sql, tuple(params), slots)
+
+    def execute(self, api, statement, params):
+        values = list(statement.params)
+
+        for name, positions in statement.slots.items():
+            for position, converter in positions:
+                values[position] = converter(params[name]) if converter is not None else params[name]
+
+        with api.db:
+            cursor = api.db.execute_sql(statement.sql, values)
+
+            return list(statement.query._get_cursor_wrapper(cursor))
@@ -0,0 +1,72 @@
+from pyrestsql.api.trigrams import TrigramIndex
+from pyrestsql.api.peewee.database import DatabaseAccess
+from peewee import Table, Expression, fn, SQL
+
+
+class PeeweeTrigramIndex(DatabaseAccess, TrigramIndex):
+    def __init__(self, columns, db=None, model=None, **kwargs):
+        self.db = db
+        self.model = model
+        super().__init__(columns, **kwargs)
+
+    def table_name(self):
+        return self.model._meta.table_name
+
+    def primary_key_name(self):
+        return self.model._meta.primary_key.column_name
+
+    def column_name(self, column):
+        return column.column_name
+
+    def side_table(self, column):
+        return Table(self.side_table_name(column), ('trigram', 'row_id'))
+
+    def postgres_icontains(self, column, value):
+        return column.contains(value)
+
+    def postgres_similar(self, column, value):
+        # %% as peewee passes the SQL to the driver, which formats it with %s params. % uses the index, but with the
+        # pg_trgm.similarity_threshold of the database, which a lower similarity_threshold needs lowered too
+        return (
+            Expression(column, '%%', value) & (fn.similarity(column, value) >= self.similarity_threshold)
+        )
+
+    def unindexed_icontains(self, column, value):
+        return column.contains(value)
+
+    def side_table_icontains(self, column, value, trigrams):
+        side_table = self.side_table(column)
+
+        row_ids = side_table.select(side_table.row_id).where(
+            side_table.trigram.in_(trigrams)
+        ).group_by(
+            side_table.row_id
+        ).having(
+            fn.COUNT(SQL('*')) == len(trigrams)
+        )
+
+        # No trigrams are indexed past max_length, so longer values are only matched by the LIKE. length() counts
+        # bytes on MySQL, which only rechecks more of them
+        return (
+            (self.model._meta.primary_key.in_(row_ids) | (fn.LENGTH(column) > self.max_length))
+            & self.unindexed_icontains(column, value)
+        )
+
+    def side_table_similar(self, column, trigrams):
+        side_table = self.side_table(column)
+        row_trigrams = self.side_table(column).alias('row_trigrams')
+
+        shared = fn.COUNT(SQL('*'))
+        row_count = row_trigrams.select(fn.COUNT(SQL('*'))).where(row_trigrams.row_id == side_table.row_id)
+        # Expression, as + on a Select is a UNION
+        union_count = Expression(Expression(row_count, '+', len(trigrams)), '-', shared)
+
+        row_ids = side_table.select(side_table.row_id).where(
+            side_table.trigram.in_(trigrams)
+        ).group_by(
+            side_table.row_id
+        ).having(
+            shared >= union_count * self.similarity_threshold
+        )
+
+        return self.model._meta.primary_key.in_(row_ids)
@@ -1,4 +1,4 @@
-from flask import jsonify, request
+from flask import request
 from pyrestsql.api import BaseApi, _get_error_constraint_name, _get_error_field_value
 from pyrestsql.exc import AuthorizationError
 from pyrestsql.api.pony.filters import FilterSet
@@ -99,8 +99,8 @@ class Api(BaseApi):
         return obj
 
     def get_response(self, obj):
-        serializer = self._ensure_schema(self.get_serializer_class)
-        return jsonify(serializer.dump(obj)), 200
+        serializer = self._schema('get_serializer_class')
+        return self.json_encoder.response(serializer.dump(obj)), 200
 
     def get_many(self):
         objs, meta = self.get_many_objects()
@@ -122,7 +122,7 @@ class Api(BaseApi):
         return objs, meta
 
     def get_many_response(self, objs, meta=None):
-        serializer = self._ensure_schema(self.get_many_serializer_class)
+        serializer = self._dumper('get_many_serializer_class')
 
         meta = meta or {}
 
@@ -131,7 +131,7 @@ class Api(BaseApi):
             **meta
         }
 
-        return jsonify(results), 200
+        return self.json_encoder.response(results), 200
 
     def post(self, json=None):
         payload = self.post_payload(json)
@@ -146,7 +146,7 @@ class Api(BaseApi):
     def post_payload(self, json=None):
         json = json or request.json
 
-        serializer = self._ensure_schema(self.post_serializer_class)
+        serializer = self._loader('post_serializer_class')
 
         payload = serializer.load(json)
 
@@ -155,7 +155,7 @@ class Api(BaseApi):
     def post_response(self, pk):
         primary_key_field = self._primary_key_field()
 
-        return jsonify({primary_key_field: pk}), 201
+        return self.json_encoder.response({primary_key_field: pk}), 201
 
     def perform_create(self, payload):
         with self.db:
@@ -172,7 +172,7 @@ class Api(BaseApi):
 
     def patch(self, pk, json=None):
         if not (payload := self.patch_payload(json)):
-            return jsonify({}), 200
+            return self.json_encoder.response({}), 200
 
         try:
             self.perform_update(pk, payload)
@@ -184,7 +184,7 @@ class Api(BaseApi):
     def patch_payload(self, json=None):
         json = json or request.json
 
-        serializer = self._ensure_schema(self.patch_serializer_class)
+        serializer = self._loader('patch_serializer_class')
 
         return serializer.load(json, partial=True)
 
@@ -216,7 +216,7 @@ class Api(BaseApi):
         return query
 
     def patch_response(self):
-        return jsonify({}), 200
+        return self.json_encoder.response({}), 200
 
     def delete(self, pk):
         self.perform_delete(pk)
@@ -224,7 +224,7 @@ class Api(BaseApi):
         return self.delete_response()
 
     def delete_response(self):
-        return jsonify({}), 200
+        return self.json_encoder.response({}), 200
 
     def perform_delete(self, pk):
         query = self.delete_permissions(self.delete_queryset(pk))
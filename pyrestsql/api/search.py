@@ -0,0 +1,302 @@
+import logging
+
+import marshmallow
+from marshmallow import Schema, fields, validate
+from marshmallow.schema import SchemaMeta
+from pyrestsql.api.database import _DatabaseAccess
+from pyrestsql.api.parsers import QueryArgsParser
+
+logger = logging.getLogger(__name__)
+
+
+class _SearchSet(_DatabaseAccess):
+    """
+    Full-text search of GET_MANY by `?search=`, over `search_fields`, with the full-text index of the database, or
+    LIKE on each word where there is none
+    """
+    search_key = 'search'
+    max_length = 256
+
+    def __init__(self, search_fields, query, search_key=search_key):
+        self.query = query
+        self.search_key = search_key
+        self.search_fields = self.ensure_fields(search_fields)
+
+        self.search_schema = self.make_serializer_class()
+        self.search_parser = QueryArgsParser(self.search_schema)
+
+        self.backend = None
+
+    def __call__(self, query_params, query=None):
+        return self.apply_search(query_params, query)
+
+    def ensure_fields(self, search_fields) -> dict:
+        if not search_fields:
+            return {}
+
+        query_fields = self.make_query_fields()
+
+        invalid_field_names = [
+            field for field in search_fields
+            if field not in query_fields
+        ]
+
+        if invalid_field_names:
+            raise Exception(f'Cannot find these search_fields on the queryset: {", ".join(invalid_field_names)}')
+
+        return {
+            field: query_fields[field]
+            for field in search_fields
+        }
+
+    def make_query_fields(self):
+        if self.query is None:
+            return {}
+
+        return self._make_query_fields()
+
+    def _make_query_fields(self):
+        raise NotImplementedError()
+
+    def make_serializer_class(self):
+        return SchemaMeta(
+            'SearchSchema',
+            (Schema,),
+            {
+                'Meta': type('Meta', (), {'unknown': marshmallow.EXCLUDE}),
+                self.search_key: fields.Str(required=False, validate=[validate.Length(max=self.max_length)]),
+            }
+        )
+
+    @property
+    def backend_classes(self) -> dict:
+        """
+        {dialect name: search backend class}
+        """
+        raise NotImplementedError()
+
+    @property
+    def fallback_backend_class(self):
+        raise NotImplementedError()
+
+    def install(self, backend_class=None, **kwargs):
+        """
+        Pick the backend for the dialect of the database, unless `backend_class` is given, and create its index
+        """
+        if not self.search_fields:
+            return
+
+        self.connect(**kwargs)
+
+        if backend_class is None:
+            backend_class = self.backend_classes.get(self.dialect_name(), self.fallback_backend_class)
+
+        backend = backend_class(self)
+
+        try:
+            installed = backend.install()
+        except Exception:
+            logger.exception(f'Could not create the full-text index of {self.table_name()}')
+            installed = False
+
+        if not installed:
+            logger.warning(f'Searching {self.table_name()} with LIKE, which scans the table')
+            backend = self.fallback_backend_class(self)
+
+        self.backend = backend
+
+    def connect(self, **kwargs):
+        raise NotImplementedError()
+
+    def table_name(self):
+        raise NotImplementedError()
+
+    def column_name(self, column):
+        raise NotImplementedError()
+
+    def primary_key_column(self, query):
+        raise NotImplementedError()
+
+    def order_by(self, query, rank, descending):
+        """
+        Sort the query by `rank` ahead of its existing ORDER BY, or ahead of the primary key if it has none
+        """
+        raise NotImplementedError()
+
+    def apply_search(self, query_params=None, query=None):
+        if query is None:
+            query = self.query
+
+        if not self.search_fields or self.backend is None:
+            return query
+
+        params = self.search_parser.load(query_params)
+
+        if not (terms := params.get(self.search_key, '').strip()):
+            return query
+
+        return self.backend.search(query, terms)
+
+
+class _SearchBackend:
+    """
+    Full-text matching and ranking of the `search_fields` of a `SearchSet` on one database
+    """
+    def __init__(self, searchset):
+        self.searchset = searchset
+
+    @property
+    def columns(self):
+        return list(self.searchset.search_fields.values())
+
+    @property
+    def column_names(self):
+        return [self.searchset.column_name(column) for column in self.columns]
+
+    @property
+    def index_name(self):
+        return f'ix_{self.searchset.table_name()}_search'
+
+    def install(self):
+        """
+        Create the index if it does not exist. Return False if the database cannot, to fall back to LIKE
+        """
+        return True
+
+    def search(self, query, terms):
+        raise NotImplementedError()
+
+
+class _PostgresSearch(_SearchBackend):
+    """
+    websearch_to_tsquery() ranked by ts_rank(), with a GIN index on the same to_tsvector() expression
+    """
+    config = 'english'
+
+    def document_sql(self):
+        quote = self.searchset.quote
+
+        document = " || ' ' || ".join(f"coalesce({quote(name)}, '')" for name in self.column_names)
+
+        return f"to_tsvector('{self.config}', {document})"
+
+    def install(self):
+        self.searchset.execute([
+            f'''
+                CREATE INDEX IF NOT EXISTS {self.searchset.quote(self.index_name)}
+                ON {self.searchset.quote(self.searchset.table_name())}
+                USING GIN ({self.document_sql()})
+            '''
+        ])
+
+        return True
+
+
+class _SqliteSearch(_SearchBackend):
+    """
+    An external content FTS5 table, kept in sync by triggers, ranked by bm25()
+    """
+    @property
+    def fts_table_name(self):
+        return f'{self.searchset.table_name()}_search'
+
+    def install(self):
+        searchset = self.searchset
+        quote = searchset.quote
+
+        primary_key_column = searchset.primary_key_column(searchset.query)
+
+        if not self.is_integer(primary_key_column):
+            logger.warning(f'FTS5 search needs an integer primary key on {searchset.table_name()}')
+            return False
+
+        table = quote(searchset.table_name())
+        fts_table = quote(self.fts_table_name)
+        primary_key = quote(searchset.column_name(primary_key_column))
+        columns = ', '.join(quote(name) for name in self.column_names)
+        new_values = ', '.join(f'new.{quote(name)}' for name in self.column_names)
+        old_values = ', '.join(f'old.{quote(name)}' for name in self.column_names)
+
+        exists = searchset.scalar(
+            f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{self.fts_table_name}'"
+        )
+
+        insert_new = f'INSERT INTO {fts_table} (rowid, {columns}) VALUES (new.{primary_key}, {new_values});'
+        delete_old = (
+            f"INSERT INTO {fts_table} ({fts_table}, rowid, {columns}) "
+            f"VALUES ('delete', old.{primary_key}, {old_values});"
+        )
+
+        statements = [
+            f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table}
+                USING fts5({columns}, content={table}, content_rowid={primary_key})
+            ''',
+            f'''
+                CREATE TRIGGER IF NOT EXISTS {quote(f"{self.fts_table_name}_insert")}
+                AFTER INSERT ON {table} BEGIN {insert_new} END
+            ''',
+            f'''
+                CREATE TRIGGER IF NOT EXISTS {quote(f"{self.fts_table_name}_delete")}
+                AFTER DELETE ON {table} BEGIN {delete_old} END
+            ''',
+            f'''
+                CREATE TRIGGER IF NOT EXISTS {quote(f"{self.fts_table_name}_update")}
+                AFTER UPDATE ON {table} BEGIN {delete_old} {insert_new} END
+            ''',
+        ]
+
+        if not exists:
+            statements.append(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+        searchset.execute(statements)
+
+        return True
+
+    def is_integer(self, column):
+        raise NotImplementedError()
+
+    def match_expression(self, terms):
+        """
+        Quote every word, so that FTS5 query syntax in the search is matched as text instead of raising
+        """
+        return ' '.join(
+            '"' + term.replace('"', '""') + '"'
+            for term in terms.split()
+        )
+
+
+class _MysqlSearch(_SearchBackend):
+    """
+    MATCH ... AGAINST in natural language mode over a FULLTEXT index of the `search_fields`, ranked by relevance
+    """
+    def install(self):
+        searchset = self.searchset
+
+        exists = searchset.scalar(f'''
+            SELECT 1
+            FROM information_schema.statistics
+            WHERE 1=1
+                AND table_schema = database()
+                AND table_name = '{searchset.table_name()}'
+                AND index_name = '{self.index_name}'
+            LIMIT 1
+        ''')
+
+        if not exists:
+            columns = ', '.join(searchset.quote(name) for name in self.column_names)
+
+            searchset.execute([
+                f'''
+                    ALTER TABLE {searchset.quote(searchset.table_name())}
+                    ADD FULLTEXT INDEX {searchset.quote(self.index_name)} ({columns})
+                '''
+            ])
+
+        return True
+
+
+class _LikeSearch(_SearchBackend):
+    """
+    Every word must be in one of the `search_fields`, case-insensitively. Needs no index, and so scans the table
+    """
@@ -0,0 +1,128 @@
+import re
+
+from marshmallow import ValidationError
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+_MSGSPEC_ERROR = re.compile(r'^(?P<message>.*?)(?: - at `\$(?P<path>[^`]*)`)?$', re.DOTALL)
+# The object errors of msgspec, which marshmallow reports on the field instead
+_MSGSPEC_FIELD_ERRORS = (
+    (re.compile(r'^Object missing required field `(?P<field>[^`]+)`$'), 'Missing data for required field.'),
+    (re.compile(r'^Object contains unknown field `(?P<field>[^`]+)`$'), 'Unknown field.'),
+)
+_MSGSPEC_PATH_PART = re.compile(r'\.([^.\[]+)|\[(\d+)\]')
+
+
+def is_struct_type(serializer_class):
+    return msgspec is not None and isinstance(serializer_class, type) and issubclass(serializer_class, msgspec.Struct)
+
+
+def struct_json_schemas(struct_type, ref_template='#/components/schemas/{name}'):
+    """
+    Return (name, {name: JSON Schema}) of a msgspec Struct type, with the Structs it refers to as other components
+    """
+    (ref,), components = msgspec.json.schema_components((struct_type,), ref_template=ref_template)
+
+    return ref['$ref'].rsplit('/', 1)[-1], components
+
+
+class SerializerBackend:
+    """
+    Loads and dumps with what `serializer_class()` returns instead of a marshmallow Schema, see
+    `BaseApi.serializer_backends`
+    """
+    @classmethod
+    def accepts(cls, serializer_class):
+        raise NotImplementedError()
+
+    def load(self, data, partial=False):
+        raise NotImplementedError()
+
+    def dump(self, obj, many=False):
+        raise NotImplementedError()
+
+
+class MsgspecSerializer(SerializerBackend):
+    """
+    Loads and dumps with a msgspec Struct type, with the errors of marshmallow. msgspec stops at the first error,
+    so a 400 reports one field
+    """
+    def __init__(self, struct_type):
+        self.struct_type = struct_type
+        self.fields = {field.encode_name: field for field in msgspec.structs.fields(struct_type)}
+        self.forbid_unknown_fields = struct_type.__struct_config__.forbid_unknown_fields
+
+    @classmethod
+    def accepts(cls, serializer_class):
+        return is_struct_type(serializer_class)
+
+    def load(self, data, partial=False):
+        if partial and isinstance(data, dict):
+            return self.load_partial(data)
+
+        try:
+            obj = msgspec.convert(data, type=self.struct_type)
+        except msgspec.ValidationError as ex:
+            raise ValidationError(self.messages(ex), data=data)
+
+        return {
+            field.name: value
+            for field in self.fields.values()
+            if (value := getattr(obj, field.name)) is not msgspec.UNSET
+        }
+
+    def load_partial(self, data):
+        payload = {}
+        errors = {}
+
+        for key, value in data.items():
+            if (field := self.fields.get(key)) is None:
+                if self.forbid_unknown_fields:
+                    errors[key] = ['Unknown field.']
+                continue
+
+            try:
+                payload[field.name] = msgspec.convert(value, type=field.type)
+            except msgspec.ValidationError as ex:
+                errors.update(self.messages(ex, path=(key,)))
+
+        if errors:
+            raise ValidationError(errors, data=data, valid_data=payload)
+
+        return payload
+
+    def dump(self, obj, many=False):
+        struct_type = list[self.struct_type] if many else self.struct_type
+
+        return msgspec.to_builtins(msgspec.convert(list(obj) if many else obj, type=struct_type, from_attributes=True))
+
+    def messages(self, ex, path=()):
+        """
+        The messages of a msgspec ValidationError, nested by the path of the field as marshmallow nests them, e.g.
+        "Expected `int`, got `str` - at `$.address.zip`" is {'address': {'zip': ['Expected `int`, got `str`']}}
+        """
+        match = _MSGSPEC_ERROR.match(str(ex))
+        message = match['message']
+
+        keys = list(path) + [
+            int(index) if index else name for name, index in _MSGSPEC_PATH_PART.findall(match['path'] or '')
+        ]
+
+        for pattern, field_message in _MSGSPEC_FIELD_ERRORS:
+            if (field_match := pattern.match(message)) is not None:
+                keys.append(field_match['field'])
+                message = field_message
+                break
+
+        messages = [message]
+
+        if not keys:
+            return {'_schema': messages}
+
+        for key in reversed(keys):
+            messages = {key: messages}
+
+        return messages
@@ -1,22 +1,25 @@
-from flask import Blueprint, jsonify, Response, request
+from flask import Blueprint, Response, request
 from collections import defaultdict
 import functools
 
 from pyrestsql.api import ErrorHandler
+from pyrestsql.api.encoders import default_json_encoder
 from marshmallow.schema import SchemaMeta
 
 
 class SimpleApi:
     error_handler_class = ErrorHandler
 
-    def __init__(self, url_prefix, default_schema=None):
+    def __init__(self, url_prefix, default_schema=None, json_encoder=None):
         self.url_prefix = url_prefix
         if default_schema is not None:
             default_schema = self.ensure_schema(default_schema)
         self.default_schema = default_schema
         self.apis = defaultdict(dict)
         self.blueprint = None
+        self.json_encoder = json_encoder or default_json_encoder()
         self.error_handler = self.error_handler_class()
+        self.error_handler.json_encoder = self.json_encoder
         self.integrity_error_manager = None
         self.get_serializer_class = lambda: default_schema
         self.get_many_serializer_class = lambda: default_schema
@@ -82,7 +85,7 @@ class SimpleApi:
         if isinstance(obj, (Response, tuple)):
             return self.default_response(obj, 200)
 
-        return jsonify(obj), 200
+        return self.json_encoder.response(obj), 200
 
     def get_exception(self, ex):
         self.exception(ex)
@@ -121,7 +124,7 @@ class SimpleApi:
             'items': schema.dump(objs, many=True)
         }
 
-        return jsonify(objs), 200
+        return self.json_encoder.response(objs), 200
 
     def get_many_exception(self, ex):
         self.exception(ex)
@@ -161,7 +164,7 @@ class SimpleApi:
         if isinstance(obj, (Response, tuple)):
             return self.default_response(obj, 201, headers)
 
-        return jsonify(obj), 201, headers
+        return self.json_encoder.response(obj), 201, headers
 
     def post_response_headers(self, obj):
         headers = {}
@@ -207,9 +210,9 @@ class SimpleApi:
             return self.default_response(obj, status_code)
 
         if not obj:
-            return jsonify({}), status_code
+            return self.json_encoder.response({}), status_code
 
-        return jsonify(obj), status_code
+        return self.json_encoder.response(obj), status_code
 
     def patch_exception(self, ex):
         self.exception(ex)
@@ -239,7 +242,7 @@ class SimpleApi:
         if isinstance(obj, (Response, tuple)):
             return self.default_response(obj, status_code)
 
-        return jsonify({}), status_code
+        return self.json_encoder.response({}), status_code
 
     def delete_exception(self, ex):
         self.exception(ex)
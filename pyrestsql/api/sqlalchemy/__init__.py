@@ -1,12 +1,19 @@
+import functools
 import re
 
-from flask import jsonify, request
+from flask import request
 from pyrestsql.api import (BaseApi, PostgresqlIntegrityErrorHandler, MysqlIntegrityErrorHandler,
                               SqliteIntegrityErrorHandler, OracleIntegrityErrorHandler, NullIntegrityErrorHandler,
                               _FileApi, ApiMetaClass, IntegrityErrorManager, ErrorHandler, )
 from pyrestsql.exc import AuthorizationError, EntityNotFound
+from pyrestsql.api.parsers import query_args
 from pyrestsql.api.sqlalchemy.filters import FilterSet
+from pyrestsql.api.sqlalchemy.ordering import OrderingSet
+from pyrestsql.api.sqlalchemy.search import SearchSet
 from pyrestsql.api.sqlalchemy.pagination import Pagination
+from pyrestsql.api.sqlalchemy.trigrams import SqlAlchemyTrigramIndex
+from pyrestsql.api.sqlalchemy.geo import SqlAlchemyGeoIndex
+from pyrestsql.api.sqlalchemy.counters import SqlAlchemyRowCounter
 from sqlalchemy import select, insert, update, delete, text, literal, bindparam, Column
 from sqlalchemy.dialects import oracle
 from sqlalchemy.exc import IntegrityError
@@ -32,11 +39,17 @@ def _primary_key_field(model):
 
 
 def insert_where(model, from_=None, where=None, **kwargs):
+    # Typed by the column, so that values such as JSON documents are converted as they are by insert().values()
+    column_types = {
+        getattr(model, orm_field_name).name: getattr(model, orm_field_name).type
+        for orm_field_name in kwargs
+    }
+
     kwargs = _sqlalchemy_insert_values_workaround(model, **kwargs)
 
     if from_ is None:
         sel = select(
-            *[bindparam(key, value) for key, value in kwargs.items()]
+            *[bindparam(key, value, type_=column_types[key]) for key, value in kwargs.items()]
         )
     else:
         sel = select(*kwargs.values())
@@ -307,10 +320,30 @@ class SqlAlchemyApiMetaClass(ApiMetaClass):
 
     def generate_filterset_instance(cls):
         obj = cls()
-        cls.filterset = cls.filterset_class(cls.filterset_fields, obj.get_many_queryset())
+        cls.filterset = cls.filterset_class(
+            cls.filterset_fields, obj.get_many_queryset(), trigram_fields=cls.trigram_fields,
+            geo_fields=cls.geo_fields,
+        )
+
+    def ensure_orderingset_class(cls):
+        if cls.orderingset_class is None:
+            cls.orderingset_class = OrderingSet
+
+    def generate_orderingset_instance(cls):
+        obj = cls()
+        cls.orderingset = cls.orderingset_class(cls.ordering_fields, obj.get_many_queryset())
+
+    def ensure_searchset_class(cls):
+        if cls.searchset_class is None:
+            cls.searchset_class = SearchSet
+
+    def generate_searchset_instance(cls):
+        obj = cls()
+        cls.searchset = cls.searchset_class(cls.search_fields, obj.get_many_queryset())
 
     def wrap_perform_create_for_integrity_errors(cls):
         def post_decorator(func):
+            @functools.wraps(func)
             def _post_decorator(self, payload):
                 try:
                     return func(self, payload)
@@ -323,6 +356,7 @@ class SqlAlchemyApiMetaClass(ApiMetaClass):
 
     def wrap_perform_update_for_integrity_errors(cls):
         def patch_decorator(func):
+            @functools.wraps(func)
             def _patch_decorator(self, pk, payload):
                 try:
                     return func(self, pk, payload)
@@ -377,20 +411,63 @@ class SqlAlchemyApi(BaseApi, metaclass=SqlAlchemyApiMetaClass):
     filterset_fields = None
     filterset = None
 
+    trigram_fields = None
+    trigram_index_class = SqlAlchemyTrigramIndex
+
+    geo_fields = None
+    geo_index_class = SqlAlchemyGeoIndex
+
+    orderingset_class = OrderingSet
+    ordering_fields = None
+    orderingset = None
+
+    searchset_class = SearchSet
+    search_fields = None
+    searchset = None
+
     error_handler_class = ErrorHandler
     integrity_error_manager_class = SqlAlchemyIntegrityErrorManager
 
+    counter_table = None
+    row_counter_class = SqlAlchemyRowCounter
+
     blueprint = None
     Session = None
 
     def __init__(self, api=None):
         super().__init__(api)
 
+    @classmethod
+    def install_row_counter(cls, Session, reseed=False):
+        """
+        Install the triggers which count the rows of the model in the `counter_table`, see RowCounter.install()
+        """
+        return cls.row_counter_class(cls.counter_table, Session=Session, model=cls.model).install(reseed=reseed)
+
     @classmethod
     def register_app(cls, app, Session):
         cls.Session = Session
         integrity_error_manager = cls.integrity_error_manager_class(Session=Session, model=cls.model)
-        super().register_app(app, integrity_error_manager=integrity_error_manager)
+
+        cls.filterset.connect(Session=Session)
+        cls.searchset.install(cls.search_backend_class, Session=Session)
+
+        trigram_index = None
+        if cls.filterset.trigram_fields:
+            trigram_index = cls.trigram_index_class(cls.filterset.trigram_columns, Session=Session, model=cls.model)
+
+        geo_index = None
+        if cls.filterset.geo_fields:
+            geo_index = cls.geo_index_class(*cls.filterset.geo_columns, Session=Session, model=cls.model)
+
+        row_counter = None
+        if cls.counter_table is not None:
+            row_counter = cls.row_counter_class(cls.counter_table, Session=Session, model=cls.model)
+
+        super().register_app(
+            app, integrity_error_manager=integrity_error_manager, row_counter=row_counter, trigram_index=trigram_index,
+            geo_index=geo_index,
+        )
 
     def queryset(self):
         if self.model is not None:
@@ -458,8 +535,8 @@ class SqlAlchemyApi(BaseApi, metaclass=SqlAlchemyApiMetaClass):
         return obj
 
     def get_response(self, obj):
-        serializer = self._ensure_schema(self.get_serializer_class)
-        return jsonify(serializer.dump(obj)), 200
+        serializer = self._schema('get_serializer_class')
+        return self.json_encoder.response(serializer.dump(obj)), 200
 
     def get_many(self):
         objs, meta = self.get_many_objects()
@@ -467,21 +544,33 @@ class SqlAlchemyApi(BaseApi, metaclass=SqlAlchemyApiMetaClass):
         return self.get_many_response(objs, meta)
 
     def get_many_objects(self):
-        query = self.get_many_permissions(self.get_many_queryset())
+        args = query_args()
 
-        query = self.filterset.apply_filters(request.args, query)
+        if self.statement_cache is not None and (cached := self.statement_cache.fetch(self, args)) is not None:
+            objs, meta = cached
+        else:
+            query = self.get_many_permissions(self.get_many_queryset())
 
-        query, meta = self.pagination.paginate(query)
+            query = self.filterset.apply_filters(args, query)
 
-        with self.Session(expire_on_commit=False) as session:
-            objs = session.execute(query).scalars().fetchall()
+            query = self.searchset.apply_search(args, query)
+
+            query = self.orderingset.apply_ordering(args, query)
+
+            if self.index_advisor is not None:
+                self.index_advisor.sample(self, query)
+
+            query, meta = self.pagination.paginate(query)
+
+            with self.Session(expire_on_commit=False) as session:
+                objs = self.pagination.fetch(session, query)
 
         self.pagination.add_count_meta(objs, meta)
 
         return objs, meta
 
     def get_many_response(self, objs, meta=None):
-        serializer = self._ensure_schema(self.get_many_serializer_class)
+        serializer = self._dumper('get_many_serializer_class')
 
         meta = meta or {}
 
@@ -490,7 +579,7 @@ class SqlAlchemyApi(BaseApi, metaclass=SqlAlchemyApiMetaClass):
             **meta
         }
 
-        return jsonify(results), 200
+        return self.json_encoder.response(results), 200
 
     def post(self, json=None):
         payload = self.post_payload(json)
@@ -502,18 +591,18 @@ class SqlAlchemyApi(BaseApi, metaclass=SqlAlchemyApiMetaClass):
     def post_payload(self, json=None):
         json = json or request.json
 
-        serializer = self._ensure_schema(self.post_serializer_class)
+        serializer = self._loader('post_serializer_class')
 
         payload = serializer.load(json)
 
         return payload
 
     def post_response(self, obj):
-        serializer = self._ensure_schema(self.post_serializer_class)
+        serializer = self._schema('post_serializer_class')
 
         obj = serializer.dump(obj)
 
-        return jsonify(obj), 201
+        return self.json_encoder.response(obj), 201
 
     def perform_create(self, payload):
         with self.Session(expire_on_commit=False) as session:
@@ -534,7 +623,7 @@ class SqlAlchemyApi(BaseApi, metaclass=SqlAlchemyApiMetaClass):
 
     def patch(self, pk, json=None):
         if not (payload := self.patch_payload(json)):
-            return jsonify({}), 200
+            return self.json_encoder.response({}), 200
 
         obj = self.perform_update(pk, payload)
 
@@ -543,7 +632,7 @@ class SqlAlchemyApi(BaseApi, metaclass=SqlAlchemyApiMetaClass):
     def patch_payload(self, json=None):
         json = json or request.json
 
-        serializer = self._ensure_schema(self.patch_serializer_class)
+        serializer = self._loader('patch_serializer_class')
 
         return serializer.load(json, partial=True)
 
@@ -574,11 +663,11 @@ class SqlAlchemyApi(BaseApi, metaclass=SqlAlchemyApiMetaClass):
         return query
 
     def patch_response(self, obj):
-        serializer = self._ensure_schema(self.patch_serializer_class)
+        serializer = self._schema('patch_serializer_class')
 
         obj = serializer.dump(obj)
 
-        return jsonify(obj), 200
+        return self.json_encoder.response(obj), 200
 
     def delete(self, pk):
         self.perform_delete(pk)
@@ -586,7 +675,7 @@ class SqlAlchemyApi(BaseApi, metaclass=SqlAlchemyApiMetaClass):
         return self.delete_response()
 
     def delete_response(self):
-        return jsonify({}), 200
+        return self.json_encoder.response({}), 200
 
     def perform_delete(self, pk):
         query = self.delete_permissions(self.delete_queryset(pk))
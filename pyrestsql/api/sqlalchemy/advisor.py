@@ -0,0 +1,79 @@
+import json
+
+from pyrestsql.api.advisor import (_IndexAdvisor, postgres_sequential_scans, mysql_sequential_scans,
+                                      sqlite_sequential_scans, )
+from pyrestsql.api.sqlalchemy.database import dialect_name, quote
+from pyrestsql.api.sqlalchemy.pagination import _explain
+from sqlalchemy import inspect, Column, Table
+from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.sql import visitors
+
+
+class IndexAdvisor(_IndexAdvisor):
+    def table_and_column_name(self, column):
+        if not isinstance(column, Column) or not isinstance(column.table, Table):
+            return None
+
+        return column.table.name, column.name
+
+    def where_columns(self, query):
+        if query is None or query.whereclause is None:
+            return []
+
+        return [
+            element
+            for element in visitors.iterate(query.whereclause, {'column_collections': False})
+            if isinstance(element, Column)
+        ]
+
+    def indexed_columns(self, api, table):
+        inspector = inspect(api.Session.kw['bind'])
+
+        try:
+            indexes = [index['column_names'] for index in inspector.get_indexes(table)]
+            indexes += [constraint['column_names'] for constraint in inspector.get_unique_constraints(table)]
+            indexes.append(inspector.get_pk_constraint(table)['constrained_columns'])
+        except NoSuchTableError:
+            return None
+
+        return {columns[0] for columns in indexes if columns}
+
+    def index_names(self, api, table):
+        inspector = inspect(api.Session.kw['bind'])
+
+        try:
+            indexes = inspector.get_indexes(table) + inspector.get_unique_constraints(table)
+        except NoSuchTableError:
+            return None
+
+        return {index['name'] for index in indexes}
+
+    def dialect_name(self, api):
+        return dialect_name(api.Session)
+
+    def quote(self, api, name):
+        return quote(api.Session, name)
+
+    def sequential_scans(self, api, query):
+        dialect_name = self.dialect_name(api)
+
+        with api.Session() as session:
+            if dialect_name == 'postgresql':
+                plan = _explain(session, 'EXPLAIN (FORMAT JSON)', query).scalar()
+
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+
+                return list(postgres_sequential_scans(plan))
+
+            if dialect_name == 'mysql':
+                rows = _explain(session, 'EXPLAIN', query).mappings().all()
+
+                return list(mysql_sequential_scans(rows))
+
+            if dialect_name == 'sqlite':
+                rows = _explain(session, 'EXPLAIN QUERY PLAN', query).all()
+
+                return list(sqlite_sequential_scans(row[-1] for row in rows))
+
+        return []
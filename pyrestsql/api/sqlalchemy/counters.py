@@ -0,0 +1,25 @@
+from pyrestsql.api.counters import RowCounter
+from pyrestsql.api.sqlalchemy.database import DatabaseAccess
+from pyrestsql.api.sqlalchemy.pagination import _unfiltered_table
+from sqlalchemy import select, table, column
+
+
+class SqlAlchemyRowCounter(DatabaseAccess, RowCounter):
+    def __init__(self, counter_table, Session=None, model=None, **kwargs):
+        self.Session = Session
+        self.model = model
+        super().__init__(counter_table, **kwargs)
+
+    def table_name(self):
+        return self.model.__table__.name
+
+    def count(self, query):
+        if _unfiltered_table(query) is not self.model.__table__:
+            return None
+
+        counter_table = table(self.counter_table, column('table_name'), column('row_count'))
+
+        with self.Session() as session:
+            return session.execute(
+                select(counter_table.c.row_count).where(counter_table.c.table_name == self.table_name())
+            ).scalar()
@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+
+from pyrestsql.api.database import _DatabaseAccess
+from sqlalchemy import inspect
+
+
+def dialect_name(Session):
+    return Session.kw['bind'].dialect.name
+
+
+def quote(Session, name):
+    return Session.kw['bind'].dialect.identifier_preparer.quote(name)
+
+
+class DatabaseAccess(_DatabaseAccess):
+    Session = None
+
+    def dialect_name(self):
+        return dialect_name(self.Session)
+
+    def quote(self, name):
+        return quote(self.Session, name)
+
+    def table_exists(self, name):
+        return inspect(self.Session.kw['bind']).has_table(name)
+
+    @contextmanager
+    def transaction(self):
+        with self.Session() as session:
+            connection = session.connection()
+
+            def execute(sql):
+                result = connection.exec_driver_sql(sql)
+                return result.scalar() if result.returns_rows else None
+
+            yield execute
+
+            session.commit()
+
+    def scalar(self, sql):
+        with self.Session() as session:
+            return session.connection().exec_driver_sql(sql).scalar()
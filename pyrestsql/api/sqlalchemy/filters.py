@@ -1,6 +1,20 @@
+import json
+
 import sqlalchemy
-from pyrestsql.api.filters import _FilterSet
+from pyrestsql.api.filters import _FilterSet, _glob_prefix
+from pyrestsql.api.sqlalchemy.database import dialect_name
 from marshmallow import fields
+from sqlalchemy import select, func, text, literal, literal_column, bindparam, any_, cast
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+_JSON_TABLE_TYPES = {
+    'mysql': 'BIGINT',
+    'oracle': 'NUMBER',
+}
+
+
+def _is_json_integer_list(values):
+    return all(isinstance(value, int) and not isinstance(value, bool) for value in values)
 
 
 class FilterSet(_FilterSet):
@@ -15,15 +29,19 @@ class FilterSet(_FilterSet):
         return query_fields
 
     def make_marshmellow_field_class(self, column):
-        if isinstance(column, sqlalchemy.Integer):
+        column_type = column.type
+
+        if isinstance(column_type, sqlalchemy.Integer):
             marshmallow_field = fields.Int
-        elif isinstance(column, sqlalchemy.Numeric):
+        elif isinstance(column_type, (sqlalchemy.Numeric, sqlalchemy.Float)):
             marshmallow_field = fields.Number
-        elif isinstance(column, sqlalchemy.Date):
-            marshmallow_field = fields.DateTime,  # TODO what about UTC ...
-        elif isinstance(column, sqlalchemy.DateTime):
-            marshmallow_field = fields.Date,  # TODO what about UTC ...
-        elif isinstance(column, sqlalchemy.Time):
+        elif isinstance(column_type, sqlalchemy.Boolean):
+            marshmallow_field = fields.Bool
+        elif isinstance(column_type, sqlalchemy.DateTime):
+            marshmallow_field = fields.DateTime  # TODO what about UTC ...
+        elif isinstance(column_type, sqlalchemy.Date):
+            marshmallow_field = fields.Date
+        elif isinstance(column_type, sqlalchemy.Time):
             marshmallow_field = fields.Time
         else:
             marshmallow_field = fields.Str
@@ -32,9 +50,86 @@ class FilterSet(_FilterSet):
 
     def make_marshmellow_kwargs(self, field):
         marshmallow_kwargs = {}
-        if isinstance(field.column, (sqlalchemy.Date, sqlalchemy.DateTime, sqlalchemy.Time)):
+        if isinstance(field.column.type, (sqlalchemy.Date, sqlalchemy.DateTime, sqlalchemy.Time)):
             marshmallow_kwargs['format'] = field.format
 
         return marshmallow_kwargs
 
+    def connect(self, Session=None, **kwargs):
+        self.dialect_name = dialect_name(Session)
+
+    def in_(self, column, values):
+        if self.dialect_name == 'postgresql':
+            return column == any_(literal(values, ARRAY(column.type)))
+
+        if self.dialect_name == 'sqlite' and all(isinstance(value, (int, str)) for value in values):
+            values = func.json_each(literal(json.dumps(values))).table_valued('value')
+
+            return column.in_(select(values.c.value))
+
+        if self.dialect_name in _JSON_TABLE_TYPES and _is_json_integer_list(values):
+            # As text, since SQLAlchemy renders json_table() as TABLE(json_table()) on Oracle
+            values = text(
+                f"JSON_TABLE(:values, '$[*]' COLUMNS (v {_JSON_TABLE_TYPES[self.dialect_name]} PATH '$')) json_values"
+            ).bindparams(bindparam('values', json.dumps(values), unique=True))
+
+            return column.in_(select(literal_column('v')).select_from(values))
+
+        return super().in_(column, values)
+
+    def isnull(self, column, value):
+        if value:
+            return column.is_(None)
+
+        return column.is_not(None)
+
+    def startswith(self, column, value):
+        if self.dialect_name == 'sqlite':
+            # LIKE is case-insensitive on SQLite, GLOB is not and can also use an index on the column
+            return column.op('GLOB')(literal(_glob_prefix(value)))
+
+        # Escape % and _ in the value, which would otherwise be LIKE wildcards
+        return column.startswith(value, autoescape=True)
+
+    def unindexed_icontains(self, column, value):
+        return column.icontains(value, autoescape=True)
+
+    def slot(self, name, value, column):
+        return bindparam(name, value, type_=column.type)
+
+    def is_json_column(self, column):
+        return isinstance(column.type, sqlalchemy.JSON)
+
+    def is_jsonb_column(self, column):
+        return isinstance(column.type, JSONB)
+
+    def json_path_equals(self, column, value, path):
+        if self.dialect_name == 'postgresql':
+            if not self.is_jsonb_column(column):
+                column = cast(column, JSONB)
+
+            return column.op('@>')(cast(literal(json.dumps(self.json_document(path, value))), JSONB))
+
+        # A literal rather than a bind, so that it matches the expression of an index
+        json_path = literal_column(f"'{self.json_path(path)}'")
+
+        if self.dialect_name == 'oracle':
+            value_at_path = func.JSON_VALUE(column, json_path)
+        elif self.dialect_name == 'mysql' and isinstance(value, str):
+            value_at_path = func.JSON_UNQUOTE(func.JSON_EXTRACT(column, json_path))
+        elif self.dialect_name == 'mysql':
+            value_at_path = func.JSON_EXTRACT(column, json_path)
+        else:
+            value_at_path = func.json_extract(column, json_path)
+
+        if value is None:
+            return value_at_path.is_(None)
+
+        if self.dialect_name == 'oracle' and not isinstance(value, str):
+            # JSON_VALUE returns the scalar as text
+            value = json.dumps(value)
+        elif self.dialect_name == 'mysql' and not isinstance(value, str):
+            # Compared as JSON, so that 1 does not equal "1" and true is not 1
+            return value_at_path == func.JSON_EXTRACT(literal(json.dumps(value)), literal_column("'$'"))
 
+        return value_at_path == literal(value)
@@ -0,0 +1,67 @@
+from pyrestsql.api.geo import GeoIndex
+from pyrestsql.api.sqlalchemy.database import DatabaseAccess
+from sqlalchemy import select, func, table, column as column_, and_, literal_column, Integer
+
+
+class SqlAlchemyGeoIndex(DatabaseAccess, GeoIndex):
+    def __init__(self, latitude, longitude, Session=None, model=None, **kwargs):
+        self.Session = Session
+        self.model = model
+        super().__init__(latitude, longitude, **kwargs)
+
+    def table_name(self):
+        return self.model.__table__.name
+
+    def primary_key_column(self):
+        return self.model.__table__.primary_key.columns[0]
+
+    def primary_key_name(self):
+        return self.primary_key_column().name
+
+    def column_name(self, column):
+        return column.name
+
+    def is_integer_primary_key(self):
+        return isinstance(self.primary_key_column().type, Integer)
+
+    def range_bbox(self, south, west, north, east):
+        return and_(self.latitude.between(south, north), self.longitude.between(west, east))
+
+    def within_distance(self, latitude, longitude, radius):
+        scale, radius_squared = self.equirectangular_scale(latitude, radius)
+
+        latitude_distance = self.latitude - latitude
+        longitude_distance = (self.longitude - longitude) * scale
+
+        return latitude_distance * latitude_distance + longitude_distance * longitude_distance <= radius_squared
+
+    def rtree_bbox(self, south, west, north, east):
+        rtree = table(
+            self.rtree_table_name, column_('id'), column_('min_lat'), column_('max_lat'), column_('min_lon'),
+            column_('max_lon')
+        )
+
+        row_ids = select(rtree.c.id).where(
+            rtree.c.max_lat >= south,
+            rtree.c.min_lat <= north,
+            rtree.c.max_lon >= west,
+            rtree.c.min_lon <= east,
+        )
+
+        return self.primary_key_column().in_(row_ids)
+
+    def make_point(self, longitude, latitude):
+        # The SRID as a literal rather than a bind, so that the point of a row matches the expression of the index
+        return func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), literal_column(str(self.srid)))
+
+    def postgis_bbox(self, south, west, north, east):
+        envelope = func.ST_MakeEnvelope(west, south, east, north, literal_column(str(self.srid)))
+
+        return self.make_point(self.longitude, self.latitude).op('&&')(envelope)
+
+    def postgis_within_distance(self, latitude, longitude, radius):
+        return func.ST_DWithin(
+            func.geography(self.make_point(self.longitude, self.latitude)),
+            func.geography(self.make_point(longitude, latitude)),
+            radius,
+        )
@@ -0,0 +1,70 @@
+from pyrestsql.api.ordering import _OrderingSet
+from sqlalchemy import UniqueConstraint, PrimaryKeyConstraint, Column
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+
+class OrderingSet(_OrderingSet):
+    def _make_query_fields(self):
+        return {
+            column.name: column
+            for column in self.query.selected_columns
+        }
+
+    def is_indexed(self, column):
+        table = column.table
+
+        leading_columns = [
+            index.columns.values()[0].name
+            for index in table.indexes
+            if index.columns
+        ]
+
+        # Primary keys and unique constraints are backed by an index on every supported database
+        leading_columns += [
+            constraint.columns.values()[0].name
+            for constraint in table.constraints
+            if isinstance(constraint, (UniqueConstraint, PrimaryKeyConstraint)) and constraint.columns
+        ]
+
+        return column.name in leading_columns
+
+    def primary_key_column(self, query):
+        model = query.column_descriptions[0]['type']
+
+        return model.__table__.primary_key.columns[0]
+
+    def order_by_columns(self, query):
+        columns = []
+
+        for clause in query._order_by_clauses:
+            descending = False
+
+            if isinstance(clause, UnaryExpression) and clause.modifier in (operators.asc_op, operators.desc_op):
+                descending = clause.modifier is operators.desc_op
+                clause = clause.element
+
+            columns.append((clause, descending))
+
+        return columns
+
+    def is_primary_key(self, query, column):
+        primary_key_column = self.primary_key_column(query)
+
+        return (
+            isinstance(column, Column)
+            and column.table is primary_key_column.table
+            and column.name == primary_key_column.name
+        )
+
+    def order_by(self, query, columns):
+        return query.order_by(None).order_by(*[
+            column.desc() if descending else column
+            for column, descending in columns
+        ])
+
+    def extend_order_by(self, query, columns):
+        return query.order_by(*[
+            column.desc() if descending else column
+            for column, descending in columns
+        ])
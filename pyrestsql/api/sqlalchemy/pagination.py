@@ -1,6 +1,146 @@
+import json
+
 from pyrestsql.api.pagination import (_Pagination, _LimitOffsetPagination, _LimitOffsetPaginationEagerCount,
-                                         _PageNumberPagination, _PageNumberPaginationEagerCount, )
-from sqlalchemy import select, func, text
+                                         _PageNumberPagination, _PageNumberPaginationEagerCount, _CursorPagination,
+                                         _EstimatedCountPagination, _WindowCountPagination, )
+from sqlalchemy import select, func, text, and_, or_, inspect, bindparam, Table, Column
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+from sqlalchemy.dialects.postgresql.base import PGDialect
+from sqlalchemy.dialects.mysql.base import MySQLDialect
+from sqlalchemy.dialects.sqlite.base import SQLiteDialect
+from sqlalchemy.exc import DBAPIError
+
+
+def estimate_count(session, query):
+    """
+    Return the planner's row estimate for the query, or None if the database cannot give one
+    """
+    dialect = session.bind.dialect
+
+    if isinstance(dialect, PGDialect):
+        return _estimate_count_postgres(session, query)
+
+    if isinstance(dialect, MySQLDialect):
+        return _estimate_count_mysql(session, query)
+
+    if isinstance(dialect, SQLiteDialect):
+        return _estimate_count_sqlite(session, query)
+
+    return None
+
+
+def _unfiltered_table(query):
+    """
+    Return the Table if the query reads every row of a single table, otherwise None
+    """
+    if query.whereclause is not None or query._group_by_clauses or query._distinct:
+        return None
+
+    froms = query.get_final_froms()
+
+    if len(froms) != 1 or not isinstance(froms[0], Table):
+        return None
+
+    return froms[0]
+
+
+def _explain(session, prefix, query):
+    compiled = query.compile(dialect=session.bind.dialect)
+
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    return session.connection().exec_driver_sql(f'{prefix} {compiled}', params)
+
+
+def _estimate_count_postgres(session, query):
+    if (table := _unfiltered_table(query)) is not None:
+        reltuples = session.execute(
+            text('SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table_name)'),
+            {'table_name': table.fullname}
+        ).scalar()
+
+        # reltuples is -1 for a table that has never been vacuumed or analyzed
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+
+    plan = _explain(session, 'EXPLAIN (FORMAT JSON)', query).scalar()
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _estimate_count_mysql(session, query):
+    if (table := _unfiltered_table(query)) is not None:
+        table_rows = session.execute(
+            text('''
+                SELECT table_rows
+                FROM information_schema.tables
+                WHERE 1=1
+                    AND table_schema = database()
+                    AND table_name = :table_name
+            '''),
+            {'table_name': table.name}
+        ).scalar()
+
+        if table_rows is not None:
+            return int(table_rows)
+
+    row = _explain(session, 'EXPLAIN', query).mappings().first()
+
+    if row is None or row['rows'] is None:
+        return None
+
+    return int(row['rows'] * (row.get('filtered') or 100) / 100)
+
+
+def _estimate_count_sqlite(session, query):
+    """
+    sqlite_stat1 is only populated by ANALYZE, and sqlite has no estimate for a filtered query
+    """
+    if (table := _unfiltered_table(query)) is None:
+        return None
+
+    try:
+        stat = session.execute(
+            text('SELECT stat FROM sqlite_stat1 WHERE tbl = :table_name ORDER BY idx IS NULL DESC LIMIT 1'),
+            {'table_name': table.name}
+        ).scalar()
+    except DBAPIError:
+        return None
+
+    if not stat:
+        return None
+
+    return int(stat.split()[0])
+
+
+def supports_window_functions(dialect):
+    if isinstance(dialect, SQLiteDialect):
+        return dialect.dbapi.sqlite_version_info >= (3, 25)
+
+    if isinstance(dialect, MySQLDialect):
+        # server_version_info is unknown until the first connection, and MariaDB reports 10.x
+        return dialect.server_version_info is not None and dialect.server_version_info >= (8, 0)
+
+    return True
+
+
+def seek(query, columns, values, descending=False):
+    """
+    Return the query filtered to the rows after `values` in the order of `columns`, as `a > x OR (a = x AND b > y)`
+    rather than a row value comparison, which Oracle doesn't support
+    """
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        after = column < value if descending else column > value
+        clauses.append(and_(*[previous == equal for previous, equal in zip(columns[:i], values[:i])], after))
+
+    return query.where(or_(*clauses))
 
 
 class Pagination(_Pagination):
@@ -11,50 +151,214 @@ class Pagination(_Pagination):
             select(func.count(text('1'))).select_from(count).label('_api_total_count')
         )
 
+    def add_count_window(self, query):
+        return query.add_columns(
+            func.count().over().label('_api_total_count')
+        )
+
+    def is_distinct(self, query):
+        return bool(query._distinct)
+
+    def query_model(self, query):
+        return query.column_descriptions[0]['type']
+
+    def boundary_order(self, query):
+        model = self.query_model(query)
+        primary_key_column = model.__table__.primary_key.columns[0]
+
+        columns = []
+        directions = set()
+
+        for clause in query._order_by_clauses:
+            descending = False
+
+            if isinstance(clause, UnaryExpression) and clause.modifier in (operators.asc_op, operators.desc_op):
+                descending = clause.modifier is operators.desc_op
+                clause = clause.element
+
+            # NULLs can't be compared in a seek, and would sort differently per database anyway
+            if not isinstance(clause, Column) or clause.table is not model.__table__ or clause.nullable:
+                return None
+
+            columns.append(clause)
+            directions.add(descending)
+
+        if len(directions) != 1:
+            return None
+
+        descending = directions.pop()
+
+        if not any(column.name == primary_key_column.name for column in columns):
+            query = query.order_by(primary_key_column.desc() if descending else primary_key_column)
+            columns.append(primary_key_column)
+
+        return query, columns, descending
+
+    def boundary_values(self, obj, columns):
+        mapper = inspect(obj).mapper
+
+        return [getattr(obj, mapper.get_property_by_column(column).key) for column in columns]
+
+    def seek_boundary(self, query, columns, values, descending):
+        return seek(query, columns, values, descending)
+
+    def slot(self, name, value, column=None):
+        return bindparam(name, value, type_=column.type if column is not None else None)
+
+    def query_signature(self, query):
+        compiled = query.compile()
+
+        return str(compiled), repr(sorted(compiled.params.items()))
+
+    def deferred_join_limit_offset(self, query, limit, offset):
+        model = query.column_descriptions[0]['type']
+        primary_key_column = getattr(model, model.__table__.primary_key.columns[0].name)
+
+        # with_only_columns keeps the WHERE, joins and ORDER BY, so this is the same page of primary keys
+        page = query.with_only_columns(primary_key_column)
+
+        if limit:
+            page = page.limit(self.bind('_api_limit', limit))
+
+        page = page.offset(self.bind('_api_offset', offset)).subquery('_api_page')
+
+        return query.join(page, primary_key_column == page.c[primary_key_column.name])
+
+    def fetch(self, session, query, params=None):
+        """
+        Return the ORM objects for the query, with `params` bound by name, and any count column copied onto them
+        """
+        result = session.execute(query, params)
+
+        if '_api_total_count' not in result.keys():
+            return result.scalars().fetchall()
+
+        objs = []
+        for row in result:
+            obj = row[0]
+            obj._api_total_count = row._mapping['_api_total_count']
+            objs.append(obj)
+
+        return objs
+
 
 class LimitOffsetPagination(_LimitOffsetPagination, Pagination):
     pass
 
 
+class LimitOffsetPaginationWindowCount(_WindowCountPagination, LimitOffsetPagination):
+    def __init__(self, *args, Session=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.Session = Session
+
+    def supports_window_functions(self, query):
+        if self.Session is None:
+            return True
+
+        return supports_window_functions(self.Session.kw['bind'].dialect)
+
+
 class LimitOffsetPaginationEagerCount(_LimitOffsetPaginationEagerCount, LimitOffsetPagination):
     def __init__(self, *args, Session=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.Session = Session
 
-    def _count_logic(self, query):
+    def _count(self, query):
         with self.Session() as session:
             count = select(func.count(text('1'))).select_from(query.subquery())
 
-            count = session.execute(count).scalar()
+            return session.execute(count).scalar()
 
-        return query, count
+
+class LimitOffsetPaginationEstimatedCount(_EstimatedCountPagination, LimitOffsetPaginationEagerCount):
+    def estimate_count(self, query):
+        with self.Session() as session:
+            return estimate_count(session, query)
 
 
 class PageNumberPagination(_PageNumberPagination, Pagination):
-    def paginate_logic(self, query, page, page_size):
+    def paginate_logic(self, query, page, page_size, include_count=True):
         count = 0
         if page:
-            query, count = self._count_logic(query)
+            if include_count:
+                query, count = self._count_logic(query)
 
             if page > 0:
                 page -= 1
 
-            query = query.limit(page_size)
-
-            query = query.offset(page * page_size)
+            query = self.page_limit_offset(
+                query, page_size, page_size if include_count else page_size + 1, page * page_size
+            )
 
         return query, count
 
 
+class PageNumberPaginationWindowCount(_WindowCountPagination, PageNumberPagination):
+    def __init__(self, *args, Session=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.Session = Session
+
+    def supports_window_functions(self, query):
+        if self.Session is None:
+            return True
+
+        return supports_window_functions(self.Session.kw['bind'].dialect)
+
+
 class PageNumberPaginationEagerCount(_PageNumberPaginationEagerCount, PageNumberPagination):
     def __init__(self, *args, Session=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.Session = Session
 
-    def _count_logic(self, query):
+    def _count(self, query):
         with self.Session() as session:
             count = select(func.count(text('1'))).select_from(query.subquery())
 
-            count = session.execute(count).scalar()
+            return session.execute(count).scalar()
 
-        return query, count
+
+class PageNumberPaginationEstimatedCount(_EstimatedCountPagination, PageNumberPaginationEagerCount):
+    def estimate_count(self, query):
+        with self.Session() as session:
+            return estimate_count(session, query)
+
+
+class CursorPagination(_CursorPagination, Pagination):
+    def cursor_columns(self, query):
+        model = query.column_descriptions[0]['type']
+        primary_key_column = getattr(model, model.__table__.primary_key.columns[0].name)
+
+        if self.ordering_name is None:
+            return [primary_key_column]
+
+        column = getattr(model, self.ordering_name)
+
+        if column is primary_key_column:
+            return [primary_key_column]
+
+        return [column, primary_key_column]
+
+    def is_nullable(self, model, name):
+        if (column := inspect(model).columns.get(name)) is None:
+            return None
+
+        return column.nullable
+
+    def seek(self, query, columns, values):
+        return seek(query, columns, values, self.descending)
+
+    def order_by(self, query, columns):
+        if self.descending:
+            columns = [column.desc() for column in columns]
+
+        # order_by() adds to the ORDER BY of the queryset, which the seek would not follow
+        return query.order_by(None).order_by(*columns)
+
+    def cursor_values(self, obj):
+        mapper = inspect(obj).mapper
+        primary_key_name = mapper.get_property_by_column(mapper.primary_key[0]).key
+
+        if self.ordering_name is None or self.ordering_name == primary_key_name:
+            return [getattr(obj, primary_key_name)]
+
+        return [getattr(obj, self.ordering_name), getattr(obj, primary_key_name)]
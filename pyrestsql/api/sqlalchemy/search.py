@@ -0,0 +1,92 @@
+from functools import reduce
+
+from pyrestsql.api.search import _SearchSet, _PostgresSearch, _SqliteSearch, _MysqlSearch, _LikeSearch
+from pyrestsql.api.sqlalchemy.database import DatabaseAccess
+from sqlalchemy import func, literal_column, table, column, and_, or_, Integer
+from sqlalchemy.dialects.mysql import match
+
+
+class PostgresSearch(_PostgresSearch):
+    def document(self):
+        """
+        The same expression as `document_sql()`, with literals rather than binds so that it matches the index
+        """
+        document = reduce(
+            lambda left, right: left + literal_column("' '") + right,
+            [func.coalesce(column, literal_column("''")) for column in self.columns]
+        )
+
+        return func.to_tsvector(literal_column(f"'{self.config}'"), document)
+
+    def search(self, query, terms):
+        document = self.document()
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{self.config}'"), terms)
+
+        query = query.where(document.op('@@')(tsquery))
+
+        return self.searchset.order_by(query, func.ts_rank(document, tsquery), True)
+
+
+class SqliteSearch(_SqliteSearch):
+    def is_integer(self, column):
+        return isinstance(column.type, Integer)
+
+    def search(self, query, terms):
+        fts_table = table(self.fts_table_name, column('rowid'), column('rank'), column(self.fts_table_name))
+
+        query = query.join(
+            fts_table, fts_table.c.rowid == self.searchset.primary_key_column(query)
+        ).where(
+            fts_table.c[self.fts_table_name].op('MATCH')(self.match_expression(terms))
+        )
+
+        return self.searchset.order_by(query, fts_table.c.rank, False)
+
+
+class MysqlSearch(_MysqlSearch):
+    def search(self, query, terms):
+        relevance = match(*self.columns, against=terms).in_natural_language_mode()
+
+        return self.searchset.order_by(query.where(relevance), relevance, True)
+
+
+class LikeSearch(_LikeSearch):
+    def search(self, query, terms):
+        return query.where(and_(*[
+            or_(*[column.icontains(term, autoescape=True) for column in self.columns])
+            for term in terms.split()
+        ]))
+
+
+class SearchSet(DatabaseAccess, _SearchSet):
+    backend_classes = {
+        'postgresql': PostgresSearch,
+        'sqlite': SqliteSearch,
+        'mysql': MysqlSearch,
+    }
+    fallback_backend_class = LikeSearch
+
+    def _make_query_fields(self):
+        return {
+            column.name: column
+            for column in self.query.selected_columns
+        }
+
+    def connect(self, Session=None, **kwargs):
+        self.Session = Session
+
+    def table_name(self):
+        return self.query.column_descriptions[0]['type'].__table__.name
+
+    def column_name(self, column):
+        return column.name
+
+    def primary_key_column(self, query):
+        model = query.column_descriptions[0]['type']
+
+        return model.__table__.primary_key.columns[0]
+
+    def order_by(self, query, rank, descending):
+        order_by = list(query._order_by_clauses) or [self.primary_key_column(query)]
+
+        return query.order_by(None).order_by(rank.desc() if descending else rank, *order_by)
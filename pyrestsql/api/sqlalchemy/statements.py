@@ -0,0 +1,12 @@
+from pyrestsql.api.statements import _StatementCache, Statement
+
+
+class StatementCache(_StatementCache):
+    def compile(self, api, query):
+        # Executing the same statement object reuses its cache key, and so its compiled form, instead of generating
+        # both for every request
+        return Statement(query)
+
+    def execute(self, api, statement, params):
+        with api.Session(expire_on_commit=False) as session:
+            return api.pagination.fetch(session, statement.query, params)
@@ -0,0 +1,76 @@
+from pyrestsql.api.trigrams import TrigramIndex
+from pyrestsql.api.sqlalchemy.database import DatabaseAccess
+from sqlalchemy import select, func, table, column as column_, and_, or_
+
+
+def _like_escape(value, escape='/'):
+    for character in (escape, '%', '_'):
+        value = value.replace(character, escape + character)
+
+    return value
+
+
+class SqlAlchemyTrigramIndex(DatabaseAccess, TrigramIndex):
+    def __init__(self, columns, Session=None, model=None, **kwargs):
+        self.Session = Session
+        self.model = model
+        super().__init__(columns, **kwargs)
+
+    def table_name(self):
+        return self.model.__table__.name
+
+    def primary_key_name(self):
+        return self.model.__table__.primary_key.columns[0].name
+
+    def column_name(self, column):
+        return column.name
+
+    def side_table(self, column):
+        return table(self.side_table_name(column), column_('trigram'), column_('row_id'))
+
+    def postgres_icontains(self, column, value):
+        # ILIKE on the column itself, as lower(column) LIKE would not match the gin_trgm_ops index
+        return column.ilike(f'%{_like_escape(value)}%', escape='/')
+
+    def postgres_similar(self, column, value):
+        # % uses the index, but with the pg_trgm.similarity_threshold of the database, which a lower
+        # similarity_threshold needs lowered too
+        return and_(column.op('%')(value), func.similarity(column, value) >= self.similarity_threshold)
+
+    def unindexed_icontains(self, column, value):
+        return column.icontains(value, autoescape=True)
+
+    def side_table_icontains(self, column, value, trigrams):
+        side_table = self.side_table(column)
+
+        row_ids = select(side_table.c.row_id).where(
+            side_table.c.trigram.in_(trigrams)
+        ).group_by(
+            side_table.c.row_id
+        ).having(
+            func.count() == len(trigrams)
+        )
+
+        # No trigrams are indexed past max_length, so longer values are only matched by the LIKE. length() counts
+        # bytes on MySQL, which only rechecks more of them
+        return and_(
+            or_(self.model.__table__.primary_key.columns[0].in_(row_ids), func.length(column) > self.max_length),
+            self.unindexed_icontains(column, value)
+        )
+
+    def side_table_similar(self, column, trigrams):
+        side_table = self.side_table(column)
+        row_trigrams = self.side_table(column).alias('row_trigrams')
+
+        shared = func.count()
+        row_count = select(func.count()).where(row_trigrams.c.row_id == side_table.c.row_id).scalar_subquery()
+
+        row_ids = select(side_table.c.row_id).where(
+            side_table.c.trigram.in_(trigrams)
+        ).group_by(
+            side_table.c.row_id
+        ).having(
+            shared >= (row_count + len(trigrams) - shared) * self.similarity_threshold
+        )
+
+        return self.model.__table__.primary_key.columns[0].in_(row_ids)
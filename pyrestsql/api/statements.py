@@ -0,0 +1,128 @@
+import threading
+from typing import NamedTuple
+
+from flask import g
+from werkzeug.datastructures import MultiDict
+
+
+class Statement(NamedTuple):
+    query: object
+    sql: str = None
+    params: tuple = None
+    slots: dict = None
+
+
+class _StatementCache:
+    """
+    Reuses the GET_MANY statement of requests of the same shape, binding their filter and pagination values. Only
+    requests which `Api.statement_cache_key()` returns a key for use it
+    """
+    max_size = 256
+
+    def __init__(self, max_size=max_size):
+        self.max_size = max_size
+
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, api, args):
+        """
+        Return (objs, meta) of the GET_MANY of `api`, or None if the request can't use a cached statement
+        """
+        if (shape := self.request_shape(api, args)) is None:
+            return None
+
+        key, query_params, params, meta = shape
+
+        with self._lock:
+            # Moved to the end, which is the most recently used
+            if (statement := self._statements.pop(key, None)) is not None:
+                self._statements[key] = statement
+
+        if statement is None:
+            statement = self.build(api, args, query_params)
+            self._set(key, statement)
+
+        if statement is False:
+            return None
+
+        return self.execute(api, statement, params), meta
+
+    def request_shape(self, api, args):
+        """
+        Return (key, parsed filters, {slot name: value}, pagination meta) of the request, or None if it can't use a
+        cached statement
+        """
+        if not api.pagination.is_statement_cacheable():
+            return None
+
+        if (api_key := api.statement_cache_key()) is None:
+            return None
+
+        filterset = api.filterset
+
+        if filterset.filter_tree_key in args:
+            return None
+
+        if api.searchset.search_fields and api.searchset.search_key in args:
+            return None
+
+        query_params = filterset.parse_query_params(args)
+
+        if (filters := filterset.statement_filters(query_params)) is None:
+            return None
+
+        shape, params = filters
+
+        # The mode of the pagination is in the key, and its limit, offset and cursor values are bound like the filters
+        pagination_shape, pagination_params, meta = api.pagination.statement_params()
+
+        ordering_key = api.orderingset.ordering_key
+        ordering = args.getlist(ordering_key) if isinstance(args, MultiDict) else args.get(ordering_key)
+
+        key = (type(api), api_key, shape, pagination_shape, repr(ordering))
+
+        return key, query_params, {**params, **pagination_params}, meta
+
+    def build(self, api, args, query_params):
+        query = api.get_many_permissions(api.get_many_queryset())
+
+        query = api.filterset.apply_statement_filters(query_params, query)
+
+        query = api.orderingset.apply_ordering(args, query)
+
+        g._api_statement_slots = True
+        try:
+            query, _ = api.pagination.paginate(query)
+        finally:
+            g.pop('_api_statement_slots')
+
+        return self.compile(api, query)
+
+    def compile(self, api, query):
+        """
+        Return the Statement to execute for later requests, or False if the query can't be reused
+        """
+        raise NotImplementedError()
+
+    def execute(self, api, statement, params):
+        """
+        Return the objects of `statement`, with the values in `params` bound to its slots
+        """
+        raise NotImplementedError()
+
+    def _set(self, key, statement):
+        with self._lock:
+            self._statements.pop(key, None)
+
+            if len(self._statements) >= self.max_size:
+                del self._statements[next(iter(self._statements))]
+
+            self._statements[key] = statement
+
+    def clear(self):
+        with self._lock:
+            self._statements = {}
+
+    def __len__(self):
+        return len(self._statements)
@@ -0,0 +1,276 @@
+import logging
+import string
+
+from pyrestsql.api.database import _DatabaseAccess
+
+logger = logging.getLogger(__name__)
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+class TrigramIndex(_DatabaseAccess):
+    """
+    Index for the `icontains` and `similar` lookups on `trigram_fields`: a gin_trgm_ops index on Postgres, and a
+    side table of trigrams kept in sync by triggers on SQLite and MySQL
+    """
+    positions_table = 'api_trigram_positions'
+    max_length = 1024
+    similarity_threshold = 0.3
+
+    def __init__(self, columns, max_length=max_length, similarity_threshold=similarity_threshold, **kwargs):
+        self.columns = columns
+        self.max_length = max_length
+        self.similarity_threshold = similarity_threshold
+        self.installed_dialect_name = None
+
+    def install(self):
+        """
+        Create the indexes, side tables and triggers if they do not exist. This is idempotent
+        """
+        dialect_name = self.dialect_name()
+
+        if dialect_name not in ('postgresql', 'mysql', 'sqlite'):
+            logger.warning(
+                f'Trigram indexes are not supported on {dialect_name}, icontains on {self.table_name()} scans the '
+                f'table and similar matches like icontains'
+            )
+            return False
+
+        self.execute(self.install_sql(dialect_name))
+
+        self.installed_dialect_name = dialect_name
+
+        return True
+
+    def table_name(self):
+        raise NotImplementedError()
+
+    def primary_key_name(self):
+        raise NotImplementedError()
+
+    def column_name(self, column):
+        raise NotImplementedError()
+
+    def side_table_name(self, column):
+        return f'{self.table_name()}_{self.column_name(column)}_trigrams'
+
+    def lower(self, value):
+        """
+        lower() of SQLite only folds ASCII, and the trigrams of the search value must fold the same way
+        """
+        if self.installed_dialect_name == 'sqlite':
+            return value.translate(_ASCII_LOWER)
+
+        return value.lower()
+
+    def substring_trigrams(self, value):
+        value = self.lower(value)
+
+        return sorted({value[i:i + 3] for i in range(len(value) - 2)})
+
+    def padded_trigrams(self, value):
+        value = f'  {self.lower(value)} '
+
+        return sorted({value[i:i + 3] for i in range(len(value) - 2)})
+
+    def icontains(self, column, value):
+        if self.installed_dialect_name == 'postgresql':
+            return self.postgres_icontains(column, value)
+
+        if self.installed_dialect_name is None or not (trigrams := self.substring_trigrams(value)):
+            return self.unindexed_icontains(column, value)
+
+        return self.side_table_icontains(column, value, trigrams)
+
+    def similar(self, column, value):
+        if self.installed_dialect_name == 'postgresql':
+            return self.postgres_similar(column, value)
+
+        if self.installed_dialect_name is None:
+            return self.unindexed_icontains(column, value)
+
+        return self.side_table_similar(column, self.padded_trigrams(value))
+
+    def postgres_icontains(self, column, value):
+        raise NotImplementedError()
+
+    def postgres_similar(self, column, value):
+        raise NotImplementedError()
+
+    def unindexed_icontains(self, column, value):
+        raise NotImplementedError()
+
+    def side_table_icontains(self, column, value, trigrams):
+        raise NotImplementedError()
+
+    def side_table_similar(self, column, trigrams):
+        raise NotImplementedError()
+
+    def install_sql(self, dialect_name):
+        return {
+            'postgresql': self._postgres_install_sql,
+            'mysql': self._mysql_install_sql,
+            'sqlite': self._sqlite_install_sql,
+        }[dialect_name]()
+
+    def _postgres_install_sql(self):
+        """
+        CREATE EXTENSION needs the CREATE privilege on the database, unless pg_trgm is already installed
+        """
+        table = self.quote(self.table_name())
+
+        return ['CREATE EXTENSION IF NOT EXISTS pg_trgm'] + [
+            f'''
+                CREATE INDEX IF NOT EXISTS {self.quote(f"ix_{self.table_name()}_{self.column_name(column)}_trgm")}
+                ON {table} USING GIN ({self.quote(self.column_name(column))} gin_trgm_ops)
+            '''
+            for column in self.columns
+        ]
+
+    def positions_sql(self, insert_ignore):
+        """
+        The numbers 1 to max_length + 1, to join against for the character positions of a value, as SQLite does not
+        allow a recursive CTE in a trigger
+        """
+        positions = ', '.join(f'({i})' for i in range(1, self.max_length + 2))
+
+        return [
+            f'CREATE TABLE IF NOT EXISTS {self.quote(self.positions_table)} (i INTEGER PRIMARY KEY)',
+            f'{insert_ignore} INTO {self.quote(self.positions_table)} (i) VALUES {positions}',
+        ]
+
+    def trigrams_select_sql(self, column, row, padded_value, length):
+        """
+        SELECT the distinct trigrams of the `column` of `row`, which is `new` in a trigger or the quoted table
+        """
+        from_ = f'{self.quote(self.positions_table)} p'
+
+        if row != 'new':
+            from_ = f'{row}, {from_}'
+
+        return f'''
+            SELECT DISTINCT lower(substr({padded_value}, p.i, 3)), {row}.{self.quote(self.primary_key_name())}
+            FROM {from_}
+            WHERE p.i <= {length}({row}.{self.quote(self.column_name(column))}) + 1
+        '''
+
+    def _sqlite_install_sql(self):
+        table = self.quote(self.table_name())
+        primary_key = self.quote(self.primary_key_name())
+
+        statements = self.positions_sql('INSERT OR IGNORE')
+
+        for column in self.columns:
+            side_table = self.quote(self.side_table_name(column))
+            column_name = self.quote(self.column_name(column))
+
+            def insert_sql(row):
+                padded_value = f"'  ' || {row}.{column_name} || ' '"
+
+                return f'''
+                    INSERT OR IGNORE INTO {side_table} (trigram, row_id)
+                    {self.trigrams_select_sql(column, row, padded_value, 'length')}
+                '''
+
+            exists = self.scalar(
+                f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{self.side_table_name(column)}'"
+            )
+
+            statements += [
+                f'''
+                    CREATE TABLE IF NOT EXISTS {side_table} (
+                        trigram VARCHAR(3) NOT NULL,
+                        row_id INTEGER NOT NULL,
+                        PRIMARY KEY (trigram, row_id)
+                    ) WITHOUT ROWID
+                ''',
+                f'CREATE INDEX IF NOT EXISTS {self.quote(f"ix_{self.side_table_name(column)}_row_id")} '
+                f'ON {side_table} (row_id)',
+                f'''
+                    CREATE TRIGGER IF NOT EXISTS {self.quote(f"{self.side_table_name(column)}_insert")}
+                    AFTER INSERT ON {table} BEGIN
+                        {insert_sql('new')};
+                    END
+                ''',
+                f'''
+                    CREATE TRIGGER IF NOT EXISTS {self.quote(f"{self.side_table_name(column)}_update")}
+                    AFTER UPDATE OF {column_name}, {primary_key} ON {table} BEGIN
+                        DELETE FROM {side_table} WHERE row_id = old.{primary_key};
+                        {insert_sql('new')};
+                    END
+                ''',
+                f'''
+                    CREATE TRIGGER IF NOT EXISTS {self.quote(f"{self.side_table_name(column)}_delete")}
+                    AFTER DELETE ON {table} BEGIN
+                        DELETE FROM {side_table} WHERE row_id = old.{primary_key};
+                    END
+                ''',
+            ]
+
+            if not exists:
+                statements.append(insert_sql(table))
+
+        return statements
+
+    def _mysql_install_sql(self):
+        """
+        The trigram column is binary collated, as a case or accent insensitive collation would merge trigrams.
+        CREATE TRIGGER IF NOT EXISTS needs 8.0.29, so the triggers are dropped and recreated
+        """
+        table = self.quote(self.table_name())
+        primary_key = self.quote(self.primary_key_name())
+
+        statements = self.positions_sql('INSERT IGNORE')
+
+        for column in self.columns:
+            side_table = self.quote(self.side_table_name(column))
+            column_name = self.quote(self.column_name(column))
+
+            def insert_sql(row):
+                padded_value = f"concat('  ', {row}.{column_name}, ' ')"
+
+                return f'''
+                    INSERT IGNORE INTO {side_table} (trigram, row_id)
+                    {self.trigrams_select_sql(column, row, padded_value, 'char_length')}
+                '''
+
+            exists = self.scalar(f'''
+                SELECT 1
+                FROM information_schema.tables
+                WHERE 1=1
+                    AND table_schema = database()
+                    AND table_name = '{self.side_table_name(column)}'
+            ''')
+
+            statements += [
+                f'''
+                    CREATE TABLE IF NOT EXISTS {side_table} (
+                        trigram VARCHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+                        row_id BIGINT NOT NULL,
+                        PRIMARY KEY (trigram, row_id),
+                        INDEX ({self.quote("row_id")})
+                    )
+                ''',
+            ]
+
+            for suffix, event, body in (
+                    ('insert', 'INSERT', insert_sql('new')),
+                    ('update', 'UPDATE', f'''
+                        BEGIN
+                            DELETE FROM {side_table} WHERE row_id = old.{primary_key};
+                            {insert_sql('new')};
+                        END
+                    '''),
+                    ('delete', 'DELETE', f'DELETE FROM {side_table} WHERE row_id = old.{primary_key}'),
+            ):
+                trigger = self.quote(f'{self.side_table_name(column)}_{suffix}')
+
+                statements += [
+                    f'DROP TRIGGER IF EXISTS {trigger}',
+                    f'CREATE TRIGGER {trigger} AFTER {event} ON {table} FOR EACH ROW {body}',
+                ]
+
+            if not exists:
+                statements.append(insert_sql(table))
+
+        return statements
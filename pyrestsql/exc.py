@@ -32,4 +32,10 @@ class AuthorizationError(UserError):
 
 
 class MethodNotAllowed(UserError):
-    code = 405
\ No newline at end of file
+    code = 405
+
+
+class ConfigurationError(Exception):
+    """
+    An Api, or what it is configured with, can't work as defined. Raised when the Api class is created
+    """
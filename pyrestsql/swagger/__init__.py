@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, jsonify
 from .swagger_model import SwaggerModel
+from pyrestsql.api.serializers import MsgspecSerializer, is_struct_type, struct_json_schemas
 try:
     import apispec
     import apispec.ext.marshmallow
@@ -222,6 +223,27 @@ class Swagger:
             }
         )
 
+    def add_schema(self, spec, name, schema):
+        """
+        Add a marshmallow Schema, or the JSON Schema of a msgspec Struct type, as the component `name`. The Structs it
+        refers to are added under their own names
+        """
+        if isinstance(schema, MsgspecSerializer):
+            schema = schema.struct_type
+
+        if not is_struct_type(schema):
+            spec.components.schema(name, schema=schema)
+            return
+
+        struct_name, components = struct_json_schemas(schema)
+
+        for component_name, component in components.items():
+            if component_name not in spec.components.schemas:
+                spec.components.schema(component_name, component)
+
+        if name not in spec.components.schemas:
+            spec.components.schema(name, components[struct_name])
+
     def default_schema_name(self, api_class):
 
         return api_class.name
@@ -229,7 +251,7 @@ class Swagger:
     def add_default_schema(self, api_class, spec):
         from apispec.ext.marshmallow.common import make_schema_key
 
-        spec.components.schema(self.default_schema_name(api_class), schema=api_class.default_schema)
+        self.add_schema(spec, self.default_schema_name(api_class), api_class.default_schema)
 
     def _uses_default_schema(self, api_class, serializer_class):
         return serializer_class is api_class.default_schema
@@ -244,7 +266,7 @@ class Swagger:
         if self._uses_default_schema(api_class, api_class.get_serializer_class):
             return
 
-        spec.components.schema(self.get_schema_name(api_class), schema=api_class.get_serializer_class)
+        self.add_schema(spec, self.get_schema_name(api_class), api_class.get_serializer_class)
 
     def get_many_schema_name(self, api_class):
         if self._uses_default_schema(api_class, api_class.get_many_serializer_class):
@@ -256,7 +278,7 @@ class Swagger:
         if self._uses_default_schema(api_class, api_class.get_many_serializer_class):
             return
 
-        spec.components.schema(self.get_many_schema_name(api_class), schema=api_class.get_many_serializer_class)
+        self.add_schema(spec, self.get_many_schema_name(api_class), api_class.get_many_serializer_class)
 
     def patch_schema_name(self, api_class):
         if self._uses_default_schema(api_class, api_class.patch_serializer_class):
@@ -268,7 +290,7 @@ class Swagger:
         if self._uses_default_schema(api_class, api_class.patch_serializer_class):
             return
 
-        spec.components.schema(self.patch_schema_name(api_class), schema=api_class.patch_serializer_class)
+        self.add_schema(spec, self.patch_schema_name(api_class), api_class.patch_serializer_class)
 
     def patch_output_schema_name(self, api_class):
         if self._uses_default_schema(api_class, api_class.patch_output_serializer_class):
@@ -280,7 +302,7 @@ class Swagger:
         if self._uses_default_schema(api_class, api_class.patch_output_serializer_class):
             return
 
-        spec.components.schema(self.patch_output_schema_name(api_class), schema=api_class.patch_output_serializer_class)
+        self.add_schema(spec, self.patch_output_schema_name(api_class), api_class.patch_output_serializer_class)
 
     def post_schema_name(self, api_class):
         if self._uses_default_schema(api_class, api_class.post_serializer_class):
@@ -294,7 +316,7 @@ class Swagger:
         if self._uses_default_schema(api_class, api_class.post_serializer_class):
             return
 
-        spec.components.schema(self.post_schema_name(api_class), schema=api_class.post_serializer_class)
+        self.add_schema(spec, self.post_schema_name(api_class), api_class.post_serializer_class)
 
     def post_output_schema_name(self, api_class):
         if self._uses_default_schema(api_class, api_class.post_output_serializer_class):
@@ -306,7 +328,7 @@ class Swagger:
         if self._uses_default_schema(api_class, api_class.post_output_serializer_class):
             return
 
-        spec.components.schema(self.post_output_schema_name(api_class), schema=api_class.post_output_serializer_class)
+        self.add_schema(spec, self.post_output_schema_name(api_class), api_class.post_output_serializer_class)
 
     def generate_get_spec(self, api_class, spec):
         self.add_get_schema(api_class, spec)
@@ -1,7 +1,34 @@
+import datetime
+import decimal
+import json
+import time
 import unittest
+import uuid
+from typing import Annotated, Union
+
+from flask import Flask
+from marshmallow import ValidationError
+from pyrestsql.api.encoders import JsonEncoder, OrjsonEncoder, orjson
+from pyrestsql.api.pagination import CountCache
+from pyrestsql.exc import ConfigurationError
+from pyrestsql.swagger import Swagger, SwaggerModel
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if msgspec is not None:
+    class UserStruct(msgspec.Struct, forbid_unknown_fields=True):
+        email: Annotated[str, msgspec.Meta(max_length=30)]
+        id: Union[int, msgspec.UnsetType] = msgspec.UNSET
+else:
+    UserStruct = None
 
 
 class TestBase(unittest.TestCase):
+    is_simple = False
+
     @classmethod
     def setUpClass(cls):
         if cls.__name__ in {
@@ -19,6 +46,10 @@ class TestBase(unittest.TestCase):
     def init(self):
         raise NotImplementedError
 
+    def skip_if_simple(self):
+        if self.is_simple:
+            self.skipTest('Not supported by SimpleApi')
+
     def test_basic(self):
         self.init()
 
@@ -41,6 +72,797 @@ class TestBase(unittest.TestCase):
         self.delete_user(user_id)
         self.delete_user(0, expected_status_code=403)
 
+    def test_cursor_pagination(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(5)]
+
+        pages = []
+        cursor = None
+        while True:
+            query_params = {'cursor': cursor} if cursor else {}
+            r = self.testclient.get('/api/cursor-users/', query_string=query_params)
+            assert r.status_code == 200, r.json
+
+            pages.append([user['id'] for user in r.json['items']])
+            if not (cursor := r.json['next']):
+                break
+
+        assert pages == [user_ids[0:2], user_ids[2:4], user_ids[4:]], pages
+
+        r = self.testclient.get('/api/cursor-users/', query_string={'cursor': 'tampered'})
+        assert r.status_code == 400, r.json
+
+        # The cursor follows only its own ordering
+        r = self.testclient.get('/api/cursor-users/', query_string={'ordering': '-id'})
+        assert r.status_code == 400, r.json
+        assert list(r.json['error']) == ['ordering'], r.json
+
+    def test_cursor_pagination_ordering(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = {email: self.post_user(email=f'{email}@example.com') for email in 'cebad'}
+
+        pages = []
+        cursor = None
+        while True:
+            query_params = {'cursor': cursor} if cursor else {}
+            r = self.testclient.get('/api/email-cursor-users/', query_string=query_params)
+            assert r.status_code == 200, r.json
+
+            pages.append([user['id'] for user in r.json['items']])
+            if not (cursor := r.json['next']):
+                break
+
+        expected = [user_ids[email] for email in 'edcba']
+        assert pages == [expected[0:2], expected[2:4], expected[4:]], pages
+
+        # A nullable ordering column is rejected when the Api is created, rather than stopping at the first page that
+        # ends on a NULL
+        cursor_api = self.app.view_functions['CursorUserApi.get_many'].__self__
+        project_api = self.app.view_functions['ProjectApi.get_many'].__self__
+
+        for ordering, message in (('latitude', 'nullable'), ('-missing', 'not a column')):
+            pagination = type(cursor_api.pagination)(ordering=ordering, secret_key='test')
+
+            with self.assertRaises(ConfigurationError) as cm:
+                type('CursorProjectApi', (type(project_api),), {'pagination': pagination})
+            assert message in str(cm.exception), cm.exception
+
+    def test_window_count_pagination(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(5)]
+
+        r = self.testclient.get('/api/window-count-users/', query_string={'page': 2, 'page_size': 2})
+        assert r.status_code == 200, r.json
+        assert [user['id'] for user in r.json['items']] == user_ids[2:4], r.json
+        assert r.json['count'] == 5, r.json
+
+    def test_has_more_pagination(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(5)]
+
+        r = self.testclient.get('/api/window-count-users/', query_string={'page': 2, 'page_size': 2, 'count': 'false'})
+        assert r.status_code == 200, r.json
+        assert [user['id'] for user in r.json['items']] == user_ids[2:4], r.json
+        assert 'count' not in r.json, r.json
+        assert r.json['has_more'] is True and r.json['next'] == 3, r.json
+
+        r = self.testclient.get('/api/window-count-users/', query_string={'page': 3, 'page_size': 2, 'count': 'false'})
+        assert [user['id'] for user in r.json['items']] == user_ids[4:], r.json
+        assert r.json['has_more'] is False and r.json['next'] is None, r.json
+
+    def test_estimated_count_pagination(self):
+        self.skip_if_simple()
+        self.init()
+
+        for i in range(5):
+            self.post_user(email=f'user{i}@example.com')
+
+        urls = (('/api/estimated-users/', {}), ('/api/estimated-page-users/', {'page': 1}))
+
+        # Without table statistics there is no estimate, so the count is exact
+        for url, query_string in urls:
+            r = self.testclient.get(url, query_string=query_string)
+            assert r.status_code == 200, r.json
+            assert r.json['count'] == 5 and r.json['count_estimated'] is False, r.json
+
+        self.analyze('test_users')
+
+        api = self.app.view_functions['EstimatedUserApi.get_many'].__self__
+        if api.pagination.estimate_count(api.get_many_queryset()) is None:
+            self.skipTest('The database gives no count estimate')
+
+        # The statistics still hold 5 rows, which is at least the estimate_threshold
+        self.post_user(email='user5@example.com')
+
+        for url, query_string in urls:
+            r = self.testclient.get(url, query_string=query_string)
+            assert r.status_code == 200, r.json
+            assert r.json['count'] == 5 and r.json['count_estimated'] is True, r.json
+            assert len(r.json['items']) == 2, r.json
+
+            # A filtered query is estimated below the threshold, or not at all, and falls back to an exact count
+            r = self.testclient.get(url, query_string={**query_string, 'email': 'user5@example.com'})
+            assert r.status_code == 200, r.json
+            assert r.json['count'] == 1 and r.json['count_estimated'] is False, r.json
+
+    def test_concurrent_count(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(5)]
+
+        for url, query_string in (
+                ('/api/concurrent-count-users/', {'offset': 2}),
+                ('/api/concurrent-count-page-users/', {'page': 2}),
+        ):
+            r = self.testclient.get(url, query_string=query_string)
+            assert r.status_code == 200, r.json
+            assert r.json['count'] == 5, r.json
+            assert sorted(user['id'] for user in r.json['items']) == user_ids[2:4], r.json
+
+            r = self.testclient.get(url, query_string={**query_string, 'id__gt': user_ids[1]})
+            assert r.status_code == 200, r.json
+            assert r.json['count'] == 3, r.json
+            assert sorted(user['id'] for user in r.json['items']) == user_ids[4:], r.json
+
+    def test_count_cache(self):
+        self.skip_if_simple()
+        self.init()
+
+        for i in range(3):
+            self.post_user(email=f'user{i}@example.com')
+
+        r = self.testclient.get('/api/cached-count-users/')
+        assert r.status_code == 200, r.json
+        assert r.json['count'] == 3, r.json
+
+        # Cached, as the write went through another Api
+        self.post_user(email='user3@example.com')
+        r = self.testclient.get('/api/cached-count-users/')
+        assert r.json['count'] == 3, r.json
+
+        # A write through the Api, or an Api which inherits from it, drops the cached count, once
+        api = self.app.view_functions['CachedCountUserApi.get_many'].__self__
+        invalidations = []
+        invalidate = api.pagination.invalidate
+        api.pagination.invalidate = lambda model: (invalidations.append(model), invalidate(model))
+        try:
+            for i, url in enumerate(('/api/cached-count-users/', '/api/cached-count-child-users/')):
+                r = self.testclient.post(url, json={'email': f'cached{i}@example.com'})
+                assert r.status_code == 201, r.json
+
+                r = self.testclient.get('/api/cached-count-users/')
+                assert r.json['count'] == 5 + i, r.json
+        finally:
+            del api.pagination.invalidate
+
+        assert len(invalidations) == 2, invalidations
+
+        counts = iter([1, 2])
+        count_cache = CountCache(ttl=0.2, stale_ttl=0.5)
+        assert count_cache.compute('User', 'key', lambda: next(counts)) == 1
+        assert count_cache.get('User', 'key', lambda: next(counts)) == 1
+
+        # A stale count is returned while it is recounted in the background
+        time.sleep(0.3)
+        assert count_cache.get('User', 'key', lambda: next(counts)) == 1
+        count_cache._executor.submit(lambda: None).result()
+        assert count_cache.get('User', 'key', lambda: next(counts)) == 2
+
+        # An expired count is dropped
+        time.sleep(0.8)
+        assert count_cache.get('User', 'key', lambda: next(counts)) is None
+
+    def test_deferred_join_pagination(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = {email: self.post_user(email=f'{email}@example.com') for email in 'cebad'}
+
+        for name, url, page_query_string, offset in (
+                ('DeferredUserApi', '/api/deferred-users/', {'offset': 1}, 1),
+                ('DeferredPageUserApi', '/api/deferred-page-users/', {'page': 2}, 2),
+        ):
+            api = self.app.view_functions[f'{name}.get_many'].__self__
+
+            for query_string in (
+                    {'ordering': 'id'},
+                    {'ordering': '-email'},
+                    {'ordering': 'email', 'id__gt': user_ids['c']},
+            ):
+                query_string = {**query_string, **page_query_string}
+
+                r = self.testclient.get(url, query_string=query_string)
+                assert r.status_code == 200, r.json
+
+                # The same page as without the deferred join
+                api.pagination.deferred_join = False
+                try:
+                    expected = self.testclient.get(url, query_string=query_string)
+                finally:
+                    api.pagination.deferred_join = True
+
+                assert r.json == expected.json, (r.json, expected.json)
+
+            r = self.testclient.get(url, query_string={'ordering': '-email', **page_query_string})
+            expected_ids = [user_ids[email] for email in 'edcba'][offset:offset + 2]
+            assert [user['id'] for user in r.json['items']] == expected_ids, r.json
+            assert r.json['count'] == 5, r.json
+
+    def test_row_counter(self):
+        self.skip_if_simple()
+        self.init()
+
+        for i in range(3):
+            self.post_user(email=f'user{i}@example.com')
+
+        r = self.testclient.get('/api/counter-users/')
+        assert r.status_code == 200, r.json
+        assert r.json['count'] == 3, r.json
+
+        r = self.testclient.get('/api/counter-users/', query_string={'email': 'user1@example.com'})
+        assert r.json['count'] == 1, r.json
+
+        # Installing again keeps the count, unless asked to recount
+        row_counter = self.app.view_functions['CounterUserApi.get_many'].__self__.row_counter
+        row_counter.execute([row_counter.update_count_sql(10)])
+
+        for reseed, expected in ((False, 13), (True, 3)):
+            assert row_counter.install(reseed=reseed)
+            r = self.testclient.get('/api/counter-users/')
+            assert r.json['count'] == expected, r.json
+
+    def test_page_boundaries(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(5)]
+
+        # The first pass records the page boundaries, the second seeks from them
+        for _ in range(2):
+            for page, expected in ((1, user_ids[:2]), (2, user_ids[2:4]), (3, user_ids[4:])):
+                r = self.testclient.get('/api/boundary-users/', query_string={'page': page})
+                assert r.status_code == 200, r.json
+                assert [user['id'] for user in r.json['items']] == expected, r.json
+                assert r.json['count'] == 5, r.json
+
+    def test_invalid_query_args(self):
+        self.skip_if_simple()
+        self.init()
+
+        r = self.testclient.get('/api/window-count-users/', query_string={'page': 0, 'page_size': 'a'})
+        assert r.status_code == 400, r.json
+        assert r.json['error'] == {
+            'page': ['Must be greater than or equal to 1.'],
+            'page_size': ['Not a valid integer.'],
+        }, r.json
+
+        r = self.testclient.get('/api/counter-users/', query_string={'email': 'user0@example.com', 'limit': -1})
+        assert r.status_code == 400, r.json
+        assert r.json['error'] == {'limit': ['Must be greater than or equal to 0.']}, r.json
+
+    def test_filter_lookups(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(5)]
+
+        def filtered_ids(**query_string):
+            r = self.testclient.get('/api/counter-users/', query_string=query_string)
+            assert r.status_code == 200, r.json
+            return sorted(user['id'] for user in r.json['items'])
+
+        assert filtered_ids(id__gt=user_ids[2]) == user_ids[3:]
+        assert filtered_ids(id__lte=user_ids[1]) == user_ids[:2]
+        assert filtered_ids(id__in=f'{user_ids[0]},{user_ids[4]}') == [user_ids[0], user_ids[4]]
+        assert filtered_ids(id__range=f'{user_ids[1]},{user_ids[3]}') == user_ids[1:4]
+        assert filtered_ids(email__startswith='user3') == [user_ids[3]]
+        assert filtered_ids(email__startswith='user_') == []
+
+        # Case-sensitive on every database, like the btree index which serves it
+        other_user_id = self.post_user(email='User_5@example.com')
+        assert filtered_ids(email__startswith='User') == [other_user_id]
+        assert filtered_ids(email__startswith='User_') == [other_user_id]
+        assert filtered_ids(email__startswith='USER') == []
+        assert filtered_ids(email__isnull='false') == [*user_ids, other_user_id]
+
+        r = self.testclient.get('/api/counter-users/', query_string={'id__range': '1'})
+        assert r.status_code == 400, r.json
+        assert r.json['error'] == {'id__range': ['Length must be 2.']}, r.json
+
+    def test_ordering(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(3)]
+
+        r = self.testclient.get('/api/counter-users/', query_string={'ordering': '-email'})
+        assert r.status_code == 200, r.json
+        assert [user['id'] for user in r.json['items']] == user_ids[::-1], r.json
+
+        r = self.testclient.get('/api/counter-users/', query_string={'ordering': 'email', 'limit': 2, 'offset': 1})
+        assert [user['id'] for user in r.json['items']] == user_ids[1:], r.json
+
+        r = self.testclient.get('/api/counter-users/', query_string={'ordering': 'street'})
+        assert r.status_code == 400, r.json
+        assert list(r.json['error']) == ['ordering'], r.json
+
+        # The ORDER BY of the queryset gets the primary key as a tiebreak in its last direction, but only once
+        orderingset = self.app.view_functions['CounterUserApi.get_many'].__self__.orderingset
+        query = orderingset.order_by(orderingset.query, [(orderingset.ordering_fields['email'], True)])
+        for _ in range(2):
+            query = orderingset.apply_ordering({}, query)
+            assert [
+                (orderingset.is_primary_key(query, column), descending)
+                for column, descending in orderingset.order_by_columns(query)
+            ] == [(False, True), (True, True)]
+
+    def test_trigram_lookups(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [
+            self.post_user(email=email)
+            for email in ('John.Smith@example.com', 'jon.smyth@example.com', 'alice@example.org')
+        ]
+
+        r = self.testclient.get('/api/counter-users/', query_string={'email__icontains': 'SMITH'})
+        assert r.status_code == 200, r.json
+        assert [user['id'] for user in r.json['items']] == user_ids[:1], r.json
+
+        r = self.testclient.get('/api/counter-users/', query_string={'email__icontains': 'jo'})
+        assert [user['id'] for user in r.json['items']] == user_ids[:2], r.json
+
+        r = self.testclient.get('/api/counter-users/', query_string={'email__similar': 'john.smith@example.com'})
+        assert [user['id'] for user in r.json['items']] == user_ids[:2], r.json
+
+        trigram_index = self.app.view_functions['CounterUserApi.get_many'].__self__.filterset.trigram_index
+
+        # SQLite does not enforce the length of a VARCHAR, so a value can be longer than the trigrams indexed of it
+        if trigram_index.installed_dialect_name == 'sqlite':
+            long_user_id = self.post_user(email=f'{"x" * trigram_index.max_length}@needle.example.com')
+
+            r = self.testclient.get('/api/counter-users/', query_string={'email__icontains': 'NEEDLE'})
+            assert [user['id'] for user in r.json['items']] == [long_user_id], r.json
+
+    def test_in_lookup_search_body(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(3)]
+
+        r = self.testclient.get('/api/counter-users/', query_string={'id__in': f'{user_ids[0]},{user_ids[2]}'})
+        assert r.status_code == 200, r.json
+        assert [user['id'] for user in r.json['items']] == [user_ids[0], user_ids[2]], r.json
+
+        r = self.testclient.post('/api/counter-users/_search', json={'id__in': [*user_ids[1:], *range(10000, 12000)]})
+        assert r.status_code == 200, r.json
+        assert [user['id'] for user in r.json['items']] == user_ids[1:], r.json
+        assert r.json['count'] == 2, r.json
+
+        r = self.testclient.post('/api/counter-users/_search', json={'id__in': ['a']})
+        assert r.status_code == 400, r.json
+
+    def test_filter_tree(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(4)]
+
+        r = self.testclient.post('/api/counter-users/_search', json={
+            'filter': {
+                'or': [
+                    {'email': 'user0@example.com'},
+                    {'id__gte': user_ids[2], 'not': {'email': 'user3@example.com'}},
+                ]
+            }
+        })
+        assert r.status_code == 200, r.json
+        assert [user['id'] for user in r.json['items']] == [user_ids[0], user_ids[2]], r.json
+
+        r = self.testclient.post('/api/counter-users/_search', json={'filter': {'or': [{'street': 'x'}]}})
+        assert r.status_code == 400, r.json
+        assert r.json['error'] == {'filter': {'or': {'0': {'street': ['Unknown field.']}}}}, r.json
+
+    def test_search(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_id = self.post_user(email='user@example.com')
+
+        project_ids = []
+        for name in ('quick brown fox', 'lazy dog', 'the fox and the fox'):
+            r = self.testclient.post(
+                '/api/projects', json={'name': name, 'user_id': user_id}, follow_redirects=True
+            )
+            assert r.status_code == 201, r.json
+            project_ids.append(r.json['id'])
+
+        r = self.testclient.get('/api/projects', query_string={'search': 'fox'}, follow_redirects=True)
+        assert r.status_code == 200, r.json
+        assert sorted(project['id'] for project in r.json['items']) == [project_ids[0], project_ids[2]], r.json
+
+        r = self.testclient.get('/api/projects', query_string={'search': 'quick fox'}, follow_redirects=True)
+        assert [project['id'] for project in r.json['items']] == [project_ids[0]], r.json
+
+        r = self.testclient.get('/api/projects', query_string={'search': '"('}, follow_redirects=True)
+        assert r.status_code == 200, r.json
+        assert r.json['items'] == [], r.json
+
+    def test_json_path_filters(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_id = self.post_user(email='user@example.com')
+
+        project_ids = []
+        for attrs in (
+                {'color': 'red', 'size': {'width': 10}},
+                {'color': 'blue', 'size': {'width': 20}},
+                {'color': '10', 'size': {'width': '10'}},
+                None,
+        ):
+            r = self.testclient.post(
+                '/api/projects', json={'name': 'project', 'user_id': user_id, 'attrs': attrs}, follow_redirects=True
+            )
+            assert r.status_code == 201, r.json
+            project_ids.append(r.json['id'])
+
+        def get_ids(**query_string):
+            r = self.testclient.get('/api/projects', query_string=query_string, follow_redirects=True)
+            assert r.status_code == 200, r.json
+            return sorted(project['id'] for project in r.json['items'])
+
+        assert get_ids(attrs__color='red') == [project_ids[0]]
+        assert get_ids(attrs__size__width='10') == [project_ids[0]]
+        assert get_ids(attrs__size__width='"10"') == [project_ids[2]]
+        assert get_ids(attrs__color='"10"') == [project_ids[2]]
+        assert get_ids(attrs__color='red', attrs__size__width='20') == []
+
+        r = self.testclient.get('/api/projects', query_string={'attrs__color': '[1]'}, follow_redirects=True)
+        assert r.status_code == 400, r.json
+        assert r.json['error'] == {'attrs__color': ['Not a string, number, boolean or null.']}, r.json
+
+        r = self.testclient.get('/api/projects', query_string={'attrs__shape': 'round'}, follow_redirects=True)
+        assert len(r.json['items']) == 4, r.json
+
+    def test_geo_filters(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_id = self.post_user(email='user@example.com')
+
+        project_ids = []
+        for name, latitude, longitude in (
+                ('berlin', 52.52, 13.405),
+                ('potsdam', 52.39, 13.06),
+                ('paris', 48.8566, 2.3522),
+                ('nowhere', None, None),
+        ):
+            r = self.testclient.post(
+                '/api/projects',
+                json={'name': name, 'user_id': user_id, 'latitude': latitude, 'longitude': longitude},
+                follow_redirects=True
+            )
+            assert r.status_code == 201, r.json
+            project_ids.append(r.json['id'])
+
+        def get_ids(**query_string):
+            r = self.testclient.get('/api/projects', query_string=query_string, follow_redirects=True)
+            assert r.status_code == 200, r.json
+            return sorted(project['id'] for project in r.json['items'])
+
+        assert get_ids(bbox='52,13,53,14') == project_ids[:2]
+        assert get_ids(bbox='40,-10,60,30') == project_ids[:3]
+        assert get_ids(near='52.52,13.405,10000') == [project_ids[0]]
+        assert get_ids(near='52.52,13.405,50000') == project_ids[:2]
+        assert get_ids(near='52.52,13.405,50000', name='potsdam') == [project_ids[1]]
+
+        r = self.testclient.get('/api/projects', query_string={'bbox': '53,13,52,14'}, follow_redirects=True)
+        assert r.status_code == 400, r.json
+        assert r.json['error'] == {
+            'bbox': ['Expected south,west,north,east in degrees, with south <= north and west <= east.']
+        }, r.json
+
+        r = self.testclient.get('/api/projects', query_string={'near': '52.52,13.405'}, follow_redirects=True)
+        assert r.status_code == 400, r.json
+
+    def test_statement_cache(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(2)]
+
+        project_ids = []
+        for user_id, name in ((user_ids[0], 'a'), (user_ids[0], 'b'), (user_ids[1], 'a')):
+            r = self.testclient.post(
+                '/api/projects', json={'name': name, 'user_id': user_id}, follow_redirects=True
+            )
+            assert r.status_code == 201, r.json
+            project_ids.append(r.json['id'])
+
+        def get_ids(**query_string):
+            r = self.testclient.get('/api/projects', query_string=query_string, follow_redirects=True)
+            assert r.status_code == 200, r.json
+            return sorted(project['id'] for project in r.json['items'])
+
+        # The same shape with other values, which are bound to the cached statement
+        assert get_ids(name='a') == [project_ids[0], project_ids[2]]
+        assert get_ids(name='b') == [project_ids[1]]
+        assert get_ids(name='c') == []
+
+        assert get_ids(name='a', user_id=user_ids[1]) == [project_ids[2]]
+        assert get_ids(name='a', user_id=user_ids[0]) == [project_ids[0]]
+
+        assert get_ids(user_id__range=f'{user_ids[0]},{user_ids[0]}') == project_ids[:2]
+        assert get_ids(user_id__range=f'{user_ids[1]},{user_ids[1]}') == [project_ids[2]]
+
+        # Shapes which are built for every request
+        assert get_ids(name='a', search='a') == [project_ids[0], project_ids[2]]
+        assert get_ids(filter=json.dumps({'name': 'b'})) == [project_ids[1]]
+
+        r = self.testclient.get('/api/projects', query_string={'user_id': 'x'}, follow_redirects=True)
+        assert r.status_code == 400, r.json
+
+    def test_statement_cache_pagination(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(5)]
+
+        api = self.app.view_functions['CachedPageUserApi.get_many'].__self__
+
+        pages = []
+        for page in (1, 2, 3, 2):
+            r = self.testclient.get('/api/cached-page-users/', query_string={'page': page, 'ordering': '-email'})
+            assert r.status_code == 200, r.json
+            assert (r.json['page'], r.json['count']) == (page, 5), r.json
+            pages.append([user['id'] for user in r.json['items']])
+
+        expected = user_ids[::-1]
+        assert pages == [expected[0:2], expected[2:4], expected[4:], expected[2:4]], pages
+        # Page 1 has no OFFSET, and the later pages reuse one statement
+        assert len(api.statement_cache) == 2
+        assert all(api.statement_cache._statements.values())
+
+        api = self.app.view_functions['CachedCursorUserApi.get_many'].__self__
+
+        pages = []
+        cursor = None
+        while True:
+            query_params = {'cursor': cursor} if cursor else {}
+            r = self.testclient.get('/api/cached-cursor-users/', query_string=query_params)
+            assert r.status_code == 200, r.json
+
+            pages.append([user['id'] for user in r.json['items']])
+            if not (cursor := r.json['next']):
+                break
+
+        assert pages == [expected[0:2], expected[2:4], expected[4:]], pages
+        assert len(api.statement_cache) == 2
+        assert all(api.statement_cache._statements.values())
+
+    def test_statement_cache_permissions(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_ids = [self.post_user(email=f'user{i}@example.com') for i in range(2)]
+
+        project_ids = {}
+        for user_id in user_ids:
+            r = self.testclient.post('/api/projects', json={'name': 'a', 'user_id': user_id}, follow_redirects=True)
+            assert r.status_code == 201, r.json
+            project_ids[user_id] = r.json['id']
+
+        for name, url, statement_count in (
+                # Not cached, as the permissions depend on the user
+                ('UserProjectApi', '/api/user-projects/', 0),
+                # A statement per user
+                ('KeyedUserProjectApi', '/api/keyed-user-projects/', 2),
+        ):
+            for user_id in user_ids + user_ids:
+                r = self.testclient.get(url, query_string={'name': 'a'}, headers={'X-User-Id': str(user_id)})
+                assert r.status_code == 200, r.json
+                assert [project['id'] for project in r.json['items']] == [project_ids[user_id]], r.json
+
+            api = self.app.view_functions[f'{name}.get_many'].__self__
+            assert len(api.statement_cache._statements) == statement_count
+
+    def test_schema_cache(self):
+        self.skip_if_simple()
+        self.init()
+
+        api = self.app.view_functions['UserApi.get'].__self__
+
+        for name in (
+                'get_serializer_class', 'get_many_serializer_class', 'post_serializer_class',
+                'patch_serializer_class',
+        ):
+            assert api._schema(name) is api._schema(name), name
+
+        user_id = self.post_user(email='user0@example.com')
+        assert self.get_user(user_id)['email'] == 'user0@example.com'
+
+        # Without the cache, e.g. with cache_schemas = False, the schema is built for each request
+        api.schemas = {}
+        assert api._schema('get_serializer_class') is not api._schema('get_serializer_class')
+        assert self.get_user(user_id)['email'] == 'user0@example.com'
+
+    def test_compiled_dumper(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_id = self.post_user(email='user@example.com')
+
+        for project in (
+                {'name': 'a', 'user_id': user_id, 'attrs': {'color': 'red'}, 'latitude': 52.52, 'longitude': 13.4},
+                {'name': 'b', 'user_id': user_id},
+        ):
+            r = self.testclient.post('/api/projects', json=project, follow_redirects=True)
+            assert r.status_code == 201, r.json
+
+        api = self.app.view_functions['ProjectApi.get_many'].__self__
+        dumper = api._dumper('get_many_serializer_class')
+        schema = api._schema('get_many_serializer_class')
+        assert dumper.compiled
+
+        with self.app.test_request_context():
+            objs, meta = api.get_many_objects()
+
+        assert dumper.dump(objs, many=True) == schema.dump(objs, many=True)
+        assert [dumper.dump(obj) for obj in objs] == [schema.dump(obj) for obj in objs]
+
+        r = self.testclient.get('/api/projects', follow_redirects=True)
+        assert r.json['items'] == schema.dump(objs, many=True), r.json
+
+    def test_compiled_loader(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_id = self.post_user(email='user@example.com')
+
+        api = self.app.view_functions['ProjectApi.post'].__self__
+        loader = api._loader('post_serializer_class')
+        schema = api._schema('post_serializer_class')
+        assert loader.compiled
+
+        for payload in (
+                {'name': 'a', 'user_id': user_id},
+                {'name': 'a', 'user_id': user_id, 'attrs': None, 'latitude': 1, 'longitude': None},
+                {'name': 1, 'user_id': '1', 'latitude': 'a'},
+                {'name': None, 'user_id': True, 'id': 1, 'other': 1},
+                {},
+        ):
+            for partial in (False, True):
+                try:
+                    expected = schema.load(payload, partial=partial)
+                except ValidationError as ex:
+                    with self.assertRaises(ValidationError) as cm:
+                        loader.load(payload, partial=partial)
+                    assert cm.exception.messages == ex.messages, cm.exception.messages
+                else:
+                    assert loader.load(payload, partial=partial) == expected
+
+        r = self.testclient.post('/api/projects', json={'name': 1, 'other': 1}, follow_redirects=True)
+        assert r.status_code == 400, r.json
+        assert r.json['error'] == {
+            'name': ['Not a valid string.'],
+            'user_id': ['Missing data for required field.'],
+            'other': ['Unknown field.'],
+        }, r.json
+
+    def test_json_encoder(self):
+        self.skip_if_simple()
+        self.init()
+
+        user_id = self.post_user(email='user@example.com')
+
+        api = self.app.view_functions['ProjectApi.get_many'].__self__
+
+        r = self.testclient.get('/api/projects', follow_redirects=True)
+        assert r.status_code == 200, r.json
+        assert r.content_type == 'application/json', r.content_type
+        assert r.data == api.json_encoder.dumps(r.json), r.data
+
+        # Errors go through the same encoder, also with an error handler which takes no json_encoder
+        assert api.error_handler.json_encoder is api.json_encoder
+        r = self.testclient.post('/api/projects', json={'name': 'a'}, follow_redirects=True)
+        assert r.status_code == 400, r.json
+        assert r.data == api.json_encoder.dumps({'error': {'user_id': ['Missing data for required field.']}}), r.data
+
+        value = {
+            'datetime': datetime.datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2024, 1, 2),
+            'decimal': decimal.Decimal('1.10'),
+            'uuid': uuid.UUID(int=user_id),
+            'text': 'é',
+        }
+        expected = (
+            '{"datetime":"2024-01-02T03:04:05.000006+00:00","date":"2024-01-02","decimal":"1.10",'
+            f'"uuid":"{uuid.UUID(int=user_id)}","text":"é"}}'
+        ).encode('utf-8')
+        assert JsonEncoder().dumps(value) == expected
+        if orjson is not None:
+            assert OrjsonEncoder().dumps(value) == expected
+            assert OrjsonEncoder().dumps({'big': 2 ** 70}) == b'{"big":1180591620717411303424}'
+
+    def test_msgspec_serializer(self):
+        self.skip_if_simple()
+        if msgspec is None:
+            self.skipTest('msgspec is not installed')
+        self.init()
+
+        r = self.testclient.post('/api/struct-users/', json={'email': 'user@example.com'})
+        assert r.status_code == 201, r.json
+        user = r.json
+        assert user == {'id': user['id'], 'email': 'user@example.com'}, user
+
+        r = self.testclient.get(f'/api/struct-users/{user["id"]}')
+        assert r.json == user, r.json
+
+        r = self.testclient.get('/api/struct-users/')
+        assert r.json['items'] == [user], r.json
+
+        # Errors have the shape of marshmallow's
+        for payload, error in (
+                ({'email': 1}, {'email': ['Expected `str`, got `int`']}),
+                ({}, {'email': ['Missing data for required field.']}),
+                ({'email': 'user1@example.com', 'name': 'a'}, {'name': ['Unknown field.']}),
+        ):
+            r = self.testclient.post('/api/struct-users/', json=payload)
+            assert r.status_code == 400, r.json
+            assert r.json['error'] == error, r.json
+
+        r = self.testclient.patch(f'/api/struct-users/{user["id"]}', json={'email': 'a' * 31})
+        assert r.status_code == 400, r.json
+        assert r.json['error'] == {'email': ['Expected `str` of length <= 30']}, r.json
+
+    def test_msgspec_swagger(self):
+        self.skip_if_simple()
+        if msgspec is None:
+            self.skipTest('msgspec is not installed')
+        self.init()
+
+        api = self.app.view_functions['StructUserApi.get_many'].__self__
+        serializer = api.schemas['get_serializer_class']
+
+        swagger = Swagger(Flask(__name__))
+        swagger.add_api(SwaggerModel(
+            name='StructUser', url_prefix='/api/struct-users/', get_documentation=None, get_many_documentation=None,
+            post_documentation=None, patch_documentation=None, delete_documentation=None, default_schema=serializer,
+            get_serializer_class=serializer, get_many_serializer_class=serializer, patch_serializer_class=serializer,
+            patch_output_serializer_class=serializer, post_serializer_class=serializer,
+            post_output_serializer_class=serializer, filterset_fields=[], apis=['GET', 'GET_MANY', 'POST', 'PATCH'],
+        ))
+
+        spec = swagger.generate_openapi_spec()
+
+        schema = spec['components']['schemas']['StructUser']
+        assert schema['type'] == 'object', schema
+        assert schema['properties'] == {
+            'email': {'type': 'string', 'maxLength': 30},
+            'id': {'type': 'integer'},
+        }, schema
+        assert schema['required'] == ['email'], schema
+
+    def test_index_advisor(self):
+        self.skip_if_simple()
+
+        with self.assertLogs('pyrestsql.api.advisor', 'WARNING') as logs:
+            self.init()
+
+        assert any('test_projects.name for filter without an index' in line for line in logs.output), logs.output
+        assert any('test_projects.attrs for json filter without an index' in line for line in logs.output), logs.output
+        assert not any('test_projects.attrs for filter' in line for line in logs.output), logs.output
+
     def get_user(self, pk, expected_status_code=200):
         r = self.testclient.get(
             f'/api/users/{pk}/'
@@ -1,14 +1,28 @@
-from tests.core import TestBase
+from tests.core import TestBase, UserStruct
 
-from peewee import Model, CharField, ForeignKeyField, DateTimeField
-from flask import Flask
+from peewee import Model, CharField, ForeignKeyField, DateTimeField, FloatField, MySQLDatabase
+from flask import Flask, request
 from pyrestsql.api.peewee import Api as PeeweeApi, insert_where as insert_where_peewee
+from pyrestsql.api.peewee.pagination import (
+    CursorPagination as PeeweeCursorPagination,
+    LimitOffsetPaginationEagerCount as PeeweeLimitOffsetPaginationEagerCount,
+    PageNumberPaginationWindowCount as PeeweePageNumberPaginationWindowCount,
+    LimitOffsetPagination as PeeweeLimitOffsetPagination,
+    PageNumberPagination as PeeweePageNumberPagination,
+    PageNumberPaginationEagerCount as PeeweePageNumberPaginationEagerCount,
+    LimitOffsetPaginationEstimatedCount as PeeweeLimitOffsetPaginationEstimatedCount,
+    PageNumberPaginationEstimatedCount as PeeweePageNumberPaginationEstimatedCount,
+)
+from pyrestsql.api import ErrorHandler
+from pyrestsql.api.pagination import CountCache, PageBoundaryIndex
+from pyrestsql.api.peewee.advisor import IndexAdvisor as PeeweeIndexAdvisor
+from pyrestsql.api.peewee.statements import StatementCache as PeeweeStatementCache
 from pyrestsql.api.peewee.simple import SimpleModelApi as PeeweeSimpleModelApi
 import marshmallow
 from datetime import datetime
 
 
-def setup_peewee_database(db):
+def setup_peewee_database(db, json_field_class):
     class BaseModel(Model):
         class Meta:
             database = db
@@ -31,12 +45,16 @@ def setup_peewee_database(db):
     class Project(BaseModel):
         name = CharField(max_length=30, null=False)
         user = ForeignKeyField(User, null=False, on_delete='CASCADE')
+        attrs = json_field_class(null=True)
+        latitude = FloatField(null=True)
+        longitude = FloatField(null=True)
 
         class Meta:
             table_name = 'test_projects'
 
     with db:
         db.drop_tables([User, UserAddress, Project])
+        db.execute_sql('DROP TABLE IF EXISTS test_row_counts')
         db.create_tables([User, UserAddress, Project])
 
     models = {
@@ -82,12 +100,55 @@ def setup_peewee_app(db, models):
 
             return Serializer
 
+    class CustomErrorHandler(ErrorHandler):
+        def __init__(self):
+            super().__init__()
+
     class ProjectApi(PeeweeApi):
         url_prefix = '/api/projects/'
 
+        filterset_fields = ['name', 'user_id', 'attrs__color', 'attrs__size__width']
+
+        search_fields = ['name']
+
+        geo_fields = ('latitude', 'longitude')
+
+        index_advisor = PeeweeIndexAdvisor()
+
+        statement_cache = PeeweeStatementCache()
+
+        error_handler_class = CustomErrorHandler
+
+        def statement_cache_key(self):
+            return ()
+
         def queryset(self):
             return Project.select()
 
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                name = marshmallow.fields.Str(required=True)
+                user_id = marshmallow.fields.Int(required=True)
+                attrs = marshmallow.fields.Dict(required=False, allow_none=True)
+                latitude = marshmallow.fields.Float(required=False, allow_none=True)
+                longitude = marshmallow.fields.Float(required=False, allow_none=True)
+
+            return Serializer
+
+    class UserProjectApi(PeeweeApi):
+        url_prefix = '/api/user-projects/'
+
+        filterset_fields = ['name']
+
+        statement_cache = PeeweeStatementCache()
+
+        def queryset(self):
+            return Project.select()
+
+        def get_many_permissions(self, queryset):
+            return queryset.where(Project.user == int(request.headers['X-User-Id']))
+
         def serializer_class(self):
             class Serializer(marshmallow.Schema):
                 id = marshmallow.fields.Int(dump_only=True)
@@ -96,9 +157,263 @@ def setup_peewee_app(db, models):
 
             return Serializer
 
+    class KeyedUserProjectApi(UserProjectApi):
+        url_prefix = '/api/keyed-user-projects/'
+
+        statement_cache = PeeweeStatementCache()
+
+        def statement_cache_key(self):
+            return request.headers['X-User-Id']
+
+    class CursorUserApi(PeeweeApi):
+        url_prefix = '/api/cursor-users/'
+
+        pagination = PeeweeCursorPagination(page_size=2, secret_key='test')
+
+        def queryset(self):
+            return User.select()
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class EmailCursorUserApi(PeeweeApi):
+        url_prefix = '/api/email-cursor-users/'
+
+        pagination = PeeweeCursorPagination(ordering='-email', page_size=2, secret_key='test')
+
+        # The cursor replaces this ORDER BY with its own
+        def queryset(self):
+            return User.select().order_by(User.id)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class WindowCountUserApi(PeeweeApi):
+        url_prefix = '/api/window-count-users/'
+
+        pagination = PeeweePageNumberPaginationWindowCount(page_size=2, max_page_size=10, db=db)
+
+        def queryset(self):
+            return User.select().order_by(User.id)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class CounterUserApi(PeeweeApi):
+        url_prefix = '/api/counter-users/'
+
+        model = User
+
+        counter_table = 'test_row_counts'
+
+        filterset_fields = ['id', 'email']
+        trigram_fields = ['email']
+
+        ordering_fields = ['id', 'email']
+
+        pagination = PeeweeLimitOffsetPaginationEagerCount(default_limit=10, db=db)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class EstimatedUserApi(PeeweeApi):
+        url_prefix = '/api/estimated-users/'
+
+        model = User
+
+        filterset_fields = ['email']
+
+        pagination = PeeweeLimitOffsetPaginationEstimatedCount(default_limit=2, estimate_threshold=3, db=db)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class EstimatedPageUserApi(PeeweeApi):
+        url_prefix = '/api/estimated-page-users/'
+
+        model = User
+
+        filterset_fields = ['email']
+
+        pagination = PeeweePageNumberPaginationEstimatedCount(page_size=2, estimate_threshold=3, db=db)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class ConcurrentCountUserApi(PeeweeApi):
+        url_prefix = '/api/concurrent-count-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        pagination = PeeweeLimitOffsetPaginationEagerCount(default_limit=2, concurrent_count=True, db=db)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class CachedCountUserApi(PeeweeApi):
+        url_prefix = '/api/cached-count-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        pagination = PeeweeLimitOffsetPaginationEagerCount(default_limit=2, count_cache=CountCache(), db=db)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class CachedCountChildUserApi(CachedCountUserApi):
+        url_prefix = '/api/cached-count-child-users/'
+
+    class ConcurrentCountPageUserApi(PeeweeApi):
+        url_prefix = '/api/concurrent-count-page-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        pagination = PeeweePageNumberPaginationEagerCount(page_size=2, concurrent_count=True, db=db)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class DeferredUserApi(PeeweeApi):
+        url_prefix = '/api/deferred-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        ordering_fields = ['id', 'email']
+
+        pagination = PeeweeLimitOffsetPagination(default_limit=2, deferred_join=True)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class DeferredPageUserApi(PeeweeApi):
+        url_prefix = '/api/deferred-page-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        ordering_fields = ['id', 'email']
+
+        pagination = PeeweePageNumberPagination(page_size=2, deferred_join=True)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class CachedPageUserApi(DeferredPageUserApi):
+        url_prefix = '/api/cached-page-users/'
+
+        statement_cache = PeeweeStatementCache()
+
+        def statement_cache_key(self):
+            return ()
+
+    class CachedCursorUserApi(EmailCursorUserApi):
+        url_prefix = '/api/cached-cursor-users/'
+
+        statement_cache = PeeweeStatementCache()
+
+        def statement_cache_key(self):
+            return ()
+
+    class BoundaryUserApi(PeeweeApi):
+        url_prefix = '/api/boundary-users/'
+
+        pagination = PeeweePageNumberPagination(page_size=2, page_boundaries=PageBoundaryIndex(every=1))
+
+        def queryset(self):
+            return User.select().order_by(User.id)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class StructUserApi(PeeweeApi):
+        url_prefix = '/api/struct-users/'
+
+        model = User
+
+        def serializer_class(self):
+            return UserStruct
+
     UserApi.register_app(app, db)
     UserAddressApi.register_app(app, db)
     ProjectApi.register_app(app, db)
+    UserProjectApi.register_app(app, db)
+    KeyedUserProjectApi.register_app(app, db)
+    CursorUserApi.register_app(app, db)
+    EmailCursorUserApi.register_app(app, db)
+    WindowCountUserApi.register_app(app, db)
+    CounterUserApi.install_row_counter(db)
+    CounterUserApi.register_app(app, db)
+    BoundaryUserApi.register_app(app, db)
+    DeferredUserApi.register_app(app, db)
+    DeferredPageUserApi.register_app(app, db)
+    CachedPageUserApi.register_app(app, db)
+    CachedCursorUserApi.register_app(app, db)
+    ConcurrentCountUserApi.register_app(app, db)
+    ConcurrentCountPageUserApi.register_app(app, db)
+    CachedCountUserApi.register_app(app, db)
+    CachedCountChildUserApi.register_app(app, db)
+    EstimatedUserApi.register_app(app, db)
+    EstimatedPageUserApi.register_app(app, db)
+
+    if UserStruct is not None:
+        StructUserApi.register_app(app, db)
 
     return app
 
@@ -208,7 +523,15 @@ class TestPeewee(TestBase):
         self.app = self.setup_app(self.db, self.models)
         self.testclient = self.app.test_client()
 
+    def analyze(self, table_name):
+        sql = f'ANALYZE TABLE {table_name}' if isinstance(self.db, MySQLDatabase) else f'ANALYZE {table_name}'
+
+        with self.db:
+            self.db.execute_sql(sql)
+
 
 class TestPeeweeSimple(TestPeewee):
+    is_simple = True
+
     def setup_app(self, db, models):
         return setup_peewee_simple_app(db, models)
@@ -1,14 +1,28 @@
 from datetime import datetime
 
-from flask import Flask
+from flask import Flask, request
 from pyrestsql.api.sqlalchemy import SqlAlchemyApi as SqlAlchemyApi, insert_where as insert_where_sqlalchemy
+from pyrestsql.api.sqlalchemy.pagination import (
+    CursorPagination as SqlAlchemyCursorPagination,
+    LimitOffsetPaginationEagerCount as SqlAlchemyLimitOffsetPaginationEagerCount,
+    PageNumberPaginationWindowCount as SqlAlchemyPageNumberPaginationWindowCount,
+    LimitOffsetPagination as SqlAlchemyLimitOffsetPagination,
+    PageNumberPagination as SqlAlchemyPageNumberPagination,
+    PageNumberPaginationEagerCount as SqlAlchemyPageNumberPaginationEagerCount,
+    LimitOffsetPaginationEstimatedCount as SqlAlchemyLimitOffsetPaginationEstimatedCount,
+    PageNumberPaginationEstimatedCount as SqlAlchemyPageNumberPaginationEstimatedCount,
+)
+from pyrestsql.api import ErrorHandler
+from pyrestsql.api.pagination import CountCache, PageBoundaryIndex
+from pyrestsql.api.sqlalchemy.advisor import IndexAdvisor as SqlAlchemyIndexAdvisor
+from pyrestsql.api.sqlalchemy.statements import StatementCache as SqlAlchemyStatementCache
 from pyrestsql.api.sqlalchemy.simple import SimpleModelApi as SqlAlchemySimpleModelApi
 import marshmallow
 import sqlalchemy
 import sqlalchemy.orm
 
 from sqlalchemy import select, update, delete
-from tests.core import TestBase
+from tests.core import TestBase, UserStruct
 
 
 def setup_sqlalchemy_database(engine):
@@ -29,9 +43,15 @@ def setup_sqlalchemy_database(engine):
         id = _make_id_column(engine, __tablename__)
         name = sqlalchemy.Column(sqlalchemy.String(30), nullable=False)
         user_id = sqlalchemy.Column(sqlalchemy.Integer, sqlalchemy.ForeignKey('test_users.id', ondelete='CASCADE'), nullable=False)
+        attrs = sqlalchemy.Column(sqlalchemy.JSON, nullable=True)
+        latitude = sqlalchemy.Column(sqlalchemy.Float, nullable=True)
+        longitude = sqlalchemy.Column(sqlalchemy.Float, nullable=True)
 
     print('drop_all start', datetime.now())
     Base.metadata.drop_all(engine)
+    if engine.dialect.name != 'oracle':
+        with engine.begin() as conn:
+            conn.exec_driver_sql('DROP TABLE IF EXISTS test_row_counts')
     print('drop_all end', datetime.now())
     # TODO for Oracle, drop_all is taking 15 seconds??
     Base.metadata.create_all(engine)
@@ -88,9 +108,28 @@ def setup_sqlalchemy_app(Session, models):
 
             return Serializer
 
+    class CustomErrorHandler(ErrorHandler):
+        def __init__(self):
+            super().__init__()
+
     class ProjectApi(SqlAlchemyApi):
         url_prefix = '/api/projects'
 
+        filterset_fields = ['name', 'user_id', 'attrs__color', 'attrs__size__width']
+
+        search_fields = ['name']
+
+        geo_fields = ('latitude', 'longitude')
+
+        index_advisor = SqlAlchemyIndexAdvisor()
+
+        statement_cache = SqlAlchemyStatementCache()
+
+        error_handler_class = CustomErrorHandler
+
+        def statement_cache_key(self):
+            return ()
+
         def queryset(self):
             return sqlalchemy.select(Project)
 
@@ -99,12 +138,294 @@ def setup_sqlalchemy_app(Session, models):
                 id = marshmallow.fields.Int(dump_only=True)
                 name = marshmallow.fields.Str(required=True)
                 user_id = marshmallow.fields.Int(required=True)
+                attrs = marshmallow.fields.Dict(required=False, allow_none=True)
+                latitude = marshmallow.fields.Float(required=False, allow_none=True)
+                longitude = marshmallow.fields.Float(required=False, allow_none=True)
+
+            return Serializer
+
+    class UserProjectApi(SqlAlchemyApi):
+        url_prefix = '/api/user-projects/'
+
+        filterset_fields = ['name']
+
+        statement_cache = SqlAlchemyStatementCache()
+
+        def queryset(self):
+            return sqlalchemy.select(Project)
+
+        def get_many_permissions(self, queryset):
+            return queryset.where(Project.user_id == int(request.headers['X-User-Id']))
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                name = marshmallow.fields.Str(required=True)
+                user_id = marshmallow.fields.Int(required=True)
+
+            return Serializer
+
+    class KeyedUserProjectApi(UserProjectApi):
+        url_prefix = '/api/keyed-user-projects/'
+
+        statement_cache = SqlAlchemyStatementCache()
+
+        def statement_cache_key(self):
+            return request.headers['X-User-Id']
+
+    class CursorUserApi(SqlAlchemyApi):
+        url_prefix = '/api/cursor-users/'
+
+        pagination = SqlAlchemyCursorPagination(page_size=2, secret_key='test')
+
+        def queryset(self):
+            return sqlalchemy.select(User)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class EmailCursorUserApi(SqlAlchemyApi):
+        url_prefix = '/api/email-cursor-users/'
+
+        pagination = SqlAlchemyCursorPagination(ordering='-email', page_size=2, secret_key='test')
+
+        # The cursor replaces this ORDER BY with its own
+        def queryset(self):
+            return sqlalchemy.select(User).order_by(User.id)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class WindowCountUserApi(SqlAlchemyApi):
+        url_prefix = '/api/window-count-users/'
+
+        pagination = SqlAlchemyPageNumberPaginationWindowCount(page_size=2, max_page_size=10, Session=Session)
+
+        def queryset(self):
+            return sqlalchemy.select(User).order_by(User.id)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class CounterUserApi(SqlAlchemyApi):
+        url_prefix = '/api/counter-users/'
+
+        model = User
+
+        counter_table = 'test_row_counts'
+
+        filterset_fields = ['id', 'email']
+        trigram_fields = ['email']
+
+        ordering_fields = ['id', 'email']
+
+        pagination = SqlAlchemyLimitOffsetPaginationEagerCount(default_limit=10, Session=Session)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class EstimatedUserApi(SqlAlchemyApi):
+        url_prefix = '/api/estimated-users/'
+
+        model = User
+
+        filterset_fields = ['email']
+
+        pagination = SqlAlchemyLimitOffsetPaginationEstimatedCount(
+            default_limit=2, estimate_threshold=3, Session=Session
+        )
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class EstimatedPageUserApi(SqlAlchemyApi):
+        url_prefix = '/api/estimated-page-users/'
+
+        model = User
+
+        filterset_fields = ['email']
+
+        pagination = SqlAlchemyPageNumberPaginationEstimatedCount(page_size=2, estimate_threshold=3, Session=Session)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
 
             return Serializer
 
+    class ConcurrentCountUserApi(SqlAlchemyApi):
+        url_prefix = '/api/concurrent-count-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        pagination = SqlAlchemyLimitOffsetPaginationEagerCount(default_limit=2, concurrent_count=True, Session=Session)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class CachedCountUserApi(SqlAlchemyApi):
+        url_prefix = '/api/cached-count-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        pagination = SqlAlchemyLimitOffsetPaginationEagerCount(
+            default_limit=2, count_cache=CountCache(), Session=Session
+        )
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class CachedCountChildUserApi(CachedCountUserApi):
+        url_prefix = '/api/cached-count-child-users/'
+
+    class ConcurrentCountPageUserApi(SqlAlchemyApi):
+        url_prefix = '/api/concurrent-count-page-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        pagination = SqlAlchemyPageNumberPaginationEagerCount(page_size=2, concurrent_count=True, Session=Session)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class DeferredUserApi(SqlAlchemyApi):
+        url_prefix = '/api/deferred-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        ordering_fields = ['id', 'email']
+
+        pagination = SqlAlchemyLimitOffsetPagination(default_limit=2, deferred_join=True)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class DeferredPageUserApi(SqlAlchemyApi):
+        url_prefix = '/api/deferred-page-users/'
+
+        model = User
+
+        filterset_fields = ['id']
+
+        ordering_fields = ['id', 'email']
+
+        pagination = SqlAlchemyPageNumberPagination(page_size=2, deferred_join=True)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class CachedPageUserApi(DeferredPageUserApi):
+        url_prefix = '/api/cached-page-users/'
+
+        statement_cache = SqlAlchemyStatementCache()
+
+        def statement_cache_key(self):
+            return ()
+
+    class CachedCursorUserApi(EmailCursorUserApi):
+        url_prefix = '/api/cached-cursor-users/'
+
+        statement_cache = SqlAlchemyStatementCache()
+
+        def statement_cache_key(self):
+            return ()
+
+    class BoundaryUserApi(SqlAlchemyApi):
+        url_prefix = '/api/boundary-users/'
+
+        pagination = SqlAlchemyPageNumberPagination(page_size=2, page_boundaries=PageBoundaryIndex(every=1))
+
+        def queryset(self):
+            return sqlalchemy.select(User).order_by(User.id)
+
+        def serializer_class(self):
+            class Serializer(marshmallow.Schema):
+                id = marshmallow.fields.Int(dump_only=True)
+                email = marshmallow.fields.Str(required=True)
+
+            return Serializer
+
+    class StructUserApi(SqlAlchemyApi):
+        url_prefix = '/api/struct-users/'
+
+        model = User
+
+        def serializer_class(self):
+            return UserStruct
+
     UserApi.register_app(app, Session)
     UserAddressApi.register_app(app, Session)
     ProjectApi.register_app(app, Session)
+    UserProjectApi.register_app(app, Session)
+    KeyedUserProjectApi.register_app(app, Session)
+    CursorUserApi.register_app(app, Session)
+    EmailCursorUserApi.register_app(app, Session)
+    WindowCountUserApi.register_app(app, Session)
+    CounterUserApi.install_row_counter(Session)
+    CounterUserApi.register_app(app, Session)
+    BoundaryUserApi.register_app(app, Session)
+    DeferredUserApi.register_app(app, Session)
+    DeferredPageUserApi.register_app(app, Session)
+    CachedPageUserApi.register_app(app, Session)
+    CachedCursorUserApi.register_app(app, Session)
+    ConcurrentCountUserApi.register_app(app, Session)
+    ConcurrentCountPageUserApi.register_app(app, Session)
+    CachedCountUserApi.register_app(app, Session)
+    CachedCountChildUserApi.register_app(app, Session)
+    EstimatedUserApi.register_app(app, Session)
+    EstimatedPageUserApi.register_app(app, Session)
+
+    if UserStruct is not None:
+        StructUserApi.register_app(app, Session)
 
     return app
 
@@ -213,7 +534,23 @@ class TestSQLAlchemy(TestBase):
         self.app = self.setup_app(self.Session, self.models)
         self.testclient = self.app.test_client()
 
+    def analyze(self, table_name):
+        with self.Session() as session:
+            dialect = session.bind.dialect.name
+
+            if dialect == 'mysql':
+                sql = f'ANALYZE TABLE {table_name}'
+            elif dialect == 'oracle':
+                sql = f'ANALYZE TABLE {table_name} COMPUTE STATISTICS'
+            else:
+                sql = f'ANALYZE {table_name}'
+
+            session.execute(sqlalchemy.text(sql))
+            session.commit()
+
 
 class TestSQLAlchemySimple(TestSQLAlchemy):
+    is_simple = True
+
     def setup_app(self, db, models):
         return setup_sqlalchemy_simple_app(db, models)
@@ -1,5 +1,6 @@
 from tests.peewee_core import TestPeewee, TestPeeweeSimple, setup_peewee_database
 from peewee import MySQLDatabase
+from playhouse.mysql_ext import JSONField
 
 
 def setup_peewee_mysql_database():
@@ -8,7 +9,7 @@ def setup_peewee_mysql_database():
         autoconnect=False
     )
 
-    return setup_peewee_database(db)
+    return setup_peewee_database(db, JSONField)
 
 
 class TestPeeweeMysql(TestPeewee):
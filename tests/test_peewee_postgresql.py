@@ -1,5 +1,6 @@
 from tests.peewee_core import TestPeewee, TestPeeweeSimple, setup_peewee_database
 from peewee import PostgresqlDatabase
+from playhouse.postgres_ext import BinaryJSONField
 
 
 
@@ -9,7 +10,7 @@ def setup_peewee_postgres_database():
         autoconnect=False
     )
 
-    return setup_peewee_database(db)
+    return setup_peewee_database(db, BinaryJSONField)
 
 
 class TestPeeweePostgres(TestPeewee):
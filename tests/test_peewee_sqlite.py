@@ -1,11 +1,12 @@
 from tests.peewee_core import TestPeewee, TestPeeweeSimple, setup_peewee_database
 from peewee import SqliteDatabase
+from playhouse.sqlite_ext import JSONField
 
 
 def setup_peewee_sqlite_database():
     db = SqliteDatabase('sqlite_test.db', pragmas={'foreign_keys': 'ON'})
 
-    return setup_peewee_database(db)
+    return setup_peewee_database(db, JSONField)
 
 
 class TestPeeweeSqlite(TestPeewee):
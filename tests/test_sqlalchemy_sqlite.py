@@ -2,8 +2,8 @@ import sqlalchemy
 from tests.sqlalchemy_core import setup_sqlalchemy_database, TestSQLAlchemy, TestSQLAlchemySimple
 
 
-def setup_sqlalchemy_sqlite_database():
-    engine = sqlalchemy.create_engine("sqlite+pysqlite:///:memory:", echo=True, future=True)
+def setup_sqlalchemy_sqlite_database(url="sqlite+pysqlite:///:memory:"):
+    engine = sqlalchemy.create_engine(url, echo=True, future=True)
     with engine.connect() as conn:
         conn.execute(sqlalchemy.text('pragma foreign_keys=on'))
 
@@ -11,8 +11,17 @@ def setup_sqlalchemy_sqlite_database():
 
 
 class TestSQLAlchemySqlite(TestSQLAlchemy):
+    url = "sqlite+pysqlite:///:memory:"
+
     def setup_database(self):
-        return setup_sqlalchemy_sqlite_database()
+        return setup_sqlalchemy_sqlite_database(self.url)
+
+    def test_concurrent_count(self):
+        # The count runs on another connection of the pool, which would open an empty in-memory database of its own
+        self.url = "sqlite+pysqlite:///sqlite_test.db"
+        super().test_concurrent_count()
+
+        assert isinstance(self.Session.kw['bind'].pool, sqlalchemy.pool.QueuePool)
 
 
 class TestSQLAlchemySimpleSqlite(TestSQLAlchemySimple):